@@ -0,0 +1,261 @@
+"""Scrape many sellers at once over a pool of worker processes."""
+
+import argparse
+import asyncio
+import atexit
+import json
+import logging
+import multiprocessing
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from lazy_imports import async_playwright
+from settings import configure_logging, logging_options
+from sinks import SINKS, sink_format
+
+SUMMARY_FILE = "batch_summary.json"
+
+# One event loop and supervised browser per worker process, reused for every
+# seller the process is given so a browser is launched once per worker, not
+# per seller, and relaunched by the supervisor when it crashes.
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_playwright = None
+_supervisor = None
+
+
+def read_seller_urls(path: str) -> List[str]:
+    """Seller URLs from a file, one per line; blank lines and # comments are skipped."""
+    with open(path, encoding="utf-8") as f:
+        lines = (line.split("#", 1)[0].strip() for line in f)
+        return list(dict.fromkeys(line for line in lines if line))
+
+
+def seller_slug(seller_url: str) -> str:
+    """File-name friendly seller name: the ``_ssn`` parameter or last path segment."""
+    parsed = urlparse(seller_url)
+    name = parse_qs(parsed.query).get("_ssn", [""])[0]
+    if not name:
+        segments = [s for s in parsed.path.split("/") if s]
+        name = segments[-1] if segments else parsed.netloc
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", name).strip("._") or "seller"
+
+
+def output_paths(
+    seller_urls: Iterable[str], output_dir: str, output_format: str
+) -> Dict[str, str]:
+    """One output file per seller, de-duplicating sellers with the same name."""
+    paths, used = {}, set()
+    for seller_url in seller_urls:
+        slug = base = seller_slug(seller_url)
+        n = 1
+        while slug in used:
+            n += 1
+            slug = f"{base}_{n}"
+        used.add(slug)
+        paths[seller_url] = os.path.join(output_dir, f"{slug}.{output_format}")
+    return paths
+
+
+def _init_worker(log_options: Optional[Dict]) -> None:
+    global _loop
+    if log_options is not None:
+        configure_logging(**log_options)
+    _loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_loop)
+    atexit.register(_shutdown_worker)
+
+
+async def _worker_browser(options: Dict):
+    """The worker's browser supervisor, started on the first seller."""
+    from browser_supervisor import BrowserSupervisor
+    from scraper import launch_browser
+
+    global _playwright, _supervisor
+    if _supervisor is None:
+        _playwright = await async_playwright().start()
+        _supervisor = await BrowserSupervisor(
+            _playwright,
+            launch_browser,
+            **{
+                name: options[f"browser_{name}"]
+                for name in ("max_navigations", "max_memory_mb")
+                if f"browser_{name}" in options
+            },
+        ).start()
+    await _supervisor.ensure()
+    return _supervisor
+
+
+async def _close_worker_browser() -> None:
+    if _supervisor is not None:
+        await _supervisor.close()
+    if _playwright is not None:
+        await _playwright.stop()
+
+
+def _shutdown_worker() -> None:
+    try:
+        _loop.run_until_complete(_close_worker_browser())
+    except Exception as e:
+        logging.warning(f"Error closing worker browser: {e}")
+    finally:
+        _loop.close()
+
+
+def scrape_seller_in_worker(seller_url: str, output_file: str, options: Dict) -> Dict:
+    """
+    Scrape one seller with the worker's browser.
+
+    Never raises: failures are reported in the returned status so one bad
+    seller does not abort the batch.
+    """
+    from scraper import parse_ebay_seller
+
+    start = time.monotonic()
+    status = {"seller_url": seller_url, "output_file": output_file, "pid": os.getpid()}
+    try:
+        browser = _loop.run_until_complete(_worker_browser(options))
+        summary = _loop.run_until_complete(
+            parse_ebay_seller(seller_url, output_file, browser=browser, **options)
+        )
+        status.update(summary, status="ok", error=None)
+    except Exception as e:
+        logging.error(f"Seller {seller_url} failed: {e}")
+        status.update(status="failed", error=f"{type(e).__name__}: {e}")
+    status["seconds"] = round(time.monotonic() - start, 3)
+    return status
+
+
+def run_batch(
+    seller_urls: Iterable[str],
+    output_dir: str = ".",
+    output_format: str = "xlsx",
+    workers: Optional[int] = None,
+    state_dir: Optional[str] = None,
+    index_file: Optional[str] = None,
+    **options,
+) -> Dict:
+    """
+    Scrape every seller in ``seller_urls``, spread over ``workers`` processes.
+
+    Each worker process runs its own browser and scrapes its sellers one after
+    another, each into its own file in ``output_dir``. ``workers`` defaults to
+    the CPU count. With ``state_dir`` every seller gets a resumable state file
+    there, which needs csv or jsonl output; ``index_file`` is shared by all
+    sellers. Other ``options`` are passed to ``parse_ebay_seller``.
+
+    Returns the aggregate summary, which is also written to ``output_dir``.
+    """
+    seller_urls = list(dict.fromkeys(seller_urls))
+    if not seller_urls:
+        raise ValueError("No seller URLs given")
+    os.makedirs(output_dir, exist_ok=True)
+    if state_dir:
+        if not SINKS[sink_format("", output_format)].appendable:
+            raise ValueError(
+                f"state_dir needs csv or jsonl output, not {output_format}"
+            )
+        os.makedirs(state_dir, exist_ok=True)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(seller_urls)))
+    paths = output_paths(seller_urls, output_dir, output_format)
+
+    logging.info(f"Scraping {len(seller_urls)} sellers with {workers} workers")
+    start = time.monotonic()
+    results = []
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(logging_options(),),
+    ) as pool:
+        futures = {}
+        for seller_url, output_file in paths.items():
+            seller_options = dict(options, output_format=output_format)
+            if state_dir:
+                stem = os.path.splitext(os.path.basename(output_file))[0]
+                seller_options["state_file"] = os.path.join(state_dir, f"{stem}.db")
+            if index_file:
+                seller_options["index_file"] = index_file
+            future = pool.submit(
+                scrape_seller_in_worker, seller_url, output_file, seller_options
+            )
+            futures[future] = seller_url
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:  # The worker process itself died
+                result = {
+                    "seller_url": futures[future],
+                    "output_file": paths[futures[future]],
+                    "status": "failed",
+                    "error": f"{type(e).__name__}: {e}",
+                }
+            results.append(result)
+            logging.info(
+                f"[{len(results)}/{len(futures)}] {result['seller_url']}: "
+                f"{result['status']}"
+            )
+
+    results.sort(key=lambda r: seller_urls.index(r["seller_url"]))
+    summary = {
+        "sellers": len(results),
+        "succeeded": sum(r["status"] == "ok" for r in results),
+        "failed": sum(r["status"] != "ok" for r in results),
+        "rows": sum(r.get("rows", 0) for r in results),
+        "workers": workers,
+        "seconds": round(time.monotonic() - start, 3),
+        "results": results,
+    }
+    summary_path = os.path.join(output_dir, SUMMARY_FILE)
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    logging.info(
+        f"Batch finished: {summary['succeeded']} ok, {summary['failed']} failed, "
+        f"{summary['rows']} rows in {summary['seconds']}s; summary at {summary_path}"
+    )
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from cli import add_run_arguments, run_options
+
+    parser = argparse.ArgumentParser(
+        prog="cli.py batch", description="Scrape many eBay sellers at once."
+    )
+    parser.add_argument("sellers", nargs="+", help="Seller URLs or files of URLs")
+    parser.add_argument("--output-dir", default="output")
+    parser.add_argument("--format", default="xlsx", dest="output_format")
+    parser.add_argument("--workers", type=int, default=None)
+    add_run_arguments(parser)
+    parser.add_argument("--state-dir", default=None)
+    parser.add_argument("--index-file", default=None)
+    args = parser.parse_args(argv)
+
+    seller_urls = []
+    for source in args.sellers:
+        if os.path.isfile(source):
+            seller_urls.extend(read_seller_urls(source))
+        else:
+            seller_urls.append(source)
+    summary = run_batch(
+        seller_urls,
+        output_dir=args.output_dir,
+        output_format=args.output_format,
+        workers=args.workers,
+        state_dir=args.state_dir,
+        index_file=args.index_file,
+        **run_options(args),
+    )
+    raise SystemExit(1 if summary["failed"] else 0)
+
+
+if __name__ == "__main__":
+    from cli import main as cli_main
+
+    cli_main(["batch", *sys.argv[1:]])
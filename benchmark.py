@@ -0,0 +1,200 @@
+"""End-to-end benchmark of parse_ebay_seller against the local mock eBay server.
+
+Runs fully offline (Chromium must be installed with ``playwright install``):
+
+    python benchmark.py --items 600 --engine playwright --latency 0.05
+
+``--import-time`` instead checks that importing the scraper stays fast and
+loads none of the heavy dependencies.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Optional
+
+from mock_ebay import MockCatalog, MockEbayServer
+from pagination import MAX_PAGE_SIZE
+from settings import CONCURRENT_TASK_LIMIT
+
+# Only loaded once a backend needs them, never by ``import scraper``
+HEAVY_MODULES = ("playwright", "openpyxl", "httpx", "lxml", "pyarrow", "decouple")
+# Median cumulative import time of the scraper in a fresh interpreter; about
+# half of it is asyncio itself.
+IMPORT_TIME_TARGET_MS = 100
+# Spread over several result pages, so page scheduling is part of the run
+DEFAULT_ITEMS = 2 * MAX_PAGE_SIZE + 120
+
+
+def peak_rss_mb() -> Dict[str, float]:
+    """Peak resident memory of this process and of its largest child.
+
+    The largest child is the Playwright driver or, once reaped, the biggest
+    browser process below it.
+    """
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024  # bytes vs KiB
+    return {
+        "scraper": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1),
+        "browser": round(
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale, 1
+        ),
+    }
+
+
+def import_time(module: str = "scraper", runs: int = 7) -> Dict:
+    """
+    Median time to import ``module`` in a fresh interpreter, as reported by
+    ``python -X importtime``, and the heavy dependencies the import loaded.
+    """
+    check = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    samples: List[float] = []
+    loaded = set()
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", check],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        # Lines read "import time: <self us> | <cumulative us> | <module>"
+        for line in result.stderr.splitlines():
+            fields = [field.strip() for field in line.split("|")]
+            if len(fields) == 3 and fields[2] == module:
+                samples.append(int(fields[1]) / 1000)
+        loaded.update(filter(None, result.stdout.strip().split(",")))
+    median = round(statistics.median(samples), 1)
+    return {
+        "module": module,
+        "median_ms": median,
+        "target_ms": IMPORT_TIME_TARGET_MS,
+        "heavy_modules_loaded": sorted(loaded),
+        "ok": median <= IMPORT_TIME_TARGET_MS and not loaded,
+    }
+
+
+def run_benchmark(
+    items: int = DEFAULT_ITEMS,
+    engine: str = "playwright",
+    concurrency: int = CONCURRENT_TASK_LIMIT,
+    output_format: str = "csv",
+    latency: float = 0.0,
+    jitter: float = 0.0,
+    failure_rate: float = 0.0,
+    throttle_rate: float = 0.0,
+    challenge_rate: float = 0.0,
+    fixtures_dir: Optional[str] = None,
+    seed: int = 1,
+) -> Dict:
+    """
+    Scrape a mock seller with ``items`` listings and measure the run.
+
+    Returns items and rows per second, peak RSS, the per-stage totals of the
+    run report and what the mock server saw.
+    """
+    catalog = MockCatalog(items, seed=seed)
+    server = MockEbayServer(
+        catalog,
+        latency=latency,
+        jitter=jitter,
+        failure_rate=failure_rate,
+        throttle_rate=throttle_rate,
+        challenge_rate=challenge_rate,
+        fixtures_dir=fixtures_dir,
+        seed=seed,
+    )
+    from scraper import parse_ebay_seller
+
+    with server, tempfile.TemporaryDirectory() as tmp:
+        report = asyncio.run(
+            parse_ebay_seller(
+                server.seller_url,
+                os.path.join(tmp, f"benchmark.{output_format}"),
+                concurrency=concurrency,
+                engine=engine,
+            )
+        )
+        requests = server.stats()
+
+    seconds = report["duration_s"] or float("nan")
+    return {
+        "items": items,
+        "engine": engine,
+        "concurrency": concurrency,
+        "latency_s": latency,
+        "rows": report["rows"],
+        "expected_rows": catalog.expected_rows(),
+        "seconds": seconds,
+        "items_per_s": round(items / seconds, 2),
+        "rows_per_s": round(report["rows"] / seconds, 2),
+        "peak_rss_mb": peak_rss_mb(),
+        "stage_seconds": {
+            stage: stats["total_s"] for stage, stats in report["stages"].items()
+        },
+        "wait_seconds": {
+            stage: stats["seconds"] for stage, stats in report["waits"].items()
+        },
+        "concurrency_stats": report["concurrency"],
+        "server_requests": requests,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="cli.py benchmark", description=__doc__.splitlines()[0]
+    )
+    parser.add_argument("--items", type=int, default=DEFAULT_ITEMS)
+    parser.add_argument(
+        "--engine", choices=("playwright", "http"), default="playwright"
+    )
+    parser.add_argument("--concurrency", type=int, default=CONCURRENT_TASK_LIMIT)
+    parser.add_argument("--format", default="csv", dest="output_format")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--challenge-rate", type=float, default=0.0)
+    parser.add_argument("--fixtures", default=None, help="Recorded item pages")
+    parser.add_argument("--output", default=None, help="Write the results as JSON")
+    parser.add_argument(
+        "--import-time", action="store_true", help="Only measure import time"
+    )
+    args = parser.parse_args(argv)
+
+    if args.import_time:
+        result = import_time()
+        print(json.dumps(result, indent=2))
+        raise SystemExit(0 if result["ok"] else 1)
+
+    result = run_benchmark(
+        items=args.items,
+        engine=args.engine,
+        concurrency=args.concurrency,
+        output_format=args.output_format,
+        latency=args.latency,
+        jitter=args.jitter,
+        failure_rate=args.failure_rate,
+        throttle_rate=args.throttle_rate,
+        challenge_rate=args.challenge_rate,
+        fixtures_dir=args.fixtures,
+    )
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    from cli import main as cli_main
+
+    cli_main(["benchmark", *sys.argv[1:]])
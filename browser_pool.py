@@ -0,0 +1,201 @@
+"""Bounded pool of warm browser contexts shared by scraping tasks."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, BrowserContext, Page
+
+POOL_MAX_USES = 50  # Borrows (one navigation each) before a context is replaced
+
+ContextSetup = Callable[["BrowserContext"], Awaitable[None]]
+
+
+class PooledPage:
+    """A context with its single page and usage bookkeeping."""
+
+    def __init__(self, context: BrowserContext, page: Page):
+        self.context = context
+        self.page = page
+        self.uses = 0
+        self.crashed = False
+        page.on("crash", self._on_crash)
+
+    def _on_crash(self, _page) -> None:
+        self.crashed = True
+
+    @property
+    def broken(self) -> bool:
+        """Crashed, closed, or left behind by a browser that was replaced."""
+        browser = self.context.browser
+        return (
+            self.crashed
+            or self.page.is_closed()
+            or (browser is not None and not browser.is_connected())
+        )
+
+    async def close(self) -> None:
+        try:
+            await self.context.close()
+        except Exception as e:
+            logging.warning(f"Error closing pooled context: {e}")
+
+
+class BrowserPool:
+    """
+    Lends out at most ``size`` warm pages, each in its own context.
+
+    Pages are reset to ``about:blank`` with cookies cleared when returned, and
+    their context is replaced after ``max_uses`` borrows or when the page
+    crashed or was closed by the borrower. ``setup_context`` runs on every
+    new context before its page is created, e.g. to install route handlers.
+    ``browser`` may be a ``BrowserSupervisor``; idle pages of a browser it
+    replaced are discarded instead of being lent out.
+    """
+
+    def __init__(
+        self,
+        browser: Browser,
+        size: int,
+        max_uses: int = POOL_MAX_USES,
+        setup_context: Optional[ContextSetup] = None,
+        **context_options,
+    ):
+        self.browser = browser
+        self.size = size
+        self.max_uses = max_uses
+        self.setup_context = setup_context
+        self.context_options = context_options
+        self.idle: asyncio.Queue = asyncio.Queue()
+        self.slots = asyncio.Semaphore(size)
+        self.created = 0
+        self.recycled = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.acquisitions = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.busy_time = 0.0
+        self.started = time.monotonic()
+
+    async def _new_pooled_page(self) -> PooledPage:
+        context = await self.browser.new_context(**self.context_options)
+        try:
+            if self.setup_context is not None:
+                await self.setup_context(context)
+            page = await context.new_page()
+        except Exception:
+            await context.close()
+            raise
+        self.created += 1
+        return PooledPage(context, page)
+
+    async def acquire(self) -> PooledPage:
+        """Borrow a page, waiting for a free slot when the pool is exhausted."""
+        start = time.monotonic()
+        await self.slots.acquire()
+        try:
+            pooled = None
+            while pooled is None and not self.idle.empty():
+                pooled = self.idle.get_nowait()
+                if pooled.broken:
+                    await pooled.close()
+                    self.recycled += 1
+                    pooled = None
+            if pooled is None:
+                pooled = await self._new_pooled_page()
+        except Exception:
+            self.slots.release()
+            raise
+
+        wait = time.monotonic() - start
+        self.acquisitions += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.in_use += 1
+        self.peak_in_use = max(self.peak_in_use, self.in_use)
+        pooled.uses += 1
+        return pooled
+
+    async def release(self, pooled: PooledPage) -> None:
+        """Return a page, resetting it or replacing its context."""
+        self.in_use -= 1
+        try:
+            if pooled.broken or pooled.uses >= self.max_uses:
+                await pooled.close()
+                self.recycled += 1
+                return
+            try:
+                await pooled.page.goto("about:blank")
+                await pooled.context.clear_cookies()
+            except Exception as e:
+                logging.warning(f"Resetting pooled page failed, recycling: {e}")
+                await pooled.close()
+                self.recycled += 1
+                return
+            self.idle.put_nowait(pooled)
+        finally:
+            self.slots.release()
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Page]:
+        """Borrow a page for the duration of the ``async with`` block."""
+        pooled = await self.acquire()
+        borrowed_at = time.monotonic()
+        try:
+            yield pooled.page
+        finally:
+            self.busy_time += time.monotonic() - borrowed_at
+            await self.release(pooled)
+
+    def stats(self) -> Dict[str, float]:
+        """Wait time and utilisation figures for the run report."""
+        elapsed = time.monotonic() - self.started
+        return {
+            "size": self.size,
+            "created": self.created,
+            "recycled": self.recycled,
+            "acquisitions": self.acquisitions,
+            "peak_in_use": self.peak_in_use,
+            "avg_wait_s": (
+                self.total_wait / self.acquisitions if self.acquisitions else 0.0
+            ),
+            "max_wait_s": self.max_wait,
+            "utilisation": (
+                self.busy_time / (elapsed * self.size) if elapsed > 0 else 0.0
+            ),
+        }
+
+    async def close(self) -> None:
+        while not self.idle.empty():
+            await self.idle.get_nowait().close()
+
+
+@asynccontextmanager
+async def borrow_page(
+    browser: Browser,
+    pool: Optional[BrowserPool] = None,
+    setup_context: Optional[ContextSetup] = None,
+    **context_options,
+) -> AsyncIterator[Page]:
+    """Borrow a page from ``pool``, or open a throwaway context without one."""
+    if pool is not None:
+        async with pool.page() as page:
+            yield page
+        return
+
+    context = await browser.new_context(**context_options)
+    try:
+        if setup_context is not None:
+            await setup_context(context)
+        yield await context.new_page()
+    finally:
+        try:
+            await context.close()
+        except Exception as e:
+            logging.error(f"Error closing browser context: {str(e)}")
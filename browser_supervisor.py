@@ -0,0 +1,241 @@
+"""Health-checked browser that is relaunched after crashes, hangs or heavy use."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from collections import Counter, defaultdict
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, Optional
+
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, BrowserContext, Frame, Page
+
+DEFAULT_MAX_NAVIGATIONS = 2000
+DEFAULT_MAX_MEMORY_MB = 3072
+CHECK_INTERVAL = 15.0  # Seconds between health checks
+PROBE_TIMEOUT = 15.0  # A browser that cannot open a context this fast is hung
+CLOSE_TIMEOUT = 10.0
+
+Launcher = Callable[[object], Awaitable["Browser"]]
+
+
+def descendant_rss_mb(root_pid: Optional[int] = None) -> Optional[float]:
+    """
+    Resident memory of every process below ``root_pid`` (this process by
+    default), i.e. the Playwright driver and the browsers it started.
+
+    Read from /proc, so None on systems without it.
+    """
+    root_pid = root_pid or os.getpid()
+    try:
+        entries = [entry for entry in os.listdir("/proc") if entry.isdigit()]
+    except OSError:
+        return None
+    children = defaultdict(list)
+    rss_pages = {}
+    for entry in entries:
+        try:
+            with open(f"/proc/{entry}/stat", encoding="utf-8") as f:
+                stat = f.read()
+        except OSError:
+            continue  # The process exited while we were looking
+        # The command name may contain spaces, the fields after it do not
+        fields = stat[stat.rindex(")") + 2 :].split()
+        pid = int(entry)
+        children[int(fields[1])].append(pid)
+        rss_pages[pid] = int(fields[21])
+    total, stack = 0, list(children[root_pid])
+    while stack:
+        pid = stack.pop()
+        total += rss_pages.get(pid, 0)
+        stack.extend(children[pid])
+    return total * os.sysconf("SC_PAGE_SIZE") / 1024**2
+
+
+class BrowserSupervisor:
+    """
+    Owns the scraping browser and relaunches it when it becomes unusable.
+
+    The browser is replaced when it disconnects (crash), when opening a
+    context takes longer than ``probe_timeout`` (hang), when the browser
+    processes use more than ``max_memory_mb``, or after ``max_navigations``
+    main-frame navigations. Contexts are opened through ``new_context``,
+    so ``BrowserPool`` and ``borrow_page`` accept the supervisor in place of
+    a browser and pick up the new browser once the old pages are gone.
+
+    Work running on a replaced browser fails; callers record the
+    ``generation`` they started on and retry when ``lost`` reports that the
+    browser was replaced since.
+    """
+
+    def __init__(
+        self,
+        playwright,
+        launch: Launcher,
+        max_navigations: Optional[int] = DEFAULT_MAX_NAVIGATIONS,
+        max_memory_mb: Optional[float] = DEFAULT_MAX_MEMORY_MB,
+        check_interval: float = CHECK_INTERVAL,
+        probe_timeout: float = PROBE_TIMEOUT,
+    ):
+        self.playwright = playwright
+        self.launch = launch
+        self.max_navigations = max_navigations
+        self.max_memory_mb = max_memory_mb
+        self.check_interval = check_interval
+        self.probe_timeout = probe_timeout
+        self.browser: Optional[Browser] = None
+        self.generation = 0
+        self.navigations = 0
+        self.total_navigations = 0
+        self.restarts = 0
+        self.restart_reasons: Counter = Counter()
+        self.requeued = 0
+        self.peak_rss_mb = 0.0
+        self.closing = False
+        self._lock = asyncio.Lock()
+        self._monitor: Optional[asyncio.Task] = None
+        self._pending_restart: Optional[asyncio.Task] = None
+
+    async def start(self) -> "BrowserSupervisor":
+        if self.browser is None:
+            await self._launch()
+        if self._monitor is None:
+            self._monitor = asyncio.create_task(self._watch(), name="browser-health")
+        return self
+
+    async def _launch(self) -> None:
+        browser = await self.launch(self.playwright)
+        browser.on("disconnected", self._on_disconnected)
+        self.browser = browser
+        self.navigations = 0
+
+    def _on_disconnected(self, browser: Browser) -> None:
+        if self.closing or browser is not self.browser:
+            return  # Closed on purpose, or an already replaced browser
+        logging.error("Browser disconnected, restarting it")
+        if self._pending_restart is None or self._pending_restart.done():
+            self._pending_restart = asyncio.create_task(
+                self.restart("crash", self.generation)
+            )
+
+    async def restart(self, reason: str, generation: Optional[int] = None) -> None:
+        """Replace the browser, unless it was already replaced since ``generation``."""
+        async with self._lock:
+            if self.closing or (
+                generation is not None and generation != self.generation
+            ):
+                return
+            logging.warning(
+                f"Restarting browser ({reason}) after "
+                f"{self.navigations} navigations, generation {self.generation}"
+            )
+            old, self.browser = self.browser, None
+            if old is not None and old.is_connected():
+                try:
+                    await asyncio.wait_for(old.close(), CLOSE_TIMEOUT)
+                except Exception as e:
+                    logging.warning(f"Error closing the replaced browser: {e}")
+            await self._launch()
+            # Bumped last, so callers waiting on the lock see the new browser
+            self.generation += 1
+            self.restarts += 1
+            self.restart_reasons[reason] += 1
+
+    def lost(self, generation: int) -> bool:
+        """Whether the browser of ``generation`` was replaced or has died."""
+        return generation != self.generation or not (
+            self.browser is not None and self.browser.is_connected()
+        )
+
+    async def ensure(self) -> Browser:
+        """The current browser, relaunched first if it has died."""
+        if self.browser is None or not self.browser.is_connected():
+            await self.restart("crash", self.generation)
+        return self.browser
+
+    async def new_context(self, **options) -> BrowserContext:
+        browser = await self.ensure()
+        context = await browser.new_context(**options)
+        context.on("page", self._watch_page)
+        return context
+
+    async def new_page(self, **options) -> Page:
+        """Page in a fresh context, for callers that do not use a pool."""
+        browser = await self.ensure()
+        page = await browser.new_page(**options)
+        self._watch_page(page)
+        return page
+
+    def _watch_page(self, page: Page) -> None:
+        page.on("framenavigated", self._on_navigated)
+
+    def _on_navigated(self, frame: Frame) -> None:
+        if frame.parent_frame is None and frame.url != "about:blank":
+            self.navigations += 1
+            self.total_navigations += 1
+
+    async def check(self) -> Optional[str]:
+        """Run the health checks; the reason to restart, or None if healthy."""
+        browser = self.browser
+        if browser is None or not browser.is_connected():
+            return "crash"
+        try:
+            context = await asyncio.wait_for(browser.new_context(), self.probe_timeout)
+            await context.close()
+        except asyncio.TimeoutError:
+            return "hang"
+        except Exception as e:
+            logging.warning(f"Browser health probe failed: {e}")
+            return "crash"
+        if self.max_navigations and self.navigations >= self.max_navigations:
+            return "navigations"
+        rss = await asyncio.to_thread(descendant_rss_mb)
+        if rss is not None:
+            self.peak_rss_mb = max(self.peak_rss_mb, rss)
+            if self.max_memory_mb and rss > self.max_memory_mb:
+                return "memory"
+        return None
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            generation = self.generation
+            try:
+                reason = await self.check()
+                if reason is not None:
+                    await self.restart(reason, generation)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Browser health check failed: {e}")
+
+    async def close(self) -> None:
+        self.closing = True
+        for task in (self._monitor, self._pending_restart):
+            if task is not None:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        self._monitor = self._pending_restart = None
+        if self.browser is not None and self.browser.is_connected():
+            try:
+                await self.browser.close()
+            except Exception as e:
+                logging.warning(f"Error closing browser: {e}")
+        self.browser = None
+
+    async def __aenter__(self) -> "BrowserSupervisor":
+        return await self.start()
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    def stats(self) -> Dict:
+        return {
+            "restarts": self.restarts,
+            "restart_reasons": dict(self.restart_reasons),
+            "requeued": self.requeued,
+            "generation": self.generation,
+            "navigations": self.total_navigations,
+            "peak_rss_mb": round(self.peak_rss_mb, 1),
+        }
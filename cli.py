@@ -0,0 +1,161 @@
+"""
+Command line entry point of the scraper.
+
+    python cli.py scrape https://www.ebay.com/str/sellername -o output.csv
+    python cli.py batch sellers.txt --output-dir output
+    python cli.py benchmark --items 240
+    python cli.py mock-server --port 8000
+    python cli.py redrive output.failed.jsonl -o recovered.csv
+    python cli.py worker https://www.ebay.com/str/sellername --work-queue queue.db
+
+Each command's module is imported only when it runs, and logging is set up
+here rather than on import.
+"""
+
+import argparse
+import asyncio
+import importlib
+import logging
+import sys
+from typing import List, Optional
+
+from browser_supervisor import DEFAULT_MAX_MEMORY_MB, DEFAULT_MAX_NAVIGATIONS
+from response_cache import DEFAULT_MAX_BYTES
+from selector_health import FAIL_FAST_AFTER
+from settings import (
+    CONCURRENT_TASK_LIMIT,
+    ENGINES,
+    LOG_FILE,
+    MAX_VARIANT_COMBINATIONS,
+    ScraperConfig,
+    configure_logging,
+)
+
+# Command -> (module, help); the module's ``main(argv)`` runs the command
+COMMANDS = {
+    "scrape": ("cli", "Scrape one seller into a file"),
+    "batch": ("batch", "Scrape many sellers over worker processes"),
+    "benchmark": ("benchmark", "Benchmark against the local mock eBay server"),
+    "mock-server": ("mock_ebay", "Serve a mock eBay seller locally"),
+    "redrive": ("redrive", "Retry the listings of a dead-letter file"),
+    "worker": ("work_queue", "Work on a crawl shared through a work queue"),
+}
+
+
+def add_run_arguments(parser: argparse.ArgumentParser) -> None:
+    """Options shared by every command that scrapes."""
+    parser.add_argument("--concurrency", type=int, default=CONCURRENT_TASK_LIMIT)
+    parser.add_argument("--max-concurrency", type=int, default=None)
+    parser.add_argument(
+        "--host-rate", type=float, default=None, help="Requests/s per host"
+    )
+    parser.add_argument("--engine", choices=ENGINES, default="playwright")
+    parser.add_argument("--cache-dir", default=None)
+    parser.add_argument("--cache-max-bytes", type=int, default=DEFAULT_MAX_BYTES)
+    parser.add_argument("--replay-only", action="store_true")
+    parser.add_argument(
+        "--browser-max-navigations", type=int, default=DEFAULT_MAX_NAVIGATIONS
+    )
+    parser.add_argument(
+        "--browser-max-memory-mb", type=float, default=DEFAULT_MAX_MEMORY_MB
+    )
+    parser.add_argument(
+        "--selector-fail-fast-after",
+        type=int,
+        default=FAIL_FAST_AFTER,
+        help="Misses in a row before waits on a field are cut short; 0 never",
+    )
+    parser.add_argument(
+        "--max-variant-combinations",
+        type=int,
+        default=MAX_VARIANT_COMBINATIONS,
+        help="Variant rows written per listing at most",
+    )
+
+
+def run_options(args: argparse.Namespace) -> dict:
+    return {
+        "concurrency": args.concurrency,
+        "max_concurrency": args.max_concurrency,
+        "host_rate": args.host_rate,
+        "engine": args.engine,
+        "cache_dir": args.cache_dir,
+        "cache_max_bytes": args.cache_max_bytes,
+        "replay_only": args.replay_only,
+        "browser_max_navigations": args.browser_max_navigations,
+        "browser_max_memory_mb": args.browser_max_memory_mb,
+        "selector_fail_fast_after": args.selector_fail_fast_after or None,
+        "max_variant_combinations": args.max_variant_combinations,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run a command: ``scrape`` when called as this module's command,
+    otherwise dispatch to the command's module."""
+    argv = sys.argv[1:] if argv is None else argv
+    parser = argparse.ArgumentParser(prog="cli.py", description="eBay seller scraper")
+    parser.add_argument("--log-level", default="INFO")
+    parser.add_argument(
+        "--log-file", default=LOG_FILE, help="Empty to log to stderr only"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, (_, help) in COMMANDS.items():
+        # Each command parses its own arguments, including -h
+        commands.add_parser(name, help=help, add_help=False)
+    args, command_argv = parser.parse_known_args(argv)
+
+    configure_logging(args.log_level.upper(), args.log_file or None)
+    module, _ = COMMANDS[args.command]
+    if module == "cli":
+        scrape(command_argv)
+    else:
+        importlib.import_module(module).main(command_argv)
+
+
+def scrape(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog="cli.py scrape", description=COMMANDS["scrape"][1]
+    )
+    parser.add_argument(
+        "seller_url", nargs="?", help="Defaults to the SELLER_URL setting"
+    )
+    parser.add_argument("-o", "--output", default=None)
+    parser.add_argument("--format", default=None, dest="output_format")
+    add_run_arguments(parser)
+    parser.add_argument("--state-file", default=None)
+    parser.add_argument("--index-file", default=None)
+    parser.add_argument("--report-file", default=None)
+    parser.add_argument("--metrics-file", default=None)
+    parser.add_argument("--dead-letter-file", default=None)
+    parser.add_argument(
+        "--work-queue", default=None, help="Share the crawl with cli.py worker"
+    )
+    args = parser.parse_args(argv)
+
+    seller_url = args.seller_url
+    if seller_url is None:
+        from decouple import config
+
+        seller_url = config("SELLER_URL")
+    settings = ScraperConfig(
+        output_format=args.output_format,
+        state_file=args.state_file,
+        index_file=args.index_file,
+        report_file=args.report_file,
+        metrics_file=args.metrics_file,
+        dead_letter_file=args.dead_letter_file,
+        work_queue=args.work_queue,
+        **run_options(args),
+    )
+
+    from scraper import parse_ebay_seller
+
+    try:
+        asyncio.run(parse_ebay_seller(seller_url, args.output, settings))
+    except Exception as e:
+        logging.critical(f"Failed to execute the script: {e}", exc_info=True)
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Lets the tests under ``tests/`` import the scraper's top-level modules."""
@@ -0,0 +1,191 @@
+"""Persistent crawl state so interrupted seller crawls can resume."""
+
+import asyncio
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Set
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    seller_url TEXT NOT NULL,
+    url TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (seller_url, url)
+);
+CREATE TABLE IF NOT EXISTS items (
+    seller_url TEXT NOT NULL,
+    url TEXT NOT NULL,
+    status TEXT NOT NULL,
+    page_url TEXT,
+    title TEXT,
+    price TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (seller_url, url)
+);
+"""
+
+
+class SqliteStore:
+    """
+    SQLite file shared by the async tasks of a crawl.
+
+    Every query runs in a worker thread behind one lock, so the many async
+    tasks of a crawl can write concurrently without blocking the event loop.
+    WAL mode and a busy timeout let separate processes share the file.
+    """
+
+    schema = ""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(
+            path, check_same_thread=False, timeout=30, isolation_level=None
+        )
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(self.schema)
+
+    def _execute(self, sql: str, params: tuple = ()) -> List[tuple]:
+        with self.lock:
+            return self.connection.execute(sql, params).fetchall()
+
+    async def _run(self, sql: str, params: tuple = ()) -> List[tuple]:
+        return await asyncio.to_thread(self._execute, sql, params)
+
+    def close(self) -> None:
+        with self.lock:
+            self.connection.close()
+
+
+class CrawlStateStore(SqliteStore):
+    """Which pagination pages and items of a seller are done, pending or failed."""
+
+    schema = SCHEMA
+
+    def __init__(self, path: str, seller_url: str):
+        super().__init__(path)
+        self.seller_url = seller_url
+
+    async def mark_page(self, url: str, status: str, error: Optional[str] = None):
+        """Record a pagination page's status; attempts count failures."""
+        await self._run(
+            """
+            INSERT INTO pages (seller_url, url, status, attempts, error, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (seller_url, url) DO UPDATE SET
+                status = excluded.status,
+                attempts = pages.attempts + excluded.attempts,
+                error = excluded.error,
+                updated_at = excluded.updated_at
+            """,
+            (
+                self.seller_url,
+                url,
+                status,
+                int(status == FAILED),
+                error,
+                time.time(),
+            ),
+        )
+
+    async def mark_item(
+        self,
+        url: str,
+        status: str,
+        error: Optional[str] = None,
+        page_url: Optional[str] = None,
+        title: Optional[str] = None,
+        price: Optional[str] = None,
+    ):
+        """Record an item's status together with the card data needed to retry it."""
+        await self._run(
+            """
+            INSERT INTO items (
+                seller_url, url, status, page_url, title, price,
+                attempts, error, updated_at
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (seller_url, url) DO UPDATE SET
+                status = excluded.status,
+                page_url = COALESCE(excluded.page_url, items.page_url),
+                title = COALESCE(excluded.title, items.title),
+                price = COALESCE(excluded.price, items.price),
+                attempts = items.attempts + excluded.attempts,
+                error = excluded.error,
+                updated_at = excluded.updated_at
+            """,
+            (
+                self.seller_url,
+                url,
+                status,
+                page_url,
+                title,
+                price,
+                int(status == FAILED),
+                error,
+                time.time(),
+            ),
+        )
+
+    async def item_status(self, url: str) -> Optional[str]:
+        rows = await self._run(
+            "SELECT status FROM items WHERE seller_url = ? AND url = ?",
+            (self.seller_url, url),
+        )
+        return rows[0][0] if rows else None
+
+    async def pages_with_status(self, *statuses: str) -> List[str]:
+        placeholders = ", ".join("?" for _ in statuses)
+        rows = await self._run(
+            f"SELECT url FROM pages WHERE seller_url = ? AND status IN ({placeholders})"
+            " ORDER BY updated_at",
+            (self.seller_url, *statuses),
+        )
+        return [row[0] for row in rows]
+
+    async def done_pages(self) -> Set[str]:
+        return set(await self.pages_with_status(DONE))
+
+    async def unfinished_pages(self) -> List[str]:
+        """Pages discovered by an earlier run that never completed."""
+        return await self.pages_with_status(PENDING, FAILED)
+
+    async def items_with_status(self, *statuses: str) -> List[Dict[str, str]]:
+        """Items with the card data recorded when they were discovered."""
+        placeholders = ", ".join("?" for _ in statuses)
+        rows = await self._run(
+            "SELECT url, page_url, title, price FROM items"
+            f" WHERE seller_url = ? AND status IN ({placeholders}) ORDER BY updated_at",
+            (self.seller_url, *statuses),
+        )
+        return [
+            {"url": url, "page_url": page_url, "title": title, "price": price}
+            for url, page_url, title, price in rows
+        ]
+
+    async def unfinished_items(self) -> List[Dict[str, str]]:
+        """Items queued or failed by an earlier run that never got written."""
+        return await self.items_with_status(PENDING, FAILED)
+
+    async def counts(self) -> Dict[str, Dict[str, int]]:
+        """Number of pages and items per status."""
+        counts = {}
+        for table in ("pages", "items"):
+            rows = await self._run(
+                f"SELECT status, COUNT(*) FROM {table} WHERE seller_url = ?"
+                " GROUP BY status",
+                (self.seller_url,),
+            )
+            counts[table] = dict(rows)
+        return counts
@@ -0,0 +1,381 @@
+"""Selectors, field schemas and browser-free parsing for eBay pages."""
+
+import json
+import re
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from selector_health import selector_health
+
+# Search results page
+RESULTS_LIST_SELECTOR = "ul.srp-results.srp-list"
+RESULT_ITEM_SELECTOR = "ul.srp-results.srp-list li.s-item"
+RESULT_COUNT_SELECTOR = "h1.srp-controls__count-heading"
+
+# Search result card
+ITEM_LINK_SELECTOR = "a.s-item__link"
+CARD_TITLE_SELECTOR = ".s-item__title"
+CARD_PRICE_SELECTOR = "span.s-item__price"
+
+# Item page
+CATEGORY_SELECTOR = "ul li a.seo-breadcrumb-text span"
+IMAGE_SELECTOR = "button.ux-image-grid-item img"
+QUANTITY_SELECTOR = "#qtyAvailability .ux-textspans--SECONDARY"
+CONDITION_SELECTOR = ".x-item-condition-text .ux-textspans"
+BRAND_SELECTOR = (
+    "dl[data-testid='ux-labels-values'].ux-labels-values--brand dd span.ux-textspans"
+)
+PRICE_SELECTOR = 'div[data-testid="x-price-primary"] span.ux-textspans'
+LISTBOX_VALUE_SELECTOR = ".listbox__value"
+
+# Fallback chains, tried in order. "ld:" entries read the page's JSON-LD,
+# which survives markup changes, so it comes first where it holds the same
+# value as the page; it only has the main image, so images prefer the page.
+RESULTS_LIST_SELECTORS = (RESULTS_LIST_SELECTOR, "ul.srp-results", "ul.srp-grid")
+RESULT_ITEM_SELECTORS = (
+    RESULT_ITEM_SELECTOR,
+    "ul.srp-results li.s-card",
+    "ul.srp-grid li.s-item",
+)
+RESULT_COUNT_SELECTORS = (
+    RESULT_COUNT_SELECTOR,
+    ".srp-controls__count-heading",
+    "[class*='count-heading']",
+)
+ITEM_LINK_FALLBACKS = ("a.su-link", "a[href*='/itm/']")
+CARD_TITLE_FALLBACKS = (".s-card__title", "[role='heading']")
+CARD_PRICE_FALLBACKS = (".s-card__price",)
+CATEGORY_FALLBACKS = ("nav.breadcrumbs a span", ".seo-breadcrumb-text span")
+IMAGE_FALLBACKS = (".ux-image-carousel-item img", "ld:Product.image")
+QUANTITY_FALLBACKS = ("#qtySubTxt span",)
+CONDITION_FALLBACKS = ("[data-testid='x-item-condition'] .ux-textspans",)
+BRAND_FALLBACKS = (
+    BRAND_SELECTOR,
+    ".ux-labels-values--brand .ux-labels-values__values span",
+)
+PRICE_FALLBACKS = (".x-price-primary span", "span[itemprop='price']")
+PRICE_SELECTORS = (PRICE_SELECTOR, *PRICE_FALLBACKS)
+
+JSON_LD_PREFIX = "ld:"
+MAX_IMAGES = 10
+PRICE_RANGE_PATTERN = re.compile(r"\bto\b")
+
+
+def css_any(selectors: Sequence[str]) -> str:
+    """CSS selector list matching any CSS entry of a chain, e.g. to wait on."""
+    return ", ".join(s for s in selectors if not s.startswith(JSON_LD_PREFIX))
+
+
+@dataclass(frozen=True)
+class Field:
+    """
+    One extracted value: the text or ``attribute`` of the first match of
+    ``selector``, or ``default`` when nothing matches.
+
+    ``fallbacks`` are tried in order when ``selector`` finds nothing. A
+    selector starting with "ld:" reads a dotted path from the page's JSON-LD
+    instead, starting at the object of that ``@type``, e.g.
+    "ld:Product.brand.name"; lists along the path resolve to their first
+    item, and objects at its end to their ``name``.
+
+    With ``many`` every non-empty match is returned, cut to ``limit``, and
+    padded with ``default`` up to ``limit`` when ``pad`` is set.
+
+    ``optional`` fields are missing from many listings, so their misses are
+    counted but never make the field fail fast.
+    """
+
+    name: str
+    selector: str
+    attribute: Optional[str] = None
+    many: bool = False
+    limit: Optional[int] = None
+    pad: bool = False
+    default: Any = "N/A"
+    fallbacks: Tuple[str, ...] = ()
+    optional: bool = False
+
+    @property
+    def chain(self) -> Tuple[str, ...]:
+        return (self.selector, *self.fallbacks)
+
+
+SEARCH_CARD_SCHEMA = (
+    Field(
+        "item_url_href",
+        ITEM_LINK_SELECTOR,
+        attribute="href",
+        fallbacks=ITEM_LINK_FALLBACKS,
+    ),
+    Field("title", CARD_TITLE_SELECTOR, fallbacks=CARD_TITLE_FALLBACKS),
+    Field("price", CARD_PRICE_SELECTOR, fallbacks=CARD_PRICE_FALLBACKS),
+)
+
+ITEM_PAGE_SCHEMA = (
+    Field(
+        "category",
+        "ld:BreadcrumbList.itemListElement.name",
+        fallbacks=(CATEGORY_SELECTOR, *CATEGORY_FALLBACKS),
+    ),
+    Field(
+        "image_urls",
+        IMAGE_SELECTOR,
+        attribute="src",
+        many=True,
+        limit=MAX_IMAGES,
+        pad=True,
+        fallbacks=IMAGE_FALLBACKS,
+    ),
+    Field("quantity", QUANTITY_SELECTOR, fallbacks=QUANTITY_FALLBACKS, optional=True),
+    Field("condition", CONDITION_SELECTOR, fallbacks=CONDITION_FALLBACKS),
+    Field("brand", "ld:Product.brand.name", fallbacks=BRAND_FALLBACKS, optional=True),
+    Field("price", PRICE_SELECTOR, fallbacks=PRICE_FALLBACKS),
+    Field("variant_values", LISTBOX_VALUE_SELECTOR, many=True, optional=True),
+)
+
+# Prefix of the selector health field names of each schema
+SCHEMA_NAMES = {SEARCH_CARD_SCHEMA: "card", ITEM_PAGE_SCHEMA: "item"}
+
+# Key under which the extract scripts return, per field, the index of the
+# chain entry that matched, or -1
+HITS_KEY = "__hits"
+
+# Shared by the page and element scripts below; mirrors ``extract_from_tree``.
+_EXTRACT_JS = r"""
+    const clean = s => (s || "").replace(/\s+/g, " ").trim();
+    const value = (el, f) =>
+        f.attribute ? el.getAttribute(f.attribute) : clean(el.innerText);
+    let ldNodes = null;
+    const jsonLd = () => {
+        if (ldNodes !== null) return ldNodes;
+        ldNodes = [];
+        const scripts = document.querySelectorAll('script[type="application/ld+json"]');
+        for (const script of scripts) {
+            try {
+                const data = JSON.parse(script.textContent);
+                for (const node of [].concat(data)) {
+                    ldNodes.push(...(node["@graph"] || [node]));
+                }
+            } catch (e) {}
+        }
+        return ldNodes;
+    };
+    const ldValues = path => {
+        const [type, ...keys] = path.split(".");
+        let found = jsonLd().find(node => [].concat(node["@type"]).includes(type));
+        for (const key of keys) {
+            if (Array.isArray(found)) found = found[0];
+            found = found == null ? undefined : found[key];
+        }
+        if (found == null) return [];
+        return [].concat(found)
+            .map(v => clean(typeof v === "object" ? v && v.name : String(v)))
+            .filter(v => v);
+    };
+    const matches = (root, f, selector) => {
+        if (selector.startsWith("ld:")) return ldValues(selector.slice(3));
+        if (!f.many) {
+            const el = root.querySelector(selector);
+            const found = el && value(el, f);
+            return found ? [found] : [];
+        }
+        return Array.from(root.querySelectorAll(selector))
+            .map(el => value(el, f))
+            .filter(v => v);
+    };
+    const shape = (values, f) => {
+        if (!f.many) return values.length ? values[0] : f.default;
+        if (f.limit) values = values.slice(0, f.limit);
+        if (f.pad) while (values.length < f.limit) values.push(f.default);
+        return values;
+    };
+    const read = (root, f) => {
+        const chain = [f.selector, ...f.fallbacks];
+        for (let i = 0; i < chain.length; i++) {
+            const values = matches(root, f, chain[i]);
+            if (values.length) return [shape(values, f), i];
+        }
+        return [shape([], f), -1];
+    };
+    const extract = (root, fields) => {
+        const record = {}, hits = {};
+        for (const f of fields) [record[f.name], hits[f.name]] = read(root, f);
+        record["__hits"] = hits;
+        return record;
+    };
+"""
+
+# The whole document, or one record per element matching the first of
+# ``rootSelectors`` that matches anything
+PAGE_EXTRACT_SCRIPT = "([fields, rootSelectors]) => {" + _EXTRACT_JS + """
+    if (!rootSelectors) return extract(document, fields);
+    for (const selector of rootSelectors) {
+        const roots = document.querySelectorAll(selector);
+        if (roots.length) return Array.from(roots).map(root => extract(root, fields));
+    }
+    return [];
+}"""
+
+
+@lru_cache(maxsize=None)
+def schema_arg(schema: Sequence[Field]) -> List[Dict[str, Any]]:
+    """The schema as the JSON argument passed to the extract scripts."""
+    return [asdict(field) for field in schema]
+
+
+def record_hits(schema: Sequence[Field], record: Dict[str, Any]) -> Dict[str, Any]:
+    """Pass the chain entries that matched to ``selector_health`` and drop
+    them from the record."""
+    hits = record.pop(HITS_KEY)
+    prefix = SCHEMA_NAMES.get(schema, "fields")
+    for field in schema:
+        index = hits[field.name]
+        if index < 0:
+            selector_health.miss(f"{prefix}.{field.name}", field.optional)
+        else:
+            selector_health.hit(f"{prefix}.{field.name}", field.chain[index])
+    return record
+
+
+async def extract_from_page(
+    page,
+    schema: Sequence[Field],
+    root_selector: Optional[str | Sequence[str]] = None,
+):
+    """
+    Extract ``schema`` from a rendered page in a single evaluate call.
+
+    Returns one dict for the document, or a list with one dict per element
+    matching ``root_selector``, or the first selector of a chain of them
+    that matches anything.
+    """
+    roots = [root_selector] if isinstance(root_selector, str) else root_selector
+    result = await page.evaluate(PAGE_EXTRACT_SCRIPT, [schema_arg(schema), roots])
+    if roots is None:
+        return record_hits(schema, result)
+    return [record_hits(schema, record) for record in result]
+
+
+@lru_cache(maxsize=None)
+def compiled_selector(selector: str):
+    """Compile a CSS selector once and reuse it for every document."""
+    from lxml.cssselect import CSSSelector
+
+    return CSSSelector(selector)
+
+
+def _text(element) -> str:
+    """Whitespace-normalised text content, like Playwright's inner_text."""
+    return " ".join(element.text_content().split())
+
+
+def _value(element, field: Field) -> Optional[str]:
+    return element.get(field.attribute) if field.attribute else _text(element)
+
+
+def json_ld_nodes(tree) -> List[Dict]:
+    """Every JSON-LD object of a document, with ``@graph`` lists flattened."""
+    nodes = []
+    for script in tree.xpath('.//script[@type="application/ld+json"]/text()'):
+        try:
+            data = json.loads(script)
+        except ValueError:
+            continue
+        for node in data if isinstance(data, list) else [data]:
+            if isinstance(node, dict):
+                graph = node.get("@graph") or [node]
+                nodes.extend(n for n in graph if isinstance(n, dict))
+    return nodes
+
+
+def _types(node: Dict) -> List:
+    node_type = node.get("@type")
+    return node_type if isinstance(node_type, list) else [node_type]
+
+
+def json_ld_values(nodes: List[Dict], path: str) -> List[str]:
+    """Values at an "ld:" path like "Product.brand.name", as the page script
+    reads them."""
+    node_type, *keys = path.split(".")
+    found = next((node for node in nodes if node_type in _types(node)), None)
+    for key in keys:
+        if isinstance(found, list):
+            found = found[0] if found else None
+        found = found.get(key) if isinstance(found, dict) else None
+    if found is None:
+        return []
+    values = []
+    for value in found if isinstance(found, list) else [found]:
+        if isinstance(value, dict):
+            value = value.get("name")
+        text = " ".join(str(value).split()) if value is not None else ""
+        if text:
+            values.append(text)
+    return values
+
+
+def _matches(tree, field: Field, selector: str, nodes) -> List[str]:
+    if selector.startswith(JSON_LD_PREFIX):
+        return json_ld_values(nodes(), selector[len(JSON_LD_PREFIX) :])
+    matches = compiled_selector(selector)(tree)
+    if not field.many:
+        value = _value(matches[0], field) if matches else None
+        return [value] if value else []
+    return [value for value in (_value(m, field) for m in matches) if value]
+
+
+def extract_from_tree(tree, schema: Sequence[Field]) -> Dict[str, Any]:
+    """Extract ``schema`` from an lxml tree the same way the page script does."""
+    ld_nodes = None
+
+    def nodes() -> List[Dict]:
+        nonlocal ld_nodes
+        if ld_nodes is None:
+            ld_nodes = json_ld_nodes(tree.getroottree().getroot())
+        return ld_nodes
+
+    record, hits = {}, {}
+    for field in schema:
+        values, hits[field.name] = [], -1
+        for index, selector in enumerate(field.chain):
+            values = _matches(tree, field, selector, nodes)
+            if values:
+                hits[field.name] = index
+                break
+        if not field.many:
+            record[field.name] = values[0] if values else field.default
+            continue
+        if field.limit:
+            values = values[: field.limit]
+        if field.pad:
+            values.extend([field.default] * (field.limit - len(values)))
+        record[field.name] = values
+    record[HITS_KEY] = hits
+    return record_hits(schema, record)
+
+
+def parse_item_html(html: str) -> Dict:
+    """
+    Extract item page fields from raw HTML without a browser.
+
+    Returns the ``ITEM_PAGE_SCHEMA`` fields: the detail fields of
+    ``product_data`` plus ``price`` and the raw ``variant_values`` of the
+    variant dropdowns.
+
+    Raises:
+        ValueError: When the HTML cannot be parsed, e.g. an empty body
+    """
+    import lxml.etree
+    import lxml.html
+
+    try:
+        tree = lxml.html.fromstring(html)
+    except lxml.etree.LxmlError as e:
+        raise ValueError(f"Unparseable item page: {e}") from e
+    return extract_from_tree(tree, ITEM_PAGE_SCHEMA)
+
+
+def is_price_range(price: str) -> bool:
+    """Whether a price like "$12.99 to $19.99" needs per-variant resolution."""
+    return bool(PRICE_RANGE_PATTERN.search(price))
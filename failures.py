@@ -0,0 +1,166 @@
+"""Failure categories of listings and the dead-letter file failed listings go to."""
+
+import asyncio
+import json
+import logging
+import os
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from lazy_imports import playwright_timeout
+from rate_control import CHALLENGE_REASON, ThrottledError
+
+TIMEOUT = "timeout"
+SELECTOR_MISSING = "selector_missing"
+CHALLENGE = "challenge"
+THROTTLED = "throttled"
+REMOVED_LISTING = "removed_listing"
+VARIANT_MISMATCH = "variant_mismatch"
+NETWORK = "network"
+UNKNOWN = "unknown"
+CATEGORIES = (
+    TIMEOUT,
+    SELECTOR_MISSING,
+    CHALLENGE,
+    THROTTLED,
+    REMOVED_LISTING,
+    VARIANT_MISMATCH,
+    NETWORK,
+    UNKNOWN,
+)
+
+# An item page without any of these is not showing a listing
+REQUIRED_ITEM_FIELDS = ("category", "condition", "price")
+REMOVED_STATUSES = frozenset({404, 410})
+REMOVED_LISTING_MARKERS = (
+    "no longer available",
+    "This listing was ended",
+    "this item has been removed",
+    "We looked everywhere",
+)
+
+
+class ScrapeFailure(Exception):
+    """
+    A listing that could not be scraped, with its category and context.
+
+    With ``partial=True`` in the context, part of the listing was scraped:
+    the rows collected before the failure are still written, and only the
+    listing's failing part goes to the dead-letter file.
+    """
+
+    def __init__(self, category: str, message: str, **context):
+        super().__init__(message)
+        self.category = category
+        self.context = context
+
+    @property
+    def partial(self) -> bool:
+        return bool(self.context.get("partial"))
+
+
+def classify(error: BaseException) -> str:
+    """Failure category of an exception raised while scraping a listing."""
+    if isinstance(error, ScrapeFailure):
+        return error.category
+    if isinstance(error, ThrottledError):
+        return CHALLENGE if error.reason == CHALLENGE_REASON else THROTTLED
+    message = str(error)
+    if isinstance(error, (asyncio.TimeoutError, playwright_timeout())):
+        # Waiting for an element that never appeared is a layout problem,
+        # not a slow page
+        if "waiting for locator" in message or "waiting for selector" in message:
+            return SELECTOR_MISSING
+        return TIMEOUT
+    if "net::ERR_" in message or isinstance(error, ConnectionError):
+        return NETWORK
+    return UNKNOWN
+
+
+def missing_item_details(details: Dict) -> bool:
+    """Whether none of the fields every listing shows were found."""
+    return all(details.get(name, "N/A") == "N/A" for name in REQUIRED_ITEM_FIELDS)
+
+
+class DeadLetterFile:
+    """
+    Listings that failed, one JSON object per line.
+
+    Each entry has the listing URL, the search page it was found on, its
+    card title and price, the failure category, the error and its context,
+    so ``cli.py redrive`` can retry exactly these listings. The file is
+    created on the first failure, replacing an older one unless ``append``.
+    """
+
+    def __init__(
+        self, path: str, seller_url: Optional[str] = None, append: bool = False
+    ):
+        self.path = path
+        self.seller_url = seller_url
+        self.mode = "a" if append else "w"
+        self.counts: Counter = Counter()
+        self._file = None
+
+    def add(
+        self,
+        url: str,
+        category: str,
+        error: str,
+        page_url: Optional[str] = None,
+        title: Optional[str] = None,
+        price: Optional[str] = None,
+        **context,
+    ) -> None:
+        self.write(
+            {
+                "url": url,
+                "seller_url": self.seller_url,
+                "page_url": page_url,
+                "title": title,
+                "price": price,
+                "category": category,
+                "error": error,
+                "context": context,
+                "failed_at": datetime.now().isoformat(timespec="seconds"),
+            }
+        )
+
+    def write(self, entry: Dict) -> None:
+        """Append an entry as is, e.g. one carried over from an older file."""
+        if self._file is None:
+            self._file = open(self.path, self.mode, encoding="utf-8")
+        self._file.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+        self._file.flush()
+        self.counts[entry["category"]] += 1
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.counts)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            logging.info(
+                f"{sum(self.counts.values())} failed listings written to "
+                f"{self.path}: {self.stats()}"
+            )
+
+
+def read_dead_letters(path: str) -> List[Dict]:
+    """Entries of a dead-letter file, skipping lines that do not parse."""
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                logging.warning(f"Skipping malformed line {number} of {path}")
+    return entries
+
+
+def dead_letter_path(output_file: str) -> str:
+    """Default dead-letter file of an output file: ``out.csv`` -> ``out.failed.jsonl``."""
+    return f"{os.path.splitext(output_file)[0]}.failed.jsonl"
@@ -0,0 +1,101 @@
+"""Pooled async HTTP client used by the browser-free item page engine."""
+
+import logging
+import time
+from typing import Optional
+
+from metrics import metrics
+from rate_control import ERROR, OK, THROTTLED, AdaptiveLimiter, throttle_error
+from response_cache import ResponseCache, resource_kind
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+}
+
+
+class HttpItemFetcher:
+    """
+    Fetches item pages over a shared connection pool.
+
+    httpx is imported on construction so the Playwright-only engine does not
+    need it installed. With a ``limiter`` every request waits for its host's
+    token bucket and reports its latency and outcome. With a ``cache`` fresh
+    cached pages are returned without a request and fetched pages are stored.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 4,
+        timeout: float = 30.0,
+        limiter: Optional[AdaptiveLimiter] = None,
+        cache: Optional[ResponseCache] = None,
+    ):
+        try:
+            import httpx
+        except ImportError as e:
+            raise RuntimeError(
+                "The http engine requires httpx, lxml and cssselect: "
+                "pip install httpx lxml cssselect"
+            ) from e
+
+        self.client = httpx.AsyncClient(
+            headers=DEFAULT_HEADERS,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            timeout=timeout,
+            follow_redirects=True,
+        )
+        self.timeout_errors = httpx.TimeoutException
+        self.limiter = limiter
+        self.cache = cache
+
+    @metrics.instrument("http_fetch")
+    async def fetch(self, url: str) -> Optional[str]:
+        """Return the page HTML, or None when the request fails or is throttled."""
+        kind = resource_kind(url, "document")
+        if self.cache is not None:
+            cached = await self.cache.get(url, kind)
+            if cached is not None:
+                return cached[2].decode("utf-8", errors="replace")
+            if self.cache.replay_only:
+                return None
+        if self.limiter is not None:
+            await self.limiter.throttle(url)
+        start = time.monotonic()
+        try:
+            response = await self.client.get(url)
+            error = throttle_error(
+                url, response.status_code, str(response.url), response.headers
+            )
+            if error is not None:
+                self._record(THROTTLED, time.monotonic() - start)
+                logging.warning(str(error))
+                return None
+            response.raise_for_status()
+        except Exception as e:
+            self._record(THROTTLED if isinstance(e, self.timeout_errors) else ERROR)
+            logging.warning(f"HTTP fetch failed for {url}: {e}")
+            return None
+        self._record(OK, time.monotonic() - start)
+        if self.cache is not None and response.status_code == 200:
+            await self.cache.store(
+                url, kind, response.status_code, response.headers, response.content
+            )
+        return response.text
+
+    def _record(self, outcome: str, latency: Optional[float] = None) -> None:
+        if self.limiter is not None:
+            self.limiter.record(outcome, latency)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+    async def __aenter__(self) -> "HttpItemFetcher":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
@@ -0,0 +1,20 @@
+"""
+Deferred access to Playwright.
+
+Importing the scraper modules only loads the standard library; Playwright
+is imported when a browser is started or one of its errors has to be
+matched. Python caches the module, so repeated calls are cheap.
+"""
+
+
+def async_playwright():
+    from playwright.async_api import async_playwright
+
+    return async_playwright()
+
+
+def playwright_timeout():
+    """Playwright's TimeoutError, for use in ``except`` clauses."""
+    from playwright.async_api import TimeoutError
+
+    return TimeoutError
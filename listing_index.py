@@ -0,0 +1,132 @@
+"""Index of previously scraped listings used to skip unchanged item pages."""
+
+import hashlib
+import json
+import re
+import time
+from typing import List, Optional, Tuple
+
+from crawl_state import SqliteStore
+
+NEW = "new"
+CHANGED = "changed"
+UNCHANGED = "unchanged"
+REMOVED = "removed"
+
+ITEM_ID_PATTERN = re.compile(r"/itm/(?:[^/?#]+/)?(\d+)")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS listings (
+    item_id TEXT PRIMARY KEY,
+    seller_url TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    rows TEXT NOT NULL,
+    last_seen REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS listings_seller ON listings (seller_url, last_seen);
+"""
+
+
+def item_id(url: str) -> str:
+    """eBay item ID from an item URL, or the URL without its tracking query."""
+    match = ITEM_ID_PATTERN.search(url)
+    return match.group(1) if match else url.split("?", 1)[0]
+
+
+def card_fingerprint(title: str, price: str, url: str) -> str:
+    """Hash of the search card fields that change when a listing is edited."""
+    canonical = f"{title}\x1f{price}\x1f{item_id(url)}"
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+class ListingIndex(SqliteStore):
+    """
+    Listings keyed by item ID with their card fingerprint and last output rows.
+
+    Every listing seen during a run is stamped with the run's start time, so
+    listings of the seller that were not seen are the ones removed since.
+    """
+
+    schema = SCHEMA
+
+    def __init__(self, path: str, seller_url: str):
+        super().__init__(path)
+        self.seller_url = seller_url
+        self.run_started = time.time()
+
+    async def lookup(
+        self, url: str, fingerprint: str, row_width: Optional[int] = None
+    ) -> Tuple[str, Optional[list]]:
+        """Classify a listing; unchanged listings come with their cached rows.
+
+        With ``row_width``, cached rows of another width, stored before the
+        output columns changed, count as changed so the listing is re-scraped.
+        """
+        rows = await self._run(
+            "SELECT fingerprint, rows FROM listings WHERE item_id = ?",
+            (item_id(url),),
+        )
+        if not rows:
+            return NEW, None
+        stored_fingerprint, cached_rows = rows[0]
+        if stored_fingerprint != fingerprint:
+            return CHANGED, None
+        cached_rows = json.loads(cached_rows)
+        if row_width is not None and any(len(row) != row_width for row in cached_rows):
+            return CHANGED, None
+        return UNCHANGED, cached_rows
+
+    async def touch(self, url: str) -> None:
+        """Mark a listing as seen in this run without changing its rows, e.g.
+        an unchanged one or one whose item page failed."""
+        await self._run(
+            "UPDATE listings SET last_seen = ? WHERE item_id = ?",
+            (time.time(), item_id(url)),
+        )
+
+    async def store(self, url: str, fingerprint: str, rows: List[list]) -> None:
+        """Save the rows extracted for a new or changed listing."""
+        now = time.time()
+        await self._run(
+            """
+            INSERT INTO listings (
+                item_id, seller_url, fingerprint, rows, last_seen, updated_at
+            )
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (item_id) DO UPDATE SET
+                seller_url = excluded.seller_url,
+                fingerprint = excluded.fingerprint,
+                rows = excluded.rows,
+                last_seen = excluded.last_seen,
+                updated_at = excluded.updated_at
+            """,
+            (
+                item_id(url),
+                self.seller_url,
+                fingerprint,
+                json.dumps(rows, ensure_ascii=False, default=str),
+                now,
+                now,
+            ),
+        )
+
+    async def pop_removed(self, row_width: Optional[int] = None) -> List[list]:
+        """Rows of this seller's listings not seen since the run started.
+
+        The listings are dropped from the index, so each removal is reported
+        once. Only call this after a crawl that visited every page. Rows
+        shorter than ``row_width`` are padded with None.
+        """
+        rows = await self._run(
+            "SELECT item_id, rows FROM listings WHERE seller_url = ? AND last_seen < ?",
+            (self.seller_url, self.run_started),
+        )
+        await self._run(
+            "DELETE FROM listings WHERE seller_url = ? AND last_seen < ?",
+            (self.seller_url, self.run_started),
+        )
+        removed = [row for _, cached in rows for row in json.loads(cached)]
+        if row_width is not None:
+            removed = [row + [None] * (row_width - len(row)) for row in removed]
+        return removed
@@ -0,0 +1,172 @@
+"""Per-stage timing, retry and failure metrics and the run report they feed."""
+
+import functools
+import json
+import logging
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+# Upper bounds in seconds of the latency histogram buckets; the last bucket
+# counts everything slower.
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+METRIC_PREFIX = "ebay_scraper"
+
+
+class StageStats:
+    """Count, failures, retries and a latency histogram of one stage."""
+
+    def __init__(self):
+        self.count = 0
+        self.failures = 0
+        self.retries = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def observe(self, seconds: float, ok: bool = True) -> None:
+        self.count += 1
+        self.failures += not ok
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the ``q`` quantile."""
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, round(self.max, 3))
+        return self.max
+
+    def report(self) -> Dict:
+        return {
+            "count": self.count,
+            "failures": self.failures,
+            "retries": self.retries,
+            "total_s": round(self.total, 3),
+            "mean_s": round(self.total / self.count, 3) if self.count else 0.0,
+            "p50_s": self.quantile(0.5) if self.count else 0.0,
+            "p95_s": self.quantile(0.95) if self.count else 0.0,
+            "max_s": round(self.max, 3),
+            "histogram": dict(zip([*map(str, LATENCY_BUCKETS), "+Inf"], self.buckets)),
+        }
+
+
+class StageMetrics:
+    """
+    Timings of the scraping stages of a run.
+
+    A stage counts as failed when its block or function raises.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, StageStats] = defaultdict(StageStats)
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        start = time.monotonic()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.stages[stage].observe(time.monotonic() - start, ok)
+
+    def instrument(self, stage: str):
+        """Decorator timing every call of an async function as ``stage``."""
+
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with self.timer(stage):
+                    return await func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def retry(self, stage: str) -> None:
+        self.stages[stage].retries += 1
+
+    def report(self) -> Dict[str, Dict]:
+        return {stage: stats.report() for stage, stats in sorted(self.stages.items())}
+
+    def prometheus(self, gauges: Optional[Dict[str, float]] = None) -> str:
+        """The metrics in Prometheus text exposition format."""
+        name = f"{METRIC_PREFIX}_stage_duration_seconds"
+        lines = [
+            f"# HELP {name} Time spent per scraping stage.",
+            f"# TYPE {name} histogram",
+        ]
+        for stage, stats in sorted(self.stages.items()):
+            cumulative = 0
+            for bound, count in zip(
+                [*map(str, LATENCY_BUCKETS), "+Inf"], stats.buckets
+            ):
+                cumulative += count
+                lines.append(
+                    f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}'
+                )
+            lines.append(f'{name}_sum{{stage="{stage}"}} {stats.total:.6f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {stats.count}')
+        for counter in ("failures", "retries"):
+            metric = f"{METRIC_PREFIX}_stage_{counter}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for stage, stats in sorted(self.stages.items()):
+                lines.append(f'{metric}{{stage="{stage}"}} {getattr(stats, counter)}')
+        for gauge, value in (gauges or {}).items():
+            metric = f"{METRIC_PREFIX}_{gauge}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        self.stages.clear()
+
+
+metrics = StageMetrics()
+
+
+def write_run_report(
+    report: Dict,
+    report_file: Optional[str] = None,
+    metrics_file: Optional[str] = None,
+) -> None:
+    """Write the JSON run report and/or the Prometheus metrics of a run."""
+    if report_file:
+        with open(report_file, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+        logging.info(f"Run report written to {report_file}")
+    if metrics_file:
+        gauges = {
+            "rows_written": report.get("rows", 0),
+            "pages_processed": report.get("pages", 0),
+            "run_duration_seconds": report.get("duration_s", 0.0),
+            "run_succeeded": int(report.get("status") == "ok"),
+        }
+        concurrency = report.get("concurrency") or {}
+        if "limit" in concurrency:
+            gauges["concurrency_limit"] = concurrency["limit"]
+            gauges["concurrency_peak_limit"] = concurrency["peak_limit"]
+        if "browser" in report:
+            gauges["browser_restarts"] = report["browser"]["restarts"]
+            gauges["browser_requeued_tasks"] = report["browser"]["requeued"]
+        if "selectors" in report:
+            gauges["failing_selectors"] = sum(
+                stats["failing"] for stats in report["selectors"].values()
+            )
+        if "failures" in report:
+            gauges["failed_listings"] = sum(report["failures"].values())
+        listings = report.get("listings") or {}
+        if listings.get("expected") is not None:
+            gauges["expected_listings"] = listings["expected"]
+        if "collected" in listings:
+            gauges["collected_listings"] = listings["collected"]
+        with open(metrics_file, "w", encoding="utf-8") as f:
+            f.write(metrics.prometheus(gauges))
+        logging.info(f"Prometheus metrics written to {metrics_file}")
@@ -0,0 +1,473 @@
+"""Local stand-in for eBay seller search and item pages, for offline runs.
+
+The pages carry the markup the scraper's selectors expect: lazy-loading
+result lists, a windowed pager, item pages with JSON-LD and with and without
+variants (with the embedded MSKU variation model, or dropdowns only), and
+injectable latency, throttling, challenge pages and server errors.
+"""
+
+import argparse
+import html
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_SELLER = "benchseller"
+DEFAULT_PAGE_SIZE = 60
+LAZY_BATCH = 20  # Result items rendered up front; the rest load on scroll
+PAGER_WINDOW = 9  # Pager links shown around the current page, like eBay's
+CONDITIONS = ("New", "Used", "Open box", "For parts or not working")
+BRANDS = ("Acme", "Globex", "Initech", "Umbrella", "Unbranded")
+CATEGORIES = ("Electronics", "Clothing", "Home & Garden", "Toys", "Collectibles")
+COLORS = ("Red", "Blue", "Green", "Black", "White")
+SIZES = ("XS", "S", "M", "L", "XL", "XXL")
+PIXEL_GIF = (
+    b"GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!\xf9\x04\x01"
+    b"\x00\x00\x00\x00,\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;"
+)
+
+
+class MockCatalog:
+    """
+    Deterministic listings of one seller.
+
+    ``variant_share`` of the listings have colour/size dropdowns; of those,
+    ``click_share`` lack the MSKU model so prices are only found by clicking.
+    """
+
+    def __init__(
+        self,
+        items: int = 240,
+        seller: str = DEFAULT_SELLER,
+        variant_share: float = 0.25,
+        click_share: float = 0.2,
+        seed: int = 1,
+    ):
+        self.seller = seller
+        rng = random.Random(seed)
+        self.items: List[Dict] = []
+        for n in range(items):
+            item_id = str(100000000000 + n)
+            price = round(rng.uniform(5, 500), 2)
+            item = {
+                "id": item_id,
+                "title": f"Mock listing {n} {rng.choice(BRANDS)} item",
+                "price": f"${price:.2f}",
+                "category": rng.choice(CATEGORIES),
+                "brand": rng.choice(BRANDS),
+                "condition": rng.choice(CONDITIONS),
+                "quantity": f"{rng.randint(1, 50)} available",
+                "images": rng.randint(1, 12),
+                "variants": None,
+            }
+            if rng.random() < variant_share:
+                colors = rng.sample(COLORS, rng.randint(2, 4))
+                sizes = rng.sample(SIZES, rng.randint(2, 4))
+                prices = {
+                    (color, size): round(price + rng.uniform(0, 40), 2)
+                    for color in colors
+                    for size in sizes
+                    if rng.random() > 0.1  # Some combinations are not sold
+                }
+                item["variants"] = {
+                    "menus": [("Color", colors), ("Size", sizes)],
+                    "prices": prices,
+                    "msku": rng.random() >= click_share,
+                }
+                low, high = min(prices.values()), max(prices.values())
+                item["price"] = f"${low:.2f} to ${high:.2f}"
+            self.items.append(item)
+        self.by_id = {item["id"]: item for item in self.items}
+
+    def expected_rows(self) -> int:
+        """Rows a complete scrape writes: one per listing or sold variant."""
+        return sum(
+            (
+                len(item["variants"]["prices"])
+                if item["variants"] and item["variants"]["msku"]
+                else (
+                    len(item["variants"]["menus"][0][1])
+                    * len(item["variants"]["menus"][1][1])
+                    if item["variants"]
+                    else 1
+                )
+            )
+            for item in self.items
+        )
+
+
+def _msku(variants: Dict) -> Dict:
+    """The variation model in eBay's ``MSKU`` layout."""
+    menu_item_map, select_menus, ids = {}, [], {}
+    next_id = 1
+    for name, values in variants["menus"]:
+        value_ids = []
+        for value in values:
+            menu_item_map[str(next_id)] = {"valueName": value, "displayName": value}
+            ids[(name, value)] = next_id
+            value_ids.append(next_id)
+            next_id += 1
+        select_menus.append({"displayLabel": name, "menuItemValueIds": value_ids})
+    combinations, variations = {}, {}
+    for n, ((color, size), price) in enumerate(variants["prices"].items()):
+        key = f"{ids[('Color', color)]}_{ids[('Size', size)]}"
+        combinations[key] = 500 + n
+        variations[str(500 + n)] = {
+            "binModel": {"price": {"textSpans": [{"text": f"US ${price:.2f}"}]}},
+            "quantity": {"outOfStock": False},
+        }
+    return {
+        "selectMenus": select_menus,
+        "menuItemMap": menu_item_map,
+        "variationCombinations": combinations,
+        "variationsMap": variations,
+    }
+
+
+# Opens a dropdown, and picks an option; once every dropdown has a value the
+# price of that combination replaces the range.
+VARIANT_SCRIPT = """
+const prices = %s;
+document.querySelectorAll("button.listbox-button__control").forEach(button => {
+  const box = button.nextElementSibling;
+  button.addEventListener("click", () => { box.hidden = false; });
+  box.querySelectorAll("div[role=option]").forEach(option => {
+    option.addEventListener("click", () => {
+      button.setAttribute("value", option.textContent);
+      button.textContent = option.textContent;
+      box.hidden = true;
+      setTimeout(() => {
+        const key = Array.from(
+          document.querySelectorAll("button.listbox-button__control")
+        ).map(b => b.getAttribute("value")).join("|");
+        if (prices[key]) document.querySelector(
+          'div[data-testid="x-price-primary"] span.ux-textspans'
+        ).textContent = prices[key];
+      }, 30);
+    });
+  });
+});
+"""
+
+# Appends the next batch of result items whenever the list is scrolled to the
+# bottom, the way eBay's result lists grow.
+LAZY_LIST_SCRIPT = """
+const pending = %s;
+const list = document.querySelector("ul.srp-results");
+window.addEventListener("scroll", () => {
+  if (!pending.length) return;
+  if (window.innerHeight + window.scrollY < document.body.scrollHeight - 50) return;
+  setTimeout(() => {
+    for (const item of pending.splice(0, %d)) list.insertAdjacentHTML("beforeend", item);
+  }, 50);
+});
+"""
+
+
+def render_card(base_url: str, item: Dict) -> str:
+    return (
+        '<li class="s-item" style="height:180px">'
+        f'<a class="s-item__link" href="{base_url}/itm/{item["id"]}?hash=mock">'
+        f'<div class="s-item__title"><span>{html.escape(item["title"])}</span></div>'
+        "</a>"
+        f'<span class="s-item__price">{item["price"]}</span>'
+        "</li>"
+    )
+
+
+def render_search_page(
+    catalog: MockCatalog, base_url: str, page: int, page_size: int
+) -> str:
+    pages = max(1, -(-len(catalog.items) // page_size))
+    page = min(max(page, 1), pages)
+    items = catalog.items[(page - 1) * page_size : page * page_size]
+    cards = [render_card(base_url, item) for item in items]
+    first = max(1, min(page - PAGER_WINDOW // 2, pages - PAGER_WINDOW + 1))
+    pager = "".join(
+        f'<a class="pagination__item" href="{base_url}/sch/i.html?_ssn='
+        f'{catalog.seller}&amp;_pgn={n}&amp;_ipg={page_size}">{n}</a>'
+        for n in range(first, min(pages, first + PAGER_WINDOW - 1) + 1)
+    )
+    return (
+        "<!DOCTYPE html><html><head><title>Mock seller</title></head><body>"
+        f'<h1 class="srp-controls__count-heading">{len(catalog.items)} results</h1>'
+        f'<ul class="srp-results srp-list">{"".join(cards[:LAZY_BATCH])}</ul>'
+        f'<nav class="pagination"><ol class="pagination__items">{pager}</ol></nav>'
+        f"<script>{LAZY_LIST_SCRIPT % (json.dumps(cards[LAZY_BATCH:]), LAZY_BATCH)}"
+        "</script></body></html>"
+    )
+
+
+# "</" inside JSON-LD would end its script element early
+LD_SCRIPT_END = "<\\/"
+
+
+def render_item_page(base_url: str, item: Dict) -> str:
+    images = "".join(
+        f'<button class="ux-image-grid-item"><img src="{base_url}/img/'
+        f'{item["id"]}_{n}.jpg"></button>'
+        for n in range(item["images"])
+    )
+    json_ld = [
+        {
+            "@context": "https://schema.org",
+            "@type": "Product",
+            "name": item["title"],
+            "brand": {"@type": "Brand", "name": item["brand"]},
+        },
+        {
+            "@context": "https://schema.org",
+            "@type": "BreadcrumbList",
+            "itemListElement": [
+                {"@type": "ListItem", "position": 1, "name": item["category"]}
+            ],
+        },
+    ]
+    parts = [
+        "<!DOCTYPE html><html><head><title>Mock item</title>"
+        '<script type="application/ld+json">'
+        f"{json.dumps(json_ld).replace('</', LD_SCRIPT_END)}</script></head><body>",
+        '<nav><ul><li><a class="seo-breadcrumb-text" href="#">'
+        f'<span>{html.escape(item["category"])}</span></a></li></ul></nav>',
+        f'<h1 class="x-item-title">{html.escape(item["title"])}</h1>',
+        f'<div class="ux-image-grid">{images}</div>',
+        '<div data-testid="x-price-primary">'
+        f'<span class="ux-textspans">{item["price"]}</span></div>',
+        '<div class="x-item-condition-text">'
+        f'<span class="ux-textspans">{item["condition"]}</span></div>',
+        '<div id="qtyAvailability">'
+        f'<span class="ux-textspans ux-textspans--SECONDARY">{item["quantity"]}</span>'
+        "</div>",
+        "<dl data-testid='ux-labels-values' class='ux-labels-values--brand'>"
+        f'<dt>Brand</dt><dd><span class="ux-textspans">{item["brand"]}</span></dd></dl>',
+    ]
+    variants = item["variants"]
+    if variants:
+        for name, values in variants["menus"]:
+            options = "".join(
+                f'<div role="option"><span class="listbox__value">{v}</span></div>'
+                for v in values
+            )
+            parts.append(
+                f'<div class="listbox-button"><label>{name}</label>'
+                '<button class="listbox-button__control" value="Select">Select</button>'
+                '<div role="listbox" hidden>'
+                '<div role="option"><span class="listbox__value">Select</span></div>'
+                f"{options}</div></div>"
+            )
+        prices = {
+            f"{color}|{size}": f"${price:.2f}"
+            for (color, size), price in variants["prices"].items()
+        }
+        parts.append(f"<script>{VARIANT_SCRIPT % json.dumps(prices)}</script>")
+        if variants["msku"]:
+            model = json.dumps({"MSKU": _msku(variants)}, separators=(",", ":"))
+            parts.append(f"<script>window.__itemModel = {model};</script>")
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+class MockEbayServer:
+    """
+    Serves a ``MockCatalog`` on localhost from a background thread.
+
+    Every request waits ``latency`` plus up to ``jitter`` seconds. With the
+    given probabilities a request is answered with 503, with 429 and a
+    Retry-After header, or redirected to a challenge page. ``fixtures_dir``
+    may hold recorded eBay item pages (``*.html``); they are served in place
+    of the generated item pages, round-robin by listing.
+    """
+
+    def __init__(
+        self,
+        catalog: Optional[MockCatalog] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        failure_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        challenge_rate: float = 0.0,
+        fixtures_dir: Optional[str] = None,
+        seed: int = 1,
+    ):
+        self.catalog = catalog or MockCatalog()
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.throttle_rate = throttle_rate
+        self.challenge_rate = challenge_rate
+        self.fixtures = []
+        if fixtures_dir:
+            self.fixtures = sorted(
+                os.path.join(fixtures_dir, name)
+                for name in os.listdir(fixtures_dir)
+                if name.endswith(".html")
+            )
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests: Counter = Counter()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def seller_url(self) -> str:
+        return f"{self.base_url}/str/{self.catalog.seller}"
+
+    def start(self) -> "MockEbayServer":
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "MockEbayServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.requests)
+
+    def _count(self, kind: str) -> None:
+        with self.lock:
+            self.requests[kind] += 1
+
+    def _fault(self) -> Optional[str]:
+        with self.lock:
+            roll = self.rng.random()
+            delay = self.latency + self.rng.uniform(0, self.jitter)
+        time.sleep(delay)
+        for fault, rate in (
+            ("error", self.failure_rate),
+            ("throttle", self.throttle_rate),
+            ("challenge", self.challenge_rate),
+        ):
+            if roll < rate:
+                return fault
+            roll -= rate
+        return None
+
+    def _item_page(self, item: Dict) -> str:
+        if self.fixtures:
+            path = self.fixtures[int(item["id"]) % len(self.fixtures)]
+            with open(path, encoding="utf-8") as f:
+                return f.read()
+        return render_item_page(self.base_url, item)
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args) -> None:
+                pass
+
+            def _send(
+                self, status: int, body: bytes, content_type="text/html", headers=None
+            ):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self) -> None:
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                if url.path.startswith("/img/"):
+                    server._count("image")
+                    return self._send(200, PIXEL_GIF, "image/gif")
+                if url.path.startswith("/splashui/challenge"):
+                    server._count("challenge_page")
+                    return self._send(
+                        200, b"<html><body>Please verify yourself</body></html>"
+                    )
+
+                fault = server._fault()
+                if fault == "error":
+                    server._count("injected_error")
+                    return self._send(503, b"Service Unavailable")
+                if fault == "throttle":
+                    server._count("injected_throttle")
+                    return self._send(
+                        429, b"Too Many Requests", headers={"Retry-After": "1"}
+                    )
+                if fault == "challenge":
+                    server._count("injected_challenge")
+                    self.send_response(302)
+                    self.send_header("Location", "/splashui/challenge?ap=1")
+                    self.send_header("Content-Length", "0")
+                    return self.end_headers()
+
+                if url.path.startswith("/itm/"):
+                    item = server.catalog.by_id.get(url.path.rsplit("/", 1)[-1])
+                    if item is None:
+                        server._count("not_found")
+                        return self._send(404, b"Listing ended")
+                    server._count("item")
+                    return self._send(200, server._item_page(item).encode("utf-8"))
+                if url.path.startswith("/str/") or url.path == "/sch/i.html":
+                    server._count("search")
+                    page = int(query.get("_pgn", ["1"])[0])
+                    page_size = int(query.get("_ipg", [DEFAULT_PAGE_SIZE])[0])
+                    body = render_search_page(
+                        server.catalog, server.base_url, page, page_size
+                    )
+                    return self._send(200, body.encode("utf-8"))
+                server._count("not_found")
+                self._send(404, b"Not found")
+
+        return Handler
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="cli.py mock-server", description="Serve a mock eBay seller locally."
+    )
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--items", type=int, default=240)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--challenge-rate", type=float, default=0.0)
+    parser.add_argument("--fixtures", default=None, help="Recorded item pages")
+    args = parser.parse_args(argv)
+
+    server = MockEbayServer(
+        MockCatalog(args.items),
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        failure_rate=args.failure_rate,
+        throttle_rate=args.throttle_rate,
+        challenge_rate=args.challenge_rate,
+        fixtures_dir=args.fixtures,
+    )
+    print(f"Serving {args.items} listings at {server.seller_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
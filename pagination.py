@@ -0,0 +1,57 @@
+"""Addressing a seller's result pages by URL parameter, at the largest page size."""
+
+import math
+import re
+from typing import NamedTuple, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+PAGE_PARAM = "_pgn"
+PAGE_SIZE_PARAM = "_ipg"
+MAX_PAGE_SIZE = 240  # Largest number of results eBay shows on one page
+
+# Digit groups are joined only across commas and dots: a space-joined run
+# would merge a neighbouring number, e.g. "Page 2 1,234 results"
+_RESULT_COUNT = re.compile(r"(\d[\d,.]*)\s*(\+)?\s*results?", re.IGNORECASE)
+
+
+class ResultCount(NamedTuple):
+    """Listing count of a results heading; not exact for capped counts like
+    "50,000+ results", which only give a lower bound."""
+
+    count: int
+    exact: bool = True
+
+
+def result_page_url(url: str, number: int, page_size: int = MAX_PAGE_SIZE) -> str:
+    """``url`` pointed at result page ``number`` with ``page_size`` results."""
+    parts = urlsplit(url)
+    query = [
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key not in (PAGE_PARAM, PAGE_SIZE_PARAM)
+    ]
+    query += [(PAGE_PARAM, str(number)), (PAGE_SIZE_PARAM, str(page_size))]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def page_number(url: str) -> int:
+    """Result page a URL points at; 1 when it has no page parameter."""
+    for key, value in parse_qsl(urlsplit(url).query):
+        if key == PAGE_PARAM and value.isdigit():
+            return int(value)
+    return 1
+
+
+def parse_result_count(text: Optional[str]) -> Optional[ResultCount]:
+    """Listing count of a heading like "1,234 results"; None without one."""
+    match = _RESULT_COUNT.search(text or "")
+    if match is None:
+        return None
+    digits = re.sub(r"\D", "", match.group(1))
+    if not digits:
+        return None
+    return ResultCount(int(digits), exact=match.group(2) is None)
+
+
+def last_page(expected_listings: int, page_size: int) -> int:
+    return max(1, math.ceil(expected_listings / page_size))
@@ -0,0 +1,84 @@
+"""Bounded-queue stages for producer/consumer scraping pipelines."""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+Handler = Callable[[Any], Awaitable[None]]
+
+
+class Stage:
+    """
+    ``workers`` tasks taking jobs from a bounded queue and running ``handler``.
+
+    ``put`` waits while the queue is full, so a fast producer is held back
+    instead of piling up jobs in memory. A failing job is logged and counted
+    without stopping its worker.
+    """
+
+    def __init__(self, name: str, handler: Handler, workers: int, queue_size: int):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.tasks: List[asyncio.Task] = []
+        self.processed = 0
+        self.failures = 0
+        self.peak_depth = 0
+        self.busy_time = 0.0
+        self.blocked_time = 0.0  # Producers waiting on a full queue
+        self.started = time.monotonic()
+
+    def start(self) -> "Stage":
+        self.tasks = [
+            asyncio.create_task(self._work(), name=f"{self.name}-{n}")
+            for n in range(self.workers)
+        ]
+        return self
+
+    async def put(self, job: Any) -> None:
+        start = time.monotonic()
+        await self.queue.put(job)
+        self.blocked_time += time.monotonic() - start
+        self.peak_depth = max(self.peak_depth, self.queue.qsize())
+
+    async def _work(self) -> None:
+        while True:
+            job = await self.queue.get()
+            start = time.monotonic()
+            try:
+                await self.handler(job)
+                self.processed += 1
+            except Exception as e:
+                self.failures += 1
+                logging.error(f"{self.name} stage failed on a job: {e}")
+            finally:
+                self.busy_time += time.monotonic() - start
+                self.queue.task_done()
+
+    async def join(self) -> None:
+        """Wait until every job put so far has been handled."""
+        await self.queue.join()
+
+    async def stop(self) -> None:
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    def stats(self) -> Dict[str, float]:
+        elapsed = time.monotonic() - self.started
+        return {
+            "workers": self.workers,
+            "processed": self.processed,
+            "failures": self.failures,
+            "queued": self.queue.qsize(),
+            "peak_depth": self.peak_depth,
+            "blocked_s": round(self.blocked_time, 3),
+            "utilisation": (
+                round(self.busy_time / (elapsed * self.workers), 3)
+                if elapsed > 0
+                else 0.0
+            ),
+        }
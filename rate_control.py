@@ -0,0 +1,296 @@
+"""Adaptive concurrency and per-host rate limiting driven by eBay's responses."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Deque, Dict, Optional
+from urllib.parse import urlparse
+
+from lazy_imports import playwright_timeout
+from metrics import metrics
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page
+
+OK = "ok"
+ERROR = "error"
+THROTTLED = "throttled"
+
+THROTTLE_STATUSES = frozenset({429, 503})
+CHALLENGE_URL_MARKERS = ("/splashui/challenge", "/splashui/captcha")
+CHALLENGE_REASON = "challenge page"
+
+LATENCY_TARGET_S = 8.0  # Navigation latency EWMA above this counts as congestion
+ERROR_RATE_LIMIT = 0.1  # The limit only grows while the recent error rate is lower
+OUTCOME_WINDOW = 50
+LATENCY_SMOOTHING = 0.2
+BACKOFF_BASE_S = 1.0
+BACKOFF_CAP_S = 60.0
+
+
+class ThrottledError(Exception):
+    """eBay answered with 429/503 or a challenge page instead of the listing."""
+
+    def __init__(self, url: str, reason: str, retry_after: Optional[float] = None):
+        super().__init__(f"Throttled on {url}: {reason}")
+        self.url = url
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def is_challenge_url(url: str) -> bool:
+    return any(marker in url for marker in CHALLENGE_URL_MARKERS)
+
+
+def _retry_after(headers: Dict[str, str]) -> Optional[float]:
+    try:
+        return float(headers.get("retry-after", ""))
+    except ValueError:
+        return None
+
+
+def throttle_error(
+    url: str, status: int, final_url: str, headers: Dict[str, str]
+) -> Optional[ThrottledError]:
+    """The ``ThrottledError`` a response amounts to, or None for a normal page."""
+    if status in THROTTLE_STATUSES:
+        return ThrottledError(url, f"HTTP {status}", _retry_after(headers))
+    if is_challenge_url(final_url):
+        return ThrottledError(url, CHALLENGE_REASON)
+    return None
+
+
+def backoff_delay(
+    attempt: int, base: float = BACKOFF_BASE_S, cap: float = BACKOFF_CAP_S
+) -> float:
+    """Exponential backoff with full jitter, so retries of many tasks spread out."""
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+def retry_delay(error: Exception, attempt: int) -> float:
+    """Seconds to wait before retrying after ``error``, honouring Retry-After."""
+    if isinstance(error, ThrottledError) and error.retry_after:
+        return min(error.retry_after, BACKOFF_CAP_S)
+    return backoff_delay(attempt)
+
+
+class TokenBucket:
+    """Allows ``rate`` requests per second with bursts of up to ``burst``."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    async def acquire(self) -> float:
+        """Take a token, sleeping until one is available; returns the wait."""
+        waited = 0.0
+        while True:
+            now = time.monotonic()
+            self.tokens = min(
+                self.burst, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return waited
+            delay = (1 - self.tokens) / self.rate
+            waited += delay
+            await asyncio.sleep(delay)
+
+
+class HostRateLimiter:
+    """One token bucket per host, so each eBay host gets its own request rate."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.total_wait = 0.0
+
+    async def wait(self, url: str) -> None:
+        host = urlparse(url).netloc
+        bucket = self.buckets.get(host)
+        if bucket is None:
+            bucket = self.buckets[host] = TokenBucket(self.rate, self.burst)
+        self.total_wait += await bucket.acquire()
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit adjusted AIMD-style from observed navigation outcomes.
+
+    Every ``limit`` healthy navigations raise the limit by one while the
+    latency EWMA and the recent error rate stay under their targets.
+    Timeouts, 429/503 responses, challenge pages and a latency EWMA above
+    ``latency_target`` halve it, at most once per ``cooldown`` seconds so one
+    burst of congestion counts once.
+
+    Usable wherever an ``asyncio.Semaphore`` is: ``async with limiter:``.
+    With ``host_rate`` every request also takes a token from its host's bucket.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        min_limit: int = 1,
+        max_limit: Optional[int] = None,
+        latency_target: float = LATENCY_TARGET_S,
+        error_rate_limit: float = ERROR_RATE_LIMIT,
+        window: int = OUTCOME_WINDOW,
+        cooldown: Optional[float] = None,
+        host_rate: Optional[float] = None,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max(max_limit or initial * 4, initial)
+        self.limit = max(min_limit, initial)
+        self.peak_limit = self.limit
+        self.latency_target = latency_target
+        self.error_rate_limit = error_rate_limit
+        self.cooldown = latency_target if cooldown is None else cooldown
+        self.hosts = HostRateLimiter(host_rate) if host_rate else None
+        self.in_flight = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.failures: Deque[bool] = deque(maxlen=window)
+        self.latency: Optional[float] = None
+        self.successes = 0
+        self.last_decrease = float("-inf")
+        self.increases = 0
+        self.decreases = 0
+        self.counts: Dict[str, int] = {OK: 0, ERROR: 0, THROTTLED: 0}
+
+    async def acquire(self) -> None:
+        if self.in_flight < self.limit and not self.waiters:
+            self.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()  # The slot was granted just before cancellation
+            raise
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        while self.waiters and self.in_flight < self.limit:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    async def __aenter__(self) -> "AdaptiveLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.release()
+
+    async def throttle(self, url: str) -> None:
+        """Wait for the host's token bucket, when per-host rates are enabled."""
+        if self.hosts is not None:
+            await self.hosts.wait(url)
+
+    @property
+    def error_rate(self) -> float:
+        return sum(self.failures) / len(self.failures) if self.failures else 0.0
+
+    def record(self, outcome: str, latency: Optional[float] = None) -> None:
+        """Feed one navigation outcome and, if known, its latency in seconds."""
+        self.counts[outcome] += 1
+        self.failures.append(outcome != OK)
+        if latency is not None:
+            self.latency = (
+                latency
+                if self.latency is None
+                else LATENCY_SMOOTHING * latency
+                + (1 - LATENCY_SMOOTHING) * self.latency
+            )
+
+        if outcome == THROTTLED:
+            self._decrease(outcome)
+        elif self.latency is not None and self.latency > self.latency_target:
+            self._decrease(f"latency {self.latency:.1f}s")
+        elif outcome == OK and self.error_rate < self.error_rate_limit:
+            self.successes += 1
+            if self.successes >= self.limit:
+                self._increase()
+
+    def _increase(self) -> None:
+        self.successes = 0
+        if self.limit >= self.max_limit:
+            return
+        self.limit += 1
+        self.increases += 1
+        self.peak_limit = max(self.peak_limit, self.limit)
+        logging.info(f"Concurrency limit raised to {self.limit}")
+        self._wake()
+
+    def _decrease(self, reason: str) -> None:
+        self.successes = 0
+        now = time.monotonic()
+        if now - self.last_decrease < self.cooldown or self.limit <= self.min_limit:
+            return
+        self.last_decrease = now
+        previous, self.limit = self.limit, max(self.min_limit, self.limit // 2)
+        self.decreases += 1
+        logging.warning(
+            f"Concurrency limit lowered from {previous} to {self.limit} ({reason})"
+        )
+
+    def stats(self) -> Dict[str, float]:
+        """The live limit and the outcomes that shaped it, for the run report."""
+        return {
+            "limit": self.limit,
+            "peak_limit": self.peak_limit,
+            "in_flight": self.in_flight,
+            "increases": self.increases,
+            "decreases": self.decreases,
+            **self.counts,
+            "error_rate": round(self.error_rate, 3),
+            "latency_ewma_s": round(self.latency or 0.0, 3),
+            "host_wait_s": round(self.hosts.total_wait, 3) if self.hosts else 0.0,
+        }
+
+
+@metrics.instrument("navigate")
+async def navigate(
+    page: Page, url: str, limiter: Optional[AdaptiveLimiter] = None, **options
+):
+    """
+    ``page.goto`` that reports its latency and outcome to ``limiter``.
+
+    Raises:
+        ThrottledError: eBay answered with 429/503 or a challenge page
+    """
+    if limiter is None:
+        return await page.goto(url, **options)
+
+    await limiter.throttle(url)
+    start = time.monotonic()
+    try:
+        response = await page.goto(url, **options)
+    except playwright_timeout():
+        limiter.record(THROTTLED)
+        raise
+    except Exception:
+        limiter.record(ERROR)
+        raise
+    latency = time.monotonic() - start
+
+    if response is not None:
+        error = throttle_error(url, response.status, page.url, response.headers)
+        if error is not None:
+            limiter.record(THROTTLED, latency)
+            raise error
+    limiter.record(OK, latency)
+    return response
@@ -0,0 +1,124 @@
+"""Output records: listing fields shared by its variant rows, and parsed prices."""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+# Appended to the output columns; numeric in Arrow and Parquet output
+PRICE_COLUMNS = ["цена мин", "цена макс", "валюта"]
+NUMERIC_COLUMNS = PRICE_COLUMNS[:2]
+
+# Longest first, so "US $" wins over "$"
+CURRENCY_SYMBOLS = (
+    ("US $", "USD"),
+    ("C $", "CAD"),
+    ("AU $", "AUD"),
+    ("NZ $", "NZD"),
+    ("HK $", "HKD"),
+    ("S $", "SGD"),
+    ("$", "USD"),
+    ("£", "GBP"),
+    ("€", "EUR"),
+    ("¥", "JPY"),
+    ("₹", "INR"),
+)
+CURRENCY_CODE_PATTERN = re.compile(r"\b[A-Z]{3}\b")
+# Digits may be grouped with commas, dots or no-break spaces, or with plain
+# spaces between groups of three, as in "RUB 1 234,50"
+AMOUNT_PATTERN = re.compile(
+    "\\d{1,3}(?: \\d{3})+(?!\\d)(?:[.,]\\d+)?|\\d(?:[\\d.,\u00a0\u202f]*\\d)?"
+)
+
+
+@dataclass(frozen=True, slots=True)
+class Price:
+    """Lowest and highest amount of a price text, and its ISO currency."""
+
+    min: Optional[float]
+    max: Optional[float]
+    currency: Optional[str]
+
+
+def _amount(text: str) -> float:
+    """Number from an amount like "1,234.56", "1.234,56" or "1 234"."""
+    digits = text.replace(" ", "").replace("\u00a0", "").replace("\u202f", "")
+    separator = max(digits.rfind(","), digits.rfind("."))
+    # A separator followed by three digits groups thousands; otherwise it is
+    # the decimal point.
+    if separator != -1 and len(digits) - separator - 1 != 3:
+        whole, fraction = digits[:separator], digits[separator + 1 :]
+    else:
+        whole, fraction = digits, "0"
+    whole = whole.replace(",", "").replace(".", "")
+    return float(f"{whole}.{fraction}")
+
+
+@lru_cache(maxsize=4096)
+def parse_price(text: str) -> Price:
+    """
+    Parse eBay price texts like "$12.99", "US $12.99 to $19.99" or "EUR 12,99".
+
+    Listings of a seller share few distinct price texts, so results are
+    cached. Unparseable texts such as "N/A" give an all-None price.
+    """
+    amounts = [_amount(match) for match in AMOUNT_PATTERN.findall(text)]
+    if not amounts:
+        return Price(None, None, None)
+    code = CURRENCY_CODE_PATTERN.search(text)
+    currency = code.group(0) if code else None
+    if currency is None:
+        currency = next(
+            (iso for symbol, iso in CURRENCY_SYMBOLS if symbol in text), None
+        )
+    return Price(min(amounts), max(amounts), currency)
+
+
+@dataclass(frozen=True, slots=True)
+class Listing:
+    """
+    Fields of a listing as scraped once from its card and item page.
+
+    Every row of the listing, one per variant, references the same instance
+    instead of copying the fields.
+    """
+
+    title: str
+    price: str
+    category: str
+    image_urls: Tuple[str, ...]
+    item_url: str
+    seller_url: str
+    quantity: str
+    brand: str
+    condition: str
+
+
+@dataclass(slots=True)
+class ProductRecord:
+    """One output row: a listing, optionally narrowed to a variant."""
+
+    listing: Listing
+    variant: Tuple[str, ...] = ()
+    price: Optional[str] = None  # Variant price, when it differs
+    quantity: Optional[str] = None  # Variant stock, when it differs
+
+    def row(self) -> List:
+        listing = self.listing
+        title = f"{listing.title} : {self.variant}" if self.variant else listing.title
+        price = self.price or listing.price
+        parsed = parse_price(price)
+        return [
+            title,
+            price,
+            listing.category,
+            *listing.image_urls,
+            listing.item_url,
+            listing.seller_url,
+            self.quantity or listing.quantity,
+            listing.brand,
+            listing.condition,
+            parsed.min,
+            parsed.max,
+            parsed.currency,
+        ]
@@ -0,0 +1,352 @@
+"""Retry only the listings of a dead-letter file, with a strategy per failure."""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from collections import defaultdict
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from failures import (
+    CATEGORIES,
+    CHALLENGE,
+    NETWORK,
+    REMOVED_LISTING,
+    SELECTOR_MISSING,
+    THROTTLED,
+    TIMEOUT,
+    UNKNOWN,
+    VARIANT_MISMATCH,
+    DeadLetterFile,
+    read_dead_letters,
+)
+from lazy_imports import async_playwright
+from settings import ScraperConfig
+
+SLOW_PAGE_TIMEOUT = 60000  # Twice the scraper's default
+
+
+@dataclass(frozen=True)
+class RedriveStrategy:
+    """How the listings of one failure category are retried."""
+
+    engine: Optional[str] = None  # None keeps the run's engine
+    max_concurrency: Optional[int] = None  # Cap on the adaptive limit
+    host_rate: Optional[float] = None  # Cap on requests/s per host
+    page_timeout: Optional[float] = None  # Default timeout of item pages, ms
+    retry: bool = True
+
+    def apply(self, settings: ScraperConfig) -> ScraperConfig:
+        """``settings`` narrowed by this strategy; caps never raise a limit."""
+        changes = {}
+        if self.engine is not None:
+            changes["engine"] = self.engine
+        if self.max_concurrency is not None:
+            changes["concurrency"] = min(settings.concurrency, self.max_concurrency)
+            changes["max_concurrency"] = min(
+                settings.max_concurrency or self.max_concurrency, self.max_concurrency
+            )
+        if self.host_rate is not None:
+            changes["host_rate"] = min(
+                settings.host_rate or self.host_rate, self.host_rate
+            )
+        return replace(settings, **changes)
+
+
+STRATEGIES = {
+    # Slow pages get twice the time and less competition
+    TIMEOUT: RedriveStrategy(max_concurrency=2, page_timeout=SLOW_PAGE_TIMEOUT),
+    # Rendered rather than parsed from HTML, with time for late content
+    SELECTOR_MISSING: RedriveStrategy(
+        engine="playwright", page_timeout=SLOW_PAGE_TIMEOUT
+    ),
+    # One page at a time, far below the rate that got the scraper challenged
+    CHALLENGE: RedriveStrategy(engine="playwright", max_concurrency=1, host_rate=0.2),
+    THROTTLED: RedriveStrategy(max_concurrency=1, host_rate=0.5),
+    # Dropdowns are clicked through one listing at a time
+    VARIANT_MISMATCH: RedriveStrategy(
+        engine="playwright", max_concurrency=1, page_timeout=SLOW_PAGE_TIMEOUT
+    ),
+    NETWORK: RedriveStrategy(max_concurrency=2),
+    # Gone for good, so only retried on request
+    REMOVED_LISTING: RedriveStrategy(retry=False),
+    UNKNOWN: RedriveStrategy(),
+}
+
+
+def group_entries(
+    entries: Iterable[Dict],
+    categories: Optional[Iterable[str]] = None,
+    include_removed: bool = False,
+) -> tuple:
+    """
+    Split dead-letter entries into those to retry, grouped by category in
+    ``CATEGORIES`` order, and those to keep as they are. Each listing is
+    retried once even if it was dead-lettered repeatedly.
+    """
+    categories = set(categories or CATEGORIES)
+    groups, kept, seen = defaultdict(list), [], set()
+    for entry in entries:
+        if entry["url"] in seen:
+            continue
+        seen.add(entry["url"])
+        category = entry.get("category") or UNKNOWN
+        if category not in STRATEGIES:
+            category = UNKNOWN
+        strategy = STRATEGIES[category]
+        if category in categories and (strategy.retry or include_removed):
+            groups[category].append(entry)
+        else:
+            kept.append(entry)
+    ordered = {
+        category: groups[category] for category in CATEGORIES if groups[category]
+    }
+    return ordered, kept
+
+
+async def redrive(
+    dead_letter_file: str,
+    output_file: Optional[str] = None,
+    settings: Optional[ScraperConfig] = None,
+    categories: Optional[Iterable[str]] = None,
+    include_removed: bool = False,
+    **options,
+) -> Dict:
+    """
+    Scrape again the listings of a dead-letter file, each category with its
+    ``STRATEGIES`` entry applied to ``settings``.
+
+    Recovered rows go to ``output_file``. The dead-letter file is then
+    replaced by the listings that failed again and those that were not
+    retried, so running the command repeatedly works through what is left.
+
+    Returns the run report: rows written and, per category, the listings
+    retried, recovered and failed again.
+    """
+    from browser_supervisor import BrowserSupervisor
+    from metrics import metrics, write_run_report
+    from records import NUMERIC_COLUMNS
+    from resource_blocking import ResourceBlocker
+    from response_cache import ResponseCache
+    from scraper import OUTPUT_COLUMNS, TIMEOUT as PAGE_TIMEOUT, launch_browser
+    from selector_health import selector_health
+    from sinks import open_sink, sink_format
+
+    settings = replace(settings or ScraperConfig(), **options)
+    entries = read_dead_letters(dead_letter_file)
+    groups, kept = group_entries(entries, categories, include_removed)
+    # A scrape writes one dead-letter file per seller
+    seller_url = next((e["seller_url"] for e in entries if e.get("seller_url")), None)
+    output_file = (
+        output_file
+        or f"{os.path.splitext(dead_letter_file)[0]}.redrive"
+        f".{settings.output_format or 'csv'}"
+    )
+    metrics.reset()
+    selector_health.reset(settings.selector_fail_fast_after)
+    started = time.monotonic()
+    report = {
+        "dead_letter_file": dead_letter_file,
+        "output_file": output_file,
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "status": "failed",
+        "rows": 0,
+        "kept": len(kept),
+        "categories": {},
+    }
+    counts = {category: len(entries) for category, entries in groups.items()}
+    logging.info(f"Redriving listings by category: {counts}, keeping {len(kept)}")
+
+    # Written next to the original and swapped in once the redrive finished,
+    # so a failed redrive leaves the dead-letter file as it was
+    pending_file = f"{dead_letter_file}.tmp"
+    remaining = DeadLetterFile(pending_file, seller_url)
+    for entry in kept:
+        remaining.write(entry)
+    sheet = open_sink(
+        output_file,
+        OUTPUT_COLUMNS,
+        sink_format(output_file, settings.output_format),
+        settings.batch_size,
+        numeric_columns=NUMERIC_COLUMNS,
+    )
+    try:
+        async with AsyncExitStack() as stack:
+            cache = (
+                ResponseCache(
+                    settings.cache_dir,
+                    max_bytes=settings.cache_max_bytes,
+                    replay_only=settings.replay_only,
+                )
+                if settings.cache_dir
+                else None
+            )
+            if cache is not None:
+                stack.callback(cache.close)
+            supervisor = None
+            if groups:
+                p = await stack.enter_async_context(async_playwright())
+                supervisor = await stack.enter_async_context(
+                    BrowserSupervisor(
+                        p,
+                        launch_browser,
+                        max_navigations=settings.browser_max_navigations,
+                        max_memory_mb=settings.browser_max_memory_mb,
+                    )
+                )
+            for category, entries in groups.items():
+                strategy = STRATEGIES[category]
+                failed_before = sum(remaining.counts.values())
+                await _redrive_group(
+                    entries,
+                    strategy.apply(settings),
+                    supervisor,
+                    sheet,
+                    remaining,
+                    cache,
+                    ResourceBlocker(),
+                    strategy.page_timeout or PAGE_TIMEOUT,
+                )
+                failed = sum(remaining.counts.values()) - failed_before
+                report["categories"][category] = {
+                    "retried": len(entries),
+                    "recovered": len(entries) - failed,
+                    "failed": failed,
+                }
+                logging.info(f"Redrive of {category}: {report['categories'][category]}")
+        sheet.close()
+        remaining.close()
+        if remaining.counts:
+            os.replace(pending_file, dead_letter_file)
+        else:
+            os.remove(dead_letter_file)
+            logging.info(f"Every listing recovered, removed {dead_letter_file}")
+        report["status"] = "ok"
+        return report
+    except Exception as e:
+        report["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        sheet.close()
+        remaining.close()
+        if os.path.exists(pending_file):
+            os.remove(pending_file)
+        report["rows"] = sheet.rows_written
+        report["duration_s"] = round(time.monotonic() - started, 3)
+        report["stages"] = metrics.report()
+        report["selectors"] = selector_health.report()
+        try:
+            write_run_report(report, settings.report_file, settings.metrics_file)
+        except OSError as e:
+            logging.error(f"Could not write the run report: {e}")
+
+
+async def _redrive_group(
+    entries: List[Dict],
+    settings: ScraperConfig,
+    browser,
+    sheet,
+    dead_letters: DeadLetterFile,
+    cache,
+    resource_blocker,
+    page_timeout: float,
+) -> None:
+    """Run the listings of one category through their own item pipeline."""
+    from http_engine import HttpItemFetcher
+    from rate_control import AdaptiveLimiter
+    from scraper import CrawlScheduler
+
+    limiter = AdaptiveLimiter(
+        settings.concurrency,
+        max_limit=settings.max_concurrency,
+        host_rate=settings.host_rate,
+    )
+    fetcher = (
+        HttpItemFetcher(limiter.max_limit, page_timeout / 1000, limiter, cache)
+        if settings.engine == "http"
+        else None
+    )
+    scheduler = CrawlScheduler(
+        browser,
+        sheet,
+        settings.concurrency,
+        fetcher,
+        resource_blocker,
+        limiter=limiter,
+        cache=cache,
+        dead_letters=dead_letters,
+        page_timeout=page_timeout,
+        max_variant_combinations=settings.max_variant_combinations,
+    )
+    try:
+        for entry in entries:
+            card = {
+                "item_url_href": entry["url"],
+                "title": entry.get("title") or "N/A",
+                "price": entry.get("price") or "N/A",
+            }
+            await scheduler.submit(card, entry.get("page_url") or entry["seller_url"])
+        await scheduler.join()
+    finally:
+        await scheduler.close()
+        if fetcher is not None:
+            await fetcher.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from cli import add_run_arguments, run_options
+
+    parser = argparse.ArgumentParser(
+        prog="cli.py redrive",
+        description="Retry the listings of a dead-letter file.",
+    )
+    parser.add_argument("dead_letter_file")
+    parser.add_argument("-o", "--output", default=None)
+    parser.add_argument("--format", default=None, dest="output_format")
+    parser.add_argument(
+        "--category",
+        action="append",
+        choices=CATEGORIES,
+        dest="categories",
+        help="Only retry this category; may be repeated",
+    )
+    parser.add_argument(
+        "--include-removed",
+        action="store_true",
+        help="Also retry listings that looked removed",
+    )
+    add_run_arguments(parser)
+    parser.add_argument("--report-file", default=None)
+    parser.add_argument("--metrics-file", default=None)
+    args = parser.parse_args(argv)
+
+    settings = ScraperConfig(
+        output_format=args.output_format,
+        report_file=args.report_file,
+        metrics_file=args.metrics_file,
+        **run_options(args),
+    )
+    try:
+        asyncio.run(
+            redrive(
+                args.dead_letter_file,
+                args.output,
+                settings,
+                args.categories,
+                args.include_removed,
+            )
+        )
+    except Exception as e:
+        logging.critical(f"Redrive failed: {e}", exc_info=True)
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    from cli import main as cli_main
+
+    cli_main(["redrive", *sys.argv[1:]])
@@ -0,0 +1,295 @@
+"""On-disk cache of eBay responses, shared by the browser and the HTTP engine."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+import zlib
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urldefrag, urlencode, urlparse
+
+from crawl_state import SqliteStore
+from listing_index import ITEM_ID_PATTERN
+
+if TYPE_CHECKING:
+    from playwright.async_api import BrowserContext, Route
+
+HOUR = 3600
+# Seconds a cached response stays fresh, per kind of resource. Search pages
+# change as listings sell, item pages and static assets far less often.
+DEFAULT_TTLS = {
+    "search": HOUR,
+    "item": 24 * HOUR,
+    "xhr": HOUR,
+    "fetch": HOUR,
+    "script": 7 * 24 * HOUR,
+    "stylesheet": 7 * 24 * HOUR,
+}
+DEFAULT_MAX_BYTES = 1024**3
+EVICT_TO = 0.9  # Evict down to this share of ``max_bytes`` once it is exceeded
+# Not replayed: the body is stored decoded and cookies must not leak between runs
+DROPPED_HEADERS = frozenset(
+    {"content-encoding", "content-length", "transfer-encoding", "set-cookie"}
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    blob TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_lru ON entries (accessed_at);
+CREATE INDEX IF NOT EXISTS entries_blob ON entries (blob);
+"""
+
+CachedResponse = Tuple[int, Dict[str, str], bytes]
+
+
+# Query parameters that change an item page's content; the rest of an item
+# URL's query is per-impression tracking (hash, itmmeta, _trkparms, ...)
+ITEM_PAGE_PARAMS = ("var",)
+
+
+def canonical_url(url: str) -> str:
+    """``url`` without its fragment; item pages reduced to host, item ID and
+    the parameters that select what they show, so the same listing found
+    through different cards or runs shares one entry."""
+    url = urldefrag(url)[0]
+    parts = urlparse(url)
+    match = ITEM_ID_PATTERN.search(parts.path) if "/itm/" in parts.path else None
+    if match is None:
+        return url
+    query = urlencode(
+        [(k, v) for k, v in parse_qsl(parts.query) if k in ITEM_PAGE_PARAMS]
+    )
+    return f"{parts.scheme}://{parts.netloc}/itm/{match.group(1)}" + (
+        f"?{query}" if query else ""
+    )
+
+
+def cache_key(url: str) -> str:
+    return hashlib.sha256(canonical_url(url).encode("utf-8")).hexdigest()
+
+
+def resource_kind(url: str, resource_type: str) -> str:
+    """Documents split into item and search pages; other types keep their name."""
+    if resource_type == "document":
+        return "item" if "/itm/" in urlparse(url).path else "search"
+    return resource_type
+
+
+class ResponseCache(SqliteStore):
+    """
+    Content-addressed response bodies with an LRU-evicted SQLite index.
+
+    Bodies are stored zlib-compressed under their SHA-256, so identical
+    responses share a file. Entries older than their kind's TTL are misses,
+    and least recently used entries are evicted once the stored size passes
+    ``max_bytes``. In ``replay_only`` mode every cached entry is served
+    regardless of age and anything else fails as if offline, so a finished
+    crawl can be re-parsed without touching eBay.
+    """
+
+    schema = SCHEMA
+
+    def __init__(
+        self,
+        directory: str,
+        ttls: Optional[Dict[str, float]] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        replay_only: bool = False,
+    ):
+        os.makedirs(os.path.join(directory, "blobs"), exist_ok=True)
+        super().__init__(os.path.join(directory, "index.db"))
+        self.directory = directory
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_bytes = max_bytes
+        self.replay_only = replay_only
+        (self.total_bytes,) = self._execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        )[0]
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.bytes_served = 0
+
+    def cacheable(self, kind: str) -> bool:
+        return self.replay_only or self.ttls.get(kind, 0) > 0
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "blobs", digest[:2], digest)
+
+    def _read_blob(self, digest: str) -> Optional[bytes]:
+        try:
+            with open(self._blob_path(digest), "rb") as f:
+                return zlib.decompress(f.read())
+        except (OSError, zlib.error):
+            return None
+
+    def _write_blob(self, digest: str, body: bytes) -> int:
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # A temporary file per write: concurrent puts of the same body
+            # must not share one
+            handle, temporary = tempfile.mkstemp(
+                dir=os.path.dirname(path), suffix=".tmp"
+            )
+            try:
+                with os.fdopen(handle, "wb") as f:
+                    f.write(zlib.compress(body))
+                os.replace(temporary, path)
+            except OSError:
+                if os.path.exists(temporary):
+                    os.remove(temporary)
+                # Blobs are content-addressed, so losing the race to another
+                # writer of the same body still leaves the right blob
+                if not os.path.exists(path):
+                    raise
+        return os.path.getsize(path)
+
+    def _remove_blob(self, digest: str) -> None:
+        if self._execute("SELECT 1 FROM entries WHERE blob = ? LIMIT 1", (digest,)):
+            return
+        try:
+            os.remove(self._blob_path(digest))
+        except OSError:
+            pass
+
+    async def get(self, url: str, kind: str) -> Optional[CachedResponse]:
+        """A fresh cached response for ``url``, or None on a miss."""
+        key = cache_key(url)
+        rows = await self._run(
+            "SELECT blob, status, headers, stored_at FROM entries WHERE key = ?",
+            (key,),
+        )
+        fresh = rows and (
+            self.replay_only or time.time() - rows[0][3] <= self.ttls.get(kind, 0)
+        )
+        body = await asyncio.to_thread(self._read_blob, rows[0][0]) if fresh else None
+        if body is None:
+            self.misses += 1
+            return None
+        await self._run(
+            "UPDATE entries SET accessed_at = ? WHERE key = ?", (time.time(), key)
+        )
+        self.hits += 1
+        self.bytes_served += len(body)
+        _, status, headers, _ = rows[0]
+        return status, json.loads(headers), body
+
+    async def put(
+        self, url: str, kind: str, status: int, headers: Dict[str, str], body: bytes
+    ) -> None:
+        """Store a response, evicting the least recently used once over budget."""
+        if self.replay_only or not self.cacheable(kind):
+            return
+        digest = hashlib.sha256(body).hexdigest()
+        size = await asyncio.to_thread(self._write_blob, digest, body)
+        headers = {
+            name: value
+            for name, value in headers.items()
+            if name.lower() not in DROPPED_HEADERS
+        }
+        key = cache_key(url)
+        previous = await self._run("SELECT size FROM entries WHERE key = ?", (key,))
+        now = time.time()
+        await self._run(
+            """
+            INSERT OR REPLACE INTO entries (
+                key, url, kind, blob, status, headers, size, stored_at, accessed_at
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (key, url, kind, digest, status, json.dumps(headers), size, now, now),
+        )
+        self.stores += 1
+        self.total_bytes += size - (previous[0][0] if previous else 0)
+        if self.total_bytes > self.max_bytes:
+            await asyncio.to_thread(self._evict)
+
+    def _evict(self) -> None:
+        target = self.max_bytes * EVICT_TO
+        for key, digest, size in self._execute(
+            "SELECT key, blob, size FROM entries ORDER BY accessed_at"
+        ):
+            if self.total_bytes <= target:
+                break
+            self._execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._remove_blob(digest)
+            self.total_bytes -= size
+            self.evictions += 1
+
+    async def store(
+        self, url: str, kind: str, status: int, headers: Dict[str, str], body: bytes
+    ) -> None:
+        """``put`` for callers that serve the response either way: a write
+        error is logged rather than raised."""
+        try:
+            await self.put(url, kind, status, headers, body)
+        except Exception as e:
+            logging.warning(f"Could not cache {url}: {e}")
+
+    async def handle(self, route: Route) -> None:
+        """Route handler answering cacheable GET requests from the cache."""
+        request = route.request
+        kind = resource_kind(request.url, request.resource_type)
+        if request.method != "GET" or not self.cacheable(kind):
+            await route.fallback()
+            return
+        cached = await self.get(request.url, kind)
+        if cached is not None:
+            status, headers, body = cached
+            await route.fulfill(status=status, headers=headers, body=body)
+            return
+        if self.replay_only:
+            await route.abort("internetdisconnected")
+            return
+        try:
+            # Redirects go back to the browser, so challenge redirects still
+            # show up in the page URL and are never cached as content.
+            response = await route.fetch(max_redirects=0)
+            body = await response.body()
+        except Exception as e:
+            logging.debug(f"Cache fetch failed for {request.url}, passing on: {e}")
+            await route.fallback()
+            return
+        if response.status == 200:
+            await self.store(request.url, kind, 200, response.headers, body)
+        await route.fulfill(response=response, body=body)
+
+    async def apply(self, context: BrowserContext) -> None:
+        """Serve the context's requests through the cache.
+
+        Apply it before the ``ResourceBlocker``: route handlers run newest
+        first, so blocked requests never reach the cache.
+        """
+        await context.route("**/*", self.handle)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "bytes_served": self.bytes_served,
+            "stored_bytes": self.total_bytes,
+            "replay_only": self.replay_only,
+        }
+
+    def log_stats(self) -> None:
+        logging.info(f"Response cache stats: {self.stats()}")
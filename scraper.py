@@ -1,21 +1,85 @@
+from __future__ import annotations
+
 import asyncio
+from collections import deque
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field, replace
 from datetime import datetime
 import itertools
 import logging
-import re
-from typing import Dict, List, Optional
-import playwright
-from playwright.async_api import async_playwright, Page, Browser, TimeoutError
-from openpyxl import Workbook
-from decouple import config
-
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[logging.FileHandler("ebay_scraper.log"), logging.StreamHandler()],
+import sys
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from extraction import (
+    ITEM_PAGE_SCHEMA,
+    LISTBOX_VALUE_SELECTOR,
+    PRICE_SELECTORS,
+    RESULT_COUNT_SELECTORS,
+    RESULT_ITEM_SELECTORS,
+    RESULTS_LIST_SELECTORS,
+    SEARCH_CARD_SCHEMA,
+    css_any,
+    extract_from_page,
+    is_price_range,
+    parse_item_html,
+)
+from browser_pool import BrowserPool, borrow_page
+from browser_supervisor import BrowserSupervisor
+from crawl_state import DONE, FAILED, PENDING, CrawlStateStore
+from failures import (
+    REMOVED_LISTING,
+    REMOVED_LISTING_MARKERS,
+    REMOVED_STATUSES,
+    SELECTOR_MISSING,
+    VARIANT_MISMATCH,
+    DeadLetterFile,
+    ScrapeFailure,
+    classify,
+    dead_letter_path,
+    missing_item_details,
+)
+from http_engine import HttpItemFetcher
+from lazy_imports import async_playwright, playwright_timeout
+from rate_control import AdaptiveLimiter, navigate, retry_delay
+from metrics import metrics, write_run_report
+from pagination import (
+    ResultCount,
+    last_page,
+    page_number,
+    parse_result_count,
+    result_page_url,
+)
+from pipeline import Stage
+from records import NUMERIC_COLUMNS, PRICE_COLUMNS, Listing, ProductRecord
+from listing_index import (
+    REMOVED,
+    UNCHANGED,
+    ListingIndex,
+    card_fingerprint,
 )
+from resource_blocking import ResourceBlocker
+from response_cache import ResponseCache
+from selector_health import selector_health
+from settings import CONCURRENT_TASK_LIMIT, MAX_VARIANT_COMBINATIONS, ScraperConfig
+from sinks import SINKS, open_sink, sink_format
+from variants import variant_offers_from_html
+from waits import settle, wait_stats
+from work_queue import (
+    IDLE_TIMEOUT,
+    ITEM,
+    LEASE_SECONDS,
+    PAGE,
+    POLL_INTERVAL,
+    Task,
+    WorkQueue,
+    open_work_queue,
+    worker_id,
+)
+
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, Page
+
 TITLE_TABLES = [
     "наименование товара",
     "цена",
@@ -36,14 +100,28 @@ TITLE_TABLES = [
     "бренд ",
     "кондиция товара",
 ]
-CONCURRENT_TASK_LIMIT = 4
+OUTPUT_COLUMNS = TITLE_TABLES + PRICE_COLUMNS
+LISTING_STATUS_COLUMN = "статус листинга"  # Only written in incremental mode
+ITEM_QUEUE_SIZE = 256  # Discovered listings waiting for their item page
+OUTPUT_QUEUE_SIZE = 256  # Scraped listings waiting to be written
 MAX_RETRIES = 3
+MAX_REQUEUES = 3  # Reruns of one page or listing after browser restarts
 TIMEOUT = 30000  # 30 seconds
+SCROLL_MAX_STEPS = 20
+SCROLL_BUDGET_SECONDS = 30
+BUTTON_WAIT_TIMEOUT = 3000
+DROPDOWN_WAIT_TIMEOUT = 60000
+PRICE_WAIT_TIMEOUT = 30000
+BROWSER_CONTEXT_OPTIONS = {
+    "viewport": {"width": 1920, "height": 1080},
+    "locale": "en-US",
+    "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+}
 
 
 async def split_list_by_delimiter(lst, delimiter):
     """Split a list by separator."""
-    logging.info("Разделение списка по разделителю.", exc_info=True)
+    logging.info("Разделение списка по разделителю.")
     result = []
     current_sublist = []
     for item in lst:
@@ -61,15 +139,23 @@ async def split_list_by_delimiter(lst, delimiter):
 
 async def find_buttons(page, selector, level):
     """Search for buttons by a given selector."""
-    logging.info(f"Поиск кнопок на уровне {level}.", exc_info=True)
+    logging.info(f"Поиск кнопок на уровне {level}.")
     buttons = await page.query_selector_all(selector)
 
-    if not buttons:
+    if len(buttons) <= level:
         logging.info(
             f"Кнопки не найдены. Ожидание и повторный поиск на уровне {level}.",
-            exc_info=True,
         )
-        await asyncio.sleep(3)
+        async with wait_stats.timed("buttons"):
+            try:
+                await page.wait_for_function(
+                    "([selector, level]) => "
+                    "document.querySelectorAll(selector).length > level",
+                    arg=[selector, level],
+                    timeout=BUTTON_WAIT_TIMEOUT,
+                )
+            except playwright_timeout():
+                pass
         buttons = await page.query_selector_all(selector)
 
     if len(buttons) <= level:
@@ -78,31 +164,59 @@ async def find_buttons(page, selector, level):
     return buttons
 
 
+async def wait_for_field(
+    page: Page,
+    field: str,
+    selector: str,
+    timeout_ms: float = TIMEOUT,
+    label: Optional[str] = None,
+):
+    """
+    Wait for ``selector`` to be visible and record the outcome for ``field``
+    in ``selector_health``, under ``label`` instead of the selector if given.
+
+    Once the field's selectors keep missing, the wait gives up after a few
+    seconds instead of ``timeout_ms``.
+    """
+    try:
+        element = await page.wait_for_selector(
+            selector,
+            state="visible",
+            timeout=selector_health.timeout(field, timeout_ms),
+        )
+    except playwright_timeout():
+        selector_health.miss(field)
+        raise
+    selector_health.hit(field, label or selector)
+    return element
+
+
 async def select_option(page, button, value, level):
     """Select an option from the drop-down list."""
     try:
-        logging.info(f"Получение значения кнопки на уровне {level}.", exc_info=True)
+        logging.info(f"Получение значения кнопки на уровне {level}.")
         button_value = await button.get_attribute("value")
 
         if button_value and button_value.strip() == value.strip():
             logging.info(
                 f"Кнопка на уровне {level} уже содержит выбранное значение '{value}'. Пропускаем.",
-                exc_info=True,
             )
             return
 
-        logging.info(f"Нажимаем кнопку на уровне {level}.", exc_info=True)
+        logging.info(f"Нажимаем кнопку на уровне {level}.")
         await button.click()
 
         # We are waiting for the drop-down list to appear
-        await asyncio.sleep(1)
-        await page.wait_for_selector(
-            f'div[role="listbox"]:has-text("{value}")',
-            state="visible",
-            timeout=60000,
-        )
+        async with wait_stats.timed("dropdown"):
+            await wait_for_field(
+                page,
+                "variant.listbox",
+                f'div[role="listbox"]:has-text("{value}")',
+                DROPDOWN_WAIT_TIMEOUT,
+                label='div[role="listbox"]',
+            )
 
-        logging.info(f"Выбираем опцию '{value}' из выпадающего списка.", exc_info=True)
+        logging.info(f"Выбираем опцию '{value}' из выпадающего списка.")
         option = await page.query_selector(f'div[role="option"]:has-text("{value}")')
 
         if option is None:
@@ -110,9 +224,9 @@ async def select_option(page, button, value, level):
             raise ValueError(f"Опция '{value}' не найдена на уровне {level}.")
 
         await option.click()
-        logging.info(
-            f"Опция '{value}' успешно выбрана на уровне {level}.", exc_info=True
-        )
+        # Let the price and the next dropdown re-render for the new selection
+        await settle(page, "variant_select")
+        logging.info(f"Опция '{value}' успешно выбрана на уровне {level}.")
 
     except Exception as e:
         logging.error(
@@ -125,22 +239,25 @@ async def select_option(page, button, value, level):
 async def get_price(page):
     """Get the price of the product."""
     try:
-        logging.info("Получение цены товара.", exc_info=True)
-        price_element = page.locator(
-            'div[data-testid="x-price-primary"] span.ux-textspans'
-        )
-        await price_element.wait_for(state="visible", timeout=30000)
+        logging.info("Получение цены товара.")
+        async with wait_stats.timed("price"):
+            price_element = await wait_for_field(
+                page, "item.price", css_any(PRICE_SELECTORS), PRICE_WAIT_TIMEOUT
+            )
         price_text = await price_element.inner_text()
-        logging.info(f"Цена успешно получена: {price_text}", exc_info=True)
+        logging.info(f"Цена успешно получена: {price_text}")
         return price_text
     except Exception as e:
         logging.error(f"Ошибка при получении цены: {str(e)}", exc_info=True)
-        raise ValueError(f"Ошибка при получении цены: {str(e)}")
+        raise ScrapeFailure(
+            SELECTOR_MISSING, f"Ошибка при получении цены: {str(e)}"
+        ) from e
 
 
+@metrics.instrument("select_variant")
 async def select_variant(page, variants):
     """Select product variants."""
-    logging.info("Выбор вариантов товара.", exc_info=True)
+    logging.info("Выбор вариантов товара.")
     DROPDOWN_BUTTON_SELECTOR = "button.listbox-button__control"
 
     for i, value in enumerate(variants):
@@ -153,425 +270,1347 @@ async def select_variant(page, variants):
                 f"Ошибка при обработке варианта '{value}' на уровне {i + 1}: {str(e)}",
                 exc_info=True,
             )
-            raise ValueError(
-                f"Ошибка при обработке варианта '{value}' (уровень {i + 1}): {str(e)}"
-            )
+            raise ScrapeFailure(
+                VARIANT_MISMATCH,
+                f"Ошибка при обработке варианта '{value}' (уровень {i + 1}): {str(e)}",
+                variant=list(variants),
+                level=i + 1,
+            ) from e
 
     return await get_price(page)
 
 
-async def scroll_to_load(page: Page) -> None:
-    """Scroll the page to load all items."""
-    last_height = None
-    while True:
-        current_height = await page.evaluate("document.body.scrollHeight")
-        if last_height == current_height:
-            break
-        await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-        await asyncio.sleep(2)
-        last_height = current_height
-
-
-async def extract_text(element) -> str:
-    """Extract inner text from a Playwright element."""
-    return await element.inner_text() if element else "N/A"
-
-
-async def extract_image_urls(page: Page) -> List[str]:
-    """Extract up to 10 image URLs from a product page."""
-    images = await page.query_selector_all("button.ux-image-grid-item img")
-    image_urls = []
-    for img in images:
-        if img:
-            src = await img.get_attribute("src")
-            if src:
-                image_urls.append(src)
-    if len(image_urls) < 10:
-        image_urls.extend(["N/A"] * (10 - len(image_urls)))
-    return image_urls[:10]
-
-
-async def get_listbox_values(page: Page):
-    values = []
-    # Find all elements with class 'listbox__value'
-    value_elements = await page.query_selector_all(".listbox__value")
-
-    # Extract text from each element
-    for element in value_elements:
-        value_text = await element.inner_text()
-        if value_text:  # Only add non-empty values
-            values.append(value_text.strip())
+@metrics.instrument("scroll")
+async def scroll_to_load(
+    page: Page,
+    max_steps: int = SCROLL_MAX_STEPS,
+    budget_seconds: float = SCROLL_BUDGET_SECONDS,
+) -> None:
+    """
+    Scroll the page to load all items.
 
-    return values
+    After each scroll the page is given until its DOM goes quiet rather
+    than a fixed sleep. Scrolling stops once neither the page height nor the
+    number of result items changes, or when the step or time budget is spent.
+    """
+    deadline = time.monotonic() + budget_seconds
+    last_state = None
+    async with wait_stats.timed("scroll"):
+        for _ in range(max_steps):
+            current_state = await page.evaluate(
+                "selector => [document.body.scrollHeight,"
+                " document.querySelectorAll(selector).length]",
+                css_any(RESULT_ITEM_SELECTORS),
+            )
+            if last_state == current_state:
+                return
+            last_state = current_state
+            await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+            remaining_ms = int((deadline - time.monotonic()) * 1000)
+            if remaining_ms <= 0:
+                break
+            await settle(page, "scroll_settle", timeout_ms=min(remaining_ms, 5000))
+        logging.warning(f"Scroll budget exhausted on {page.url}")
 
 
 async def get_variant_values(item_page: Page):
     """Get product variants."""
-    logging.info("Получение вариантов товара.", exc_info=True)
+    logging.info("Получение вариантов товара.")
     try:
-        listbox_values = await item_page.query_selector_all(".listbox__value")
-        return [await element.inner_text() for element in listbox_values]
+        return await item_page.eval_on_selector_all(
+            LISTBOX_VALUE_SELECTOR, "elements => elements.map(e => e.innerText)"
+        )
     except Exception as e:
         logging.error(f"Ошибка при извлечении значений вариантов: {e}", exc_info=True)
         return []
 
 
-async def add_to_sheet(sheet: List[List[str]], product_data: Dict) -> None:
-    """Await docstring generation..."""
+async def add_to_sheet(sheet: List[List[str]], record: ProductRecord) -> None:
+    """Write a product record as one row of the output sink."""
     try:
-        sheet.append(
-            [
-                product_data["title"],
-                product_data["price"],
-                product_data["category"],
-            ]
-            + product_data.get("image_urls", [])
-            + [
-                product_data["item_url_href"],
-                product_data["seller_url"],
-                product_data.get("quantity", "N/A"),
-                product_data.get("brand", "N/A"),
-                product_data.get("condition", "N/A"),
-            ]
-        )
-    except KeyError as e:
-        logging.error(f"Отсутствует ключ в данных продукта: {e}", exc_info=True)
+        sheet.append(record.row())
     except Exception as e:
         logging.error(f"Ошибка при добавлении данных в лист: {e}", exc_info=True)
 
 
+async def get_variation_model_script(item_page: Page) -> Optional[str]:
+    """Text of the script holding eBay's MSKU variation model, if any."""
+    return await item_page.evaluate("""() => {
+            for (const script of document.scripts) {
+                if (script.textContent.includes('"MSKU":')) return script.textContent;
+            }
+            return null;
+        }""")
+
+
+async def add_variant_offers(sheet, listing: Listing, offers: List[dict]) -> None:
+    """Write one row per variant resolved from the variation model."""
+    for offer in offers:
+        record = ProductRecord(
+            listing,
+            offer["values"],
+            offer["price"],
+            "Out of stock" if offer["in_stock"] is False else None,
+        )
+        await add_to_sheet(sheet, record)
+
+
+@metrics.instrument("variants")
 async def process_variants(
-    item_page: Page, product_data: dict[str, tuple[str]], sheet: list
+    item_page: Page,
+    listing: Listing,
+    sheet: list,
+    max_combinations: int = MAX_VARIANT_COMBINATIONS,
+    variant_values: Optional[List[str]] = None,
 ):
-    """Processes product variants and writes the results to Excel."""
-    logging.info("Обработка вариантов товара.", exc_info=True)
+    """
+    Processes product variants and writes the results to the output sink.
+
+    Prices and stock come from the page's variation model in one pass; the
+    dropdowns are only clicked through when the model is missing. Either
+    way at most ``max_combinations`` variants are written per listing.
+    ``variant_values`` skips reading the dropdown values when they were
+    already extracted with the rest of the page.
+    """
+    logging.info("Обработка вариантов товара.")
     try:
-        variant_values = await get_variant_values(item_page)
+        if variant_values is None:
+            variant_values = await get_variant_values(item_page)
         variant_values = await split_list_by_delimiter(variant_values, "Select")
         if variant_values:
-            for combo in itertools.product(*variant_values):
-                variant_data = product_data.copy()
-                variant_data["title"] = f"{product_data['title']} : {combo}"
-                pattern = r"\bto\b"  # r"\$\d+\.\d+\s+to\s+\$\d+\.\d+"
-                if re.findall(pattern, variant_data["price"][0]):
-                    price_variant = await select_variant(item_page, combo)
-                    if price_variant:
-                        variant_data["price"] = price_variant
-
-                await add_to_sheet(sheet, variant_data)
-                logging.info(
-                    f"Вариант {variant_data['title']} обработан.", exc_info=True
+            script = await get_variation_model_script(item_page)
+            offers = await asyncio.to_thread(
+                variant_offers_from_html, script or "", max_combinations
+            )
+            if offers:
+                await add_variant_offers(sheet, listing, offers)
+                return
+
+            needs_selection = is_price_range(listing.price)
+            combos = itertools.product(*variant_values)
+            written, failed = 0, []
+            for combo in itertools.islice(combos, max_combinations):
+                record = ProductRecord(listing, combo)
+                if needs_selection:
+                    try:
+                        record.price = await select_variant(item_page, combo) or None
+                    except ScrapeFailure as e:
+                        # Sold out or disabled combinations cannot be selected;
+                        # the others are still worth writing
+                        if e.category != VARIANT_MISMATCH:
+                            raise
+                        failed.append(list(combo))
+                        continue
+
+                await add_to_sheet(sheet, record)
+                written += 1
+                logging.info(f"Вариант {combo} обработан.")
+            if failed:
+                raise ScrapeFailure(
+                    VARIANT_MISMATCH,
+                    f"{len(failed)} of {len(failed) + written} variant "
+                    "combinations could not be selected",
+                    variants=failed,
+                    partial=written > 0,
                 )
         else:
-            await add_to_sheet(sheet, product_data)
+            await add_to_sheet(sheet, ProductRecord(listing))
 
     except Exception as e:
         logging.error(f"Ошибка при обработке вариантов: {e}", exc_info=True)
+        raise
 
 
 async def process_product_variants(
-    item_page: Page, product_data: dict, sheet: List[str]
+    item_page: Page,
+    listing: Listing,
+    sheet: List[str],
+    variant_values: Optional[List[str]] = None,
+    max_combinations: int = MAX_VARIANT_COMBINATIONS,
 ):
     """
-    Processes product variants and writes results to Excel.
+    Processes product variants and writes results to the output sink.
 
 
     Args:
         item_page (playwright.Page): Playwright page object for the product
-        product_data (dict): Dictionary containing product details (title, category, etc.)
-        sheet (Workbook): Openpyxl workbook object for writing data
+        listing (Listing): Listing details (title, category, etc.)
+        sheet (RowSink): Output sink for writing data
+        variant_values (list): Dropdown values if already extracted
+        max_combinations (int): Variant rows written at most
     """
 
+    await process_variants(
+        item_page, listing, sheet, max_combinations, variant_values=variant_values
+    )
+
+
+async def scrape_item_over_http(
+    fetcher: HttpItemFetcher,
+    title: str,
+    price: str,
+    item_url_href: str,
+    seller_url: str,
+    sheet: list,
+    max_combinations: int = MAX_VARIANT_COMBINATIONS,
+) -> bool:
+    """
+    Scrapes an item page without a browser.
+
+    Returns False when the listing has to be rendered instead: the fetch
+    failed, the HTML cannot be parsed or shows none of the listing details,
+    or the listing has variants and a price range but no variation model,
+    so only ``select_variant`` can resolve the prices.
+    """
+    html = await fetcher.fetch(item_url_href)
+    if html is None:
+        return False
+
+    # Parsing a full item page takes long enough to stall other tasks
     try:
-        await process_variants(item_page, product_data, sheet)
-    except Exception as e:
-        logging.error(f"Ошибка при обработке вариантов продукта: {e}", exc_info=True)
-    finally:
-        await item_page.close()
+        details = await asyncio.to_thread(parse_item_html, html)
+    except ValueError as e:
+        logging.debug(f"Could not parse the HTML of {item_url_href}, rendering: {e}")
+        return False
+    if missing_item_details(details):
+        logging.info(f"No listing details in the HTML, rendering: {item_url_href}")
+        return False
+    variant_values = await split_list_by_delimiter(details["variant_values"], "Select")
+    offers = (
+        await asyncio.to_thread(variant_offers_from_html, html, max_combinations)
+        if variant_values
+        else []
+    )
+    if variant_values and not offers and is_price_range(price):
+        logging.info(f"Variant prices need a browser, falling back: {item_url_href}")
+        return False
+
+    listing = make_listing(title, price, item_url_href, seller_url, details)
+    if not variant_values:
+        await add_to_sheet(sheet, ProductRecord(listing))
+        return True
+    if offers:
+        await add_variant_offers(sheet, listing, offers)
+        return True
+
+    combos = itertools.product(*variant_values)
+    for combo in itertools.islice(combos, max_combinations):
+        await add_to_sheet(sheet, ProductRecord(listing, combo))
+    return True
+
+
+def make_listing(
+    title: str, price: str, item_url_href: str, seller_url: str, details: Dict
+) -> Listing:
+    """Listing from its search card fields and extracted item page details."""
+    return Listing(
+        title=title or "N/A",
+        price=price or "N/A",
+        category=details["category"],
+        image_urls=tuple(details["image_urls"]),
+        item_url=item_url_href,
+        seller_url=seller_url,
+        quantity=details["quantity"],
+        brand=details["brand"],
+        condition=details["condition"],
+    )
 
 
-async def get_product_data(
-    browser: Browser, page: Page, seller_url: str, sheet: list
+@metrics.instrument("item_page")
+async def scrape_item(
+    browser: Browser,
+    title: str,
+    price: str,
+    item_url_href: str,
+    seller_url: str,
+    sheet: list,
+    fetcher: Optional[HttpItemFetcher] = None,
+    pool: Optional[BrowserPool] = None,
+    limiter: Optional[AdaptiveLimiter] = None,
+    max_combinations: int = MAX_VARIANT_COMBINATIONS,
 ) -> None:
     """
-    Extracts product data from a product page.
+    Scrapes an item page from its URL and search card data.
 
     Args:
         browser: Browser instance
-        page: Page instance
+        title: Title from the search result card
+        price: Price from the search result card
+        item_url_href: URL of the item page
         seller_url: URL of the seller
-        sheet: List to store product data
+        sheet: Output sink for product rows
+        fetcher: Optional HTTP fetcher; when given the item page is parsed
+            without a browser unless the listing needs JavaScript
+        pool: Optional pool to borrow the item page from instead of opening
+            a new context
+        limiter: Optional adaptive limiter fed with the navigation outcome
+        max_combinations: Variant rows written for the listing at most
 
     Raises:
-        Exception: If critical errors occur during data extraction
+        ScrapeFailure: The listing was removed, its page shows none of the
+            listing details, or a variant could not be selected
+        Exception: If the item page cannot be loaded
     """
-    try:
-        logging.info("Extracting product data")
-
-        # Get item URL with error handling
-        try:
-            item_url = await page.query_selector("a.s-item__link")
-            item_url_href = await item_url.get_attribute("href") if item_url else "N/A"
-            if item_url_href == "N/A":
-                logging.warning("Could not find item URL")
-                return
-        except Exception as e:
-            logging.error(f"Error getting item URL: {str(e)}")
-            return
-
-        # Extract basic product information
-        try:
-            title = (await extract_text(await page.query_selector(".s-item__title")),)
-            price = (
-                await extract_text(await page.query_selector("span.s-item__price")),
-            )
-        except Exception as e:
-            logging.error(f"Error extracting basic product info: {str(e)}")
-            return
-
-        # Create new context and page
-        try:
-            context = await browser.new_context(locale="en-US")
-            new_page = await context.new_page()
-            await new_page.goto(item_url_href, wait_until="domcontentloaded")
-        except Exception as e:
-            logging.error(f"Error navigating to product page: {str(e)}")
-            await context.close()
-            return
-
-        try:
-            # Extract detailed product information
-            category = await extract_text(
-                await new_page.query_selector("ul li a.seo-breadcrumb-text span")
-            )
-            image_urls = await extract_image_urls(new_page)
-            quantity = await extract_text(
-                await new_page.query_selector(
-                    "#qtyAvailability .ux-textspans--SECONDARY"
-                )
-            )
-            condition = await extract_text(
-                await new_page.query_selector(".x-item-condition-text .ux-textspans")
-            )
-            brand = await extract_text(
-                await new_page.query_selector(
-                    "dl[data-testid='ux-labels-values'].ux-labels-values--brand dd span.ux-textspans"
-                )
-            )
-
-            product_data = {
-                "title": title or "N/A",
-                "price": price or "N/A",
-                "category": category or "N/A",
-                "image_urls": image_urls or [],
-                "item_url_href": item_url_href,
-                "seller_url": seller_url,
-                "quantity": quantity or "N/A",
-                "brand": brand or "N/A",
-                "condition": condition or "N/A",
-            }
-
-            await process_product_variants(new_page, product_data, sheet)
-
-        except Exception as e:
-            logging.error(f"Error extracting detailed product info: {str(e)}")
-
-        finally:
-            # Ensure the new page and context are closed
-            try:
-                await new_page.close()
-                await context.close()
-            except Exception as e:
-                logging.error(f"Error closing browser context: {str(e)}")
-
-    except Exception as e:
-        logging.error(f"Critical error in get_product_data: {str(e)}", exc_info=True)
-        raise
-
-
-async def process_products_in_batches(
-    browser: Browser, items, seller_urls: str, sheet: List[str]
-) -> None:
-    """Processes products in batches."""
-    logging.info("Обработка продуктов в пакетах...")
-    semaphore = asyncio.Semaphore(CONCURRENT_TASK_LIMIT)
+    if fetcher is not None and await scrape_item_over_http(
+        fetcher, title, price, item_url_href, seller_url, sheet, max_combinations
+    ):
+        return
+
+    async with borrow_page(browser, pool, locale="en-US") as new_page:
+        response = await navigate(
+            new_page, item_url_href, limiter, wait_until="domcontentloaded"
+        )
 
-    async def process_with_semaphore(browser, item, seller_urls, sheet):
-        async with semaphore:
-            await get_product_data(browser, item, seller_urls, sheet)
+        # Extract detailed product information in a single round-trip
+        details = await extract_from_page(new_page, ITEM_PAGE_SCHEMA)
+        await check_item_page(new_page, response, item_url_href, details)
 
-    tasks = [
-        process_with_semaphore(browser, item, seller_urls, sheet) for item in items
-    ]
-    await asyncio.gather(*tasks)
-    logging.info("Обработка продуктов в пакетах завершена.")
+        listing = make_listing(title, price, item_url_href, seller_url, details)
+        await process_product_variants(
+            new_page, listing, sheet, details["variant_values"], max_combinations
+        )
 
 
-async def safe_goto(page: Page, url, retries=3):
+async def check_item_page(page: Page, response, url: str, details: Dict) -> None:
     """
-    Safely navigates to a URL, handling network errors.
-
-    :param page: Playwright page object
-    :param url: URL to navigate to
-    :param retries: Number of retries for network errors
-    :return: None
+    Raise a ``ScrapeFailure`` when the item page does not show a listing,
+    instead of writing a row of "N/A".
     """
-    logging.info(f"Navigating to {url}", exc_info=True)
-    for attempt in range(retries):
-        try:
-            await page.goto(url, wait_until="domcontentloaded", timeout=60000)
-            logging.info(f"Successfully navigated to {url}")
-            return  # Exit if successful
-        except playwright._impl._errors.Error as e:
-            if "net::ERR_NETWORK_CHANGED" in str(e):
-                logging.error(
-                    f"Network error encountered. Retry {attempt + 1} of {retries}",
-                    exc_info=True,
-                )
-                await asyncio.sleep(3)  # Wait before retrying
-            else:
-                logging.error(
-                    f"Unexpected error navigating to {url}: {e}", exc_info=True
-                )
-                raise  # Rethrow non-network errors
-    logging.error(
-        f"Failed to navigate to {url} after {retries} attempts", exc_info=True
+    if response is not None and response.status in REMOVED_STATUSES:
+        raise ScrapeFailure(
+            REMOVED_LISTING, f"HTTP {response.status} for {url}", status=response.status
+        )
+    if not missing_item_details(details):
+        return
+    if await page.evaluate(
+        "markers => markers.some(m => document.body.innerText.includes(m))",
+        list(REMOVED_LISTING_MARKERS),
+    ):
+        raise ScrapeFailure(REMOVED_LISTING, f"Listing removed: {url}")
+    raise ScrapeFailure(
+        SELECTOR_MISSING, f"No listing details on {page.url}", final_url=page.url
     )
-    raise RuntimeError(f"Failed to load {url} after {retries} attempts")
 
 
-async def parse_ebay_seller(seller_url: str, output_file: Optional[str] = None) -> None:
+async def parse_ebay_seller(
+    seller_url: str,
+    output_file: Optional[str] = None,
+    settings: Optional[ScraperConfig] = None,
+    browser: Optional[Browser | BrowserSupervisor] = None,
+    resource_blocker: Optional[ResourceBlocker] = None,
+    **options,
+) -> Dict:
     """
-    Scrapes product data from an eBay seller's page and saves it to an Excel file.
+    Scrapes product data from an eBay seller's page and streams it to a file.
 
     Args:
         seller_url: URL of the eBay seller's page
         output_file: Optional custom output file path. If None, generates timestamped filename.
+        settings: Run options, see ``ScraperConfig``. Defaults to its defaults.
+        browser: Optional running browser or ``BrowserSupervisor`` to reuse,
+            e.g. across the sellers of a batch. It is left open; without it a
+            supervised browser is launched for this run and closed after it.
+            Pages and listings that were in flight when a supervised browser
+            was restarted are requeued.
+        resource_blocker: Allow/deny rules applied to every browser context.
+            Defaults to blocking images, fonts, media and known trackers.
+        **options: ``ScraperConfig`` fields overriding ``settings``, e.g.
+            ``concurrency=8`` or ``engine="http"``.
+
+    Returns:
+        The run report: seller URL, output file, status, rows written, pages
+        visited, listings expected against those collected, failed listings
+        by category, and per-stage counts, latency histograms, retries and
+        failures
 
     Raises:
-        PlaywrightTimeout: When page loading times out
-        ValueError: When invalid seller URL provided
+        RuntimeError: When the seller's first results page cannot be loaded
+        ValueError: When invalid seller URL or options are provided
     """
     if not seller_url or not seller_url.startswith(("http://", "https://")):
         raise ValueError("Invalid seller URL provided")
+    settings = replace(settings or ScraperConfig(), **options)
 
     output_file = (
         output_file
-        or f"ebay_seller_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+        or f"ebay_seller_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        f".{settings.output_format or 'xlsx'}"
     )
+    output_format = sink_format(output_file, settings.output_format)
+    if settings.state_file and not SINKS[output_format].appendable:
+        raise ValueError(
+            f"A resumable crawl cannot append to {output_format} output; "
+            "use csv or jsonl with state_file"
+        )
+
+    resource_blocker = resource_blocker or ResourceBlocker()
 
     logging.info("Starting eBay seller scraping...")
+    wait_stats.reset()
+    metrics.reset()
+    selector_health.reset(settings.selector_fail_fast_after)
+    limiter = AdaptiveLimiter(
+        settings.concurrency,
+        max_limit=settings.max_concurrency,
+        host_rate=settings.host_rate,
+    )
+    started = time.monotonic()
+    report = {
+        "seller_url": seller_url,
+        "output_file": output_file,
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "status": "failed",
+        "rows": 0,
+        "pages": 0,
+    }
+    supervisor = browser if isinstance(browser, BrowserSupervisor) else None
 
     try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(
-                headless=True,
-                args=[
-                    "--disable-dev-shm-usage"
-                ],  # Helps prevent crashes in containerized environments
-            )
+        async with AsyncExitStack() as stack:
+            if browser is None:
+                p = await stack.enter_async_context(async_playwright())
+                supervisor = await stack.enter_async_context(
+                    BrowserSupervisor(
+                        p,
+                        launch_browser,
+                        max_navigations=settings.browser_max_navigations,
+                        max_memory_mb=settings.browser_max_memory_mb,
+                    )
+                )
+                browser = supervisor
 
-            context = await browser.new_context(
-                viewport={"width": 1920, "height": 1080},
-                locale="en-US",
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+            cache = (
+                ResponseCache(
+                    settings.cache_dir,
+                    max_bytes=settings.cache_max_bytes,
+                    replay_only=settings.replay_only,
+                )
+                if settings.cache_dir
+                else None
+            )
+            # Open the output early to avoid processing if file operations fail
+            columns = OUTPUT_COLUMNS
+            if settings.index_file:
+                columns = OUTPUT_COLUMNS + [LISTING_STATUS_COLUMN]
+            sheet = open_sink(
+                output_file,
+                columns,
+                output_format,
+                settings.batch_size,
+                append=settings.state_file is not None,
+                numeric_columns=NUMERIC_COLUMNS,
+            )
+            state = (
+                CrawlStateStore(settings.state_file, seller_url)
+                if settings.state_file
+                else None
+            )
+            index = (
+                ListingIndex(settings.index_file, seller_url)
+                if settings.index_file
+                else None
+            )
+            dead_letters = DeadLetterFile(
+                settings.dead_letter_file or dead_letter_path(output_file),
+                seller_url,
+                append=settings.state_file is not None,
+            )
+            queue = (
+                open_work_queue(settings.work_queue, seller_url)
+                if settings.work_queue
+                else None
             )
-
-            page = await context.new_page()
-            page.set_default_timeout(TIMEOUT)
-
-            # Initialize workbook early to avoid processing if file operations fail
-            workbook = Workbook()
-            sheet = workbook.active
-            sheet.title = "eBay Seller Data"
-            sheet.append(TITLE_TABLES)
 
             try:
-                await retry_with_backoff(page.goto, seller_url)
-                await scroll_to_load(page)
-
-                # Get pagination links first
-                pagination_links = await get_pagination_links(page)
-                logging.info(f"Found {len(pagination_links)} pagination links")
-
-                # Process remaining pages
-                for link in pagination_links:
-                    for attempt in range(MAX_RETRIES):
-                        try:
-                            await process_pagination_page(browser, link, sheet)
-                            break
-                        except Exception as e:
-                            if attempt == MAX_RETRIES - 1:
-                                logging.error(
-                                    f"Failed to process page {link} after {MAX_RETRIES} attempts: {e}"
-                                )
-                            await asyncio.sleep(2**attempt)  # Exponential backoff
-
-                workbook.save(output_file)
+                fetcher = (
+                    HttpItemFetcher(limiter.max_limit, TIMEOUT / 1000, limiter, cache)
+                    if settings.engine == "http"
+                    else None
+                )
+                scheduler = CrawlScheduler(
+                    browser,
+                    sheet,
+                    settings.concurrency,
+                    fetcher,
+                    resource_blocker,
+                    state,
+                    index,
+                    limiter,
+                    cache,
+                    dead_letters=dead_letters,
+                    work_queue=queue,
+                    max_variant_combinations=settings.max_variant_combinations,
+                )
+                try:
+                    if state is not None:
+                        await scheduler.resume()
+                    # The first page schedules the others, and without it
+                    # there is nothing to crawl
+                    first_page = result_page_url(seller_url, 1)
+                    if not await scheduler.crawl_from(first_page):
+                        raise RuntimeError(f"Could not load {first_page}")
+                    # Workers may share the crawl from here on; its rows are
+                    # written once every task of the queue is finished
+                    if queue is not None and await queue.counts():
+                        await scheduler.work()
+                    await scheduler.join()
+                    if queue is not None:
+                        async for rows in queue.rows():
+                            await scheduler.write_rows(rows)
+                    if index is not None:
+                        await scheduler.report_removed_listings()
+                finally:
+                    report["pages"] = len(scheduler.seen_links)
+                    report["listings"] = await scheduler.listing_coverage()
+                    report["pools"] = {
+                        "page": scheduler.page_pool.stats(),
+                        "item": scheduler.item_pool.stats(),
+                    }
+                    report["pipeline"] = scheduler.pipeline_stats()
+                    if queue is not None:
+                        report["work_queue"] = await work_queue_report(scheduler)
+                    await scheduler.close()
+                    if fetcher is not None:
+                        await fetcher.close()
+
+                sheet.close()
+                await scheduler.mark_flushed()
                 logging.info(f"Data successfully saved to {output_file}")
+                report["status"] = "ok"
+                return report
 
-            except TimeoutError:
-                logging.error("Page load timed out")
-                raise
             finally:
-                await context.close()
-                await browser.close()
+                # Keeps the rows scraped so far when the crawl fails midway
+                sheet.close()
+                report["rows"] = sheet.rows_written
+                report["blocked_resources"] = resource_blocker.stats()
+                resource_blocker.log_stats()
+                if cache is not None:
+                    report["cache"] = cache.stats()
+                    cache.log_stats()
+                    cache.close()
+                logging.info(f"Wait time per stage: {wait_stats.report()}")
+                if state is not None:
+                    report["crawl_state"] = await state.counts()
+                    logging.info(f"Crawl state: {report['crawl_state']}")
+                    state.close()
+                if index is not None:
+                    index.close()
+                if queue is not None:
+                    queue.close()
+                report["failures"] = dead_letters.stats()
+                dead_letters.close()
 
     except Exception as e:
+        report["error"] = f"{type(e).__name__}: {e}"
         logging.critical(f"An unexpected error occurred: {e}", exc_info=True)
         raise
+    finally:
+        report["duration_s"] = round(time.monotonic() - started, 3)
+        report["stages"] = metrics.report()
+        report["waits"] = wait_stats.report()
+        report["concurrency"] = limiter.stats()
+        report["selectors"] = selector_health.report()
+        failing = [
+            name for name, stats in report["selectors"].items() if stats["failing"]
+        ]
+        if failing:
+            logging.warning(f"Selectors failing at the end of the run: {failing}")
+        if supervisor is not None:
+            report["browser"] = supervisor.stats()
+        logging.info(f"Concurrency: {report['concurrency']}")
+        logging.info(
+            "Time per stage: "
+            + ", ".join(
+                f"{stage} {stats['count']}x {stats['total_s']}s"
+                for stage, stats in report["stages"].items()
+            )
+        )
+        try:
+            write_run_report(report, settings.report_file, settings.metrics_file)
+        except OSError as e:
+            logging.error(f"Could not write the run report: {e}")
+
+
+async def work_queue_report(scheduler: CrawlScheduler) -> Dict:
+    """This process's share of a work queue crawl and the queue's counts."""
+    report = {
+        "worker": scheduler.worker,
+        "tasks": scheduler.task_outcomes,
+        "queue": await scheduler.work_queue.counts(),
+    }
+    logging.info(f"Work queue: {report}")
+    return report
+
+
+async def work_on_queue(
+    seller_url: str,
+    settings: Optional[ScraperConfig] = None,
+    browser: Optional[Browser | BrowserSupervisor] = None,
+    resource_blocker: Optional[ResourceBlocker] = None,
+    idle_timeout: Optional[float] = IDLE_TIMEOUT,
+    **options,
+) -> Dict:
+    """
+    Work on a seller crawl that ``parse_ebay_seller`` shares through the
+    work queue ``settings.work_queue``, e.g. from another host.
+
+    Pages and listings are leased from the queue and the rows of each
+    listing stored with its task; the coordinating ``parse_ebay_seller``
+    writes the output file. Listings that fail go to
+    ``settings.dead_letter_file``, if set, as well as being recorded in the
+    queue. Returns once the queue is drained, or after ``idle_timeout``
+    seconds without anything to lease.
+
+    Returns:
+        The run report: worker id, tasks done, failed and lost by this
+        worker, the queue's counts, and per-stage metrics
+    """
+    settings = replace(settings or ScraperConfig(), **options)
+    if not settings.work_queue:
+        raise ValueError("No work queue given to work on")
+    resource_blocker = resource_blocker or ResourceBlocker()
+
+    metrics.reset()
+    selector_health.reset(settings.selector_fail_fast_after)
+    limiter = AdaptiveLimiter(
+        settings.concurrency,
+        max_limit=settings.max_concurrency,
+        host_rate=settings.host_rate,
+    )
+    started = time.monotonic()
+    report = {
+        "seller_url": seller_url,
+        "work_queue": settings.work_queue,
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "status": "failed",
+    }
+    try:
+        async with AsyncExitStack() as stack:
+            if browser is None:
+                p = await stack.enter_async_context(async_playwright())
+                browser = await stack.enter_async_context(
+                    BrowserSupervisor(
+                        p,
+                        launch_browser,
+                        max_navigations=settings.browser_max_navigations,
+                        max_memory_mb=settings.browser_max_memory_mb,
+                    )
+                )
+            cache = (
+                ResponseCache(
+                    settings.cache_dir,
+                    max_bytes=settings.cache_max_bytes,
+                    replay_only=settings.replay_only,
+                )
+                if settings.cache_dir
+                else None
+            )
+            if cache is not None:
+                stack.callback(cache.close)
+            queue = open_work_queue(settings.work_queue, seller_url)
+            stack.callback(queue.close)
+            dead_letters = (
+                DeadLetterFile(settings.dead_letter_file, seller_url, append=True)
+                if settings.dead_letter_file
+                else None
+            )
+            if dead_letters is not None:
+                stack.callback(dead_letters.close)
+            fetcher = (
+                HttpItemFetcher(limiter.max_limit, TIMEOUT / 1000, limiter, cache)
+                if settings.engine == "http"
+                else None
+            )
+            if fetcher is not None:
+                stack.push_async_callback(fetcher.close)
+            scheduler = CrawlScheduler(
+                browser,
+                None,
+                settings.concurrency,
+                fetcher,
+                resource_blocker,
+                limiter=limiter,
+                cache=cache,
+                dead_letters=dead_letters,
+                work_queue=queue,
+                max_variant_combinations=settings.max_variant_combinations,
+            )
+            try:
+                await scheduler.work(idle_timeout)
+                await scheduler.join()
+            finally:
+                report.update(await work_queue_report(scheduler))
+                report["pipeline"] = scheduler.pipeline_stats()
+                await scheduler.close()
+            if dead_letters is not None:
+                report["failures"] = dead_letters.stats()
+        report["status"] = "ok"
+        return report
+    except Exception as e:
+        report["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        report["duration_s"] = round(time.monotonic() - started, 3)
+        report["stages"] = metrics.report()
+        report["concurrency"] = limiter.stats()
+        report["selectors"] = selector_health.report()
+        try:
+            write_run_report(report, settings.report_file, settings.metrics_file)
+        except OSError as e:
+            logging.error(f"Could not write the run report: {e}")
+
+
+async def launch_browser(playwright) -> Browser:
+    """Launch the headless Chromium used for scraping."""
+    return await playwright.chromium.launch(
+        headless=True,
+        args=[
+            "--disable-dev-shm-usage"
+        ],  # Helps prevent crashes in containerized environments
+    )
 
 
-async def retry_with_backoff(func, *args, **kwargs):
-    """Retry a function with exponential backoff."""
-    for attempt in range(MAX_RETRIES):
-        try:
-            return await func(*args, **kwargs)
-        except Exception as e:
-            logging.error(f"Attempt {attempt + 1} failed: {e}", exc_info=True)
-            if attempt == MAX_RETRIES - 1:
-                logging.error("All retry attempts exhausted")
-                raise
-            await asyncio.sleep(2**attempt)
+async def read_search_cards(page: Page) -> List[Dict[str, str]]:
+    """Card data of every result on the page, read in a single evaluate call."""
+    await wait_for_field(page, "card.results", css_any(RESULTS_LIST_SELECTORS))
+    return await extract_from_page(page, SEARCH_CARD_SCHEMA, RESULT_ITEM_SELECTORS)
 
 
-async def get_pagination_links(page) -> List[str]:
-    """Extract pagination links with error handling."""
-    try:
-        links = await page.eval_on_selector_all(
-            ".pagination__items a.pagination__item",
-            "elements => elements.map(e => e.href)",
+async def read_result_count(page: Page) -> Optional[ResultCount]:
+    """Number of listings the results page says the search has."""
+    for selector in RESULT_COUNT_SELECTORS:
+        element = await page.query_selector(selector)
+        if element is None:
+            continue
+        count = parse_result_count(await element.text_content())
+        if count is not None:
+            selector_health.hit("card.count", selector)
+            return count
+    selector_health.miss("card.count", optional=True)
+    return None
+
+
+@metrics.instrument("results_page")
+async def process_pagination_page(link: str, scheduler: CrawlScheduler) -> None:
+    """Process a single pagination page.
+
+    The results page is borrowed from the scheduler's page pool and the page
+    load holds one slot of the shared budget. The page goes back to
+    the pool as soon as its cards and result count are read; the scheduler
+    then decides which pages follow, and the cards are queued for its item
+    stage, waiting while that queue is full.
+    """
+    async with scheduler.page_pool.page() as page:
+        async with scheduler.limiter:
+            await navigate(page, link, scheduler.limiter, wait_until="domcontentloaded")
+            await scroll_to_load(page)
+            cards = await read_search_cards(page)
+            expected = await read_result_count(page)
+
+    new_listings = sum(
+        card["item_url_href"] not in scheduler.queued_items for card in cards
+    )
+    await scheduler.schedule_next_pages(link, len(cards), new_listings, expected)
+    for card in cards:
+        await scheduler.submit(card, link)
+
+
+@dataclass
+class ItemJob:
+    """A discovered listing on its way through the item and output stages."""
+
+    card: Dict[str, str]
+    page_url: str
+    rows: List[list] = field(default_factory=list)
+    listing_status: Optional[str] = None
+    fingerprint: Optional[str] = None
+    error: Optional[str] = None
+    category: Optional[str] = None  # See ``failures.classify``
+    context: Dict = field(default_factory=dict)
+    task: Optional[Task] = None  # Lease of the listing in work queue mode
+
+    def append(self, row) -> None:
+        """Collect an output row; lets the job stand in for the sink."""
+        self.rows.append(list(row))
+
+
+class CrawlScheduler:
+    """
+    Runs the crawl as a pipeline under one adaptive concurrency budget.
+
+    Pagination tasks discover listings and queue their card data; item
+    workers scrape the item pages and resolve variants; a single writer
+    appends the rows and records each listing as done. The queues between
+    the stages are bounded, so discovery pauses when item scraping falls
+    behind. With a ``BrowserSupervisor`` as ``browser``, pages and listings
+    whose browser was restarted under them run again without using up their
+    retries.
+
+    Result pages are addressed by their page number at the largest page
+    size, rather than through the window of links eBay's pager renders, so
+    every page is loaded once; see ``schedule_next_pages``.
+
+    With a ``work_queue`` the pages and listings discovered go onto the
+    queue instead, and ``work`` runs whatever this process leases from it,
+    storing each listing's rows with its task rather than in ``sheet``.
+    """
+
+    def __init__(
+        self,
+        browser: Browser,
+        sheet,
+        concurrency: int = CONCURRENT_TASK_LIMIT,
+        fetcher: Optional[HttpItemFetcher] = None,
+        resource_blocker: Optional[ResourceBlocker] = None,
+        state: Optional[CrawlStateStore] = None,
+        index: Optional[ListingIndex] = None,
+        limiter: Optional[AdaptiveLimiter] = None,
+        cache: Optional[ResponseCache] = None,
+        item_workers: Optional[int] = None,
+        queue_size: int = ITEM_QUEUE_SIZE,
+        dead_letters: Optional[DeadLetterFile] = None,
+        page_timeout: Optional[float] = None,
+        work_queue: Optional[WorkQueue] = None,
+        max_variant_combinations: int = MAX_VARIANT_COMBINATIONS,
+    ):
+        self.browser = browser
+        self.sheet = sheet
+        self.fetcher = fetcher
+        self.resource_blocker = resource_blocker
+        self.state = state
+        self.index = index
+        self.cache = cache
+        self.dead_letters = dead_letters
+        self.page_timeout = page_timeout
+        self.work_queue = work_queue
+        self.max_variant_combinations = max_variant_combinations
+        self.worker = worker_id()
+        self.leases: Dict[str, Task] = {}  # Lease token -> task being worked on
+        self.task_outcomes: Dict[str, int] = {}
+        self.supervisor = browser if isinstance(browser, BrowserSupervisor) else None
+        self.limiter = limiter or AdaptiveLimiter(concurrency)
+        # Results pages use the desktop viewport and are returned as soon as
+        # their cards are read; item pages keep their own pool. Both are sized
+        # for the highest limit, contexts are only created when needed.
+        self.page_pool = BrowserPool(
+            browser,
+            self.limiter.max_limit,
+            setup_context=self.setup_context,
+            **BROWSER_CONTEXT_OPTIONS,
         )
-        return list(dict.fromkeys(links))  # Remove duplicates while preserving order
-    except Exception as e:
-        logging.warning(f"Error extracting pagination links: {e}")
-        return []
+        self.item_pool = BrowserPool(
+            browser,
+            self.limiter.max_limit,
+            setup_context=self.setup_context,
+            locale="en-US",
+        )
+        self.seen_links: set = set()
+        self.page_size: Optional[int] = None  # Cards eBay served on page 1
+        self.expected_listings: Optional[int] = None
+        self.expected_exact = True  # False when page 1 gave a lower bound
+        self.listings_written = 0
+        self.listings_failed = 0
+        self.rows_appended = 0
+        # (rows appended up to the listing's last row, URL) of listings whose
+        # rows may still sit in the sink's buffer
+        self.unflushed: deque = deque()
+        self.skipped_links: set = set()
+        self.failed_links: set = set()
+        self.tasks: set = set()
+        self.queued_items: set = set()
+        # Item workers beyond the current limit wait on the limiter, so the
+        # adaptive limit decides how many item pages are open at once.
+        self.items = Stage(
+            "item",
+            self.scrape_listing,
+            item_workers or self.limiter.max_limit,
+            queue_size,
+        ).start()
+        self.output = Stage("output", self.write_listing, 1, OUTPUT_QUEUE_SIZE).start()
+
+    async def setup_context(self, context) -> None:
+        """Prepare every pooled context before its page is opened."""
+        if self.page_timeout is not None:
+            context.set_default_timeout(self.page_timeout)
+        if self.cache is not None:
+            await self.cache.apply(context)
+        if self.resource_blocker is not None:
+            await self.resource_blocker.apply(context)
+
+    async def schedule_pages(self, links: List[str]) -> None:
+        """Start a task for every pagination link not seen before.
+
+        New links are recorded as pending first, so a resumed crawl still
+        knows about pages discovered on pages that already completed.
+        """
+        for link in links:
+            if link in self.seen_links:
+                continue
+            self.seen_links.add(link)
+            if self.work_queue is not None:
+                await self.work_queue.put(PAGE, link, self.page_plan())
+                continue
+            if self.state is not None:
+                await self.state.mark_page(link, PENDING)
+            self.start_task(self.run_page(link))
+
+    def page_plan(self) -> Dict:
+        """What the first results page told about the others, handed to
+        the workers that lease them from the work queue."""
+        return {
+            "page_size": self.page_size,
+            "expected": self.expected_listings,
+            "exact": self.expected_exact,
+        }
+
+    def adopt_page_plan(self, plan: Dict) -> None:
+        """Take over ``page_plan`` of the coordinator, which ran page 1."""
+        if self.page_size is None:
+            self.page_size = plan.get("page_size")
+        if self.expected_listings is None and plan.get("expected") is not None:
+            self.expected_listings = plan["expected"]
+            self.expected_exact = plan.get("exact", True)
+
+    async def crawl_from(self, first_page: str) -> bool:
+        """Run the first result page, which schedules the others; whether
+        it could be loaded."""
+        self.seen_links.add(first_page)
+        if self.state is not None:
+            await self.state.mark_page(first_page, PENDING)
+        await self.run_page(first_page)
+        return first_page not in self.failed_links
+
+    async def schedule_next_pages(
+        self,
+        link: str,
+        cards: int,
+        new_listings: int,
+        expected: Optional[ResultCount],
+    ) -> None:
+        """
+        Schedule the result pages after ``link``, addressed by page number.
+
+        The first page tells how many cards eBay serves per page and, from
+        its result count, how many listings to expect, so every other page
+        is scheduled at once. Without a count, or with a capped one like
+        "50,000+ results" that is only a lower bound, pages are walked one
+        after another while they come back as full as the first page and
+        show listings not seen before. Workers of a work queue get the first
+        page's findings with each page task, see ``page_plan``.
+        """
+        number = page_number(link)
+        if number == 1:
+            self.page_size = cards
+            if expected is not None:
+                self.expected_listings, self.expected_exact = expected
+        if (
+            self.expected_listings is not None
+            and self.expected_exact
+            and self.page_size
+        ):
+            if number == 1:
+                last = last_page(self.expected_listings, self.page_size)
+                await self.schedule_pages(
+                    [result_page_url(link, n) for n in range(2, last + 1)]
+                )
+            return
+        if new_listings and cards >= (self.page_size or 1):
+            await self.schedule_pages([result_page_url(link, number + 1)])
+
+    def start_task(self, coroutine) -> None:
+        task = asyncio.create_task(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def submit(self, card: Dict[str, str], page_url: str) -> bool:
+        """Queue a discovered listing once per run, skipping completed ones.
+
+        The listing is recorded as pending with its card data before it is
+        queued, so a crash before it is written leaves it to be retried.
+        Returns whether the listing was new to this run.
+        """
+        url = card["item_url_href"]
+        if url == "N/A":
+            logging.warning("Could not find item URL")
+            return False
+        if url in self.queued_items:
+            return False
+        self.queued_items.add(url)
+        if self.work_queue is not None:
+            payload = {"page_url": page_url, "title": card["title"]}
+            await self.work_queue.put(ITEM, url, {**payload, "price": card["price"]})
+            return True
+        if self.state is not None:
+            if await self.state.item_status(url) == DONE:
+                logging.info(f"Skipping completed item {url}")
+                return True
+            await self.state.mark_item(
+                url,
+                PENDING,
+                page_url=page_url,
+                title=card["title"],
+                price=card["price"],
+            )
+        await self.items.put(ItemJob(card, page_url))
+        return True
+
+    @metrics.instrument("product")
+    async def scrape_listing(self, job: ItemJob) -> None:
+        """Item stage: scrape one listing into its job and pass it on.
+
+        Listings whose card is unchanged since the last run take their rows
+        from the index instead of opening the item page.
+        """
+        card = job.card
+        url = card["item_url_href"]
+        if self.index is not None:
+            job.fingerprint = card_fingerprint(card["title"], card["price"], url)
+            job.listing_status, cached_rows = await self.index.lookup(
+                url, job.fingerprint, len(OUTPUT_COLUMNS)
+            )
+            if job.listing_status == UNCHANGED:
+                job.rows = cached_rows
+                await self.output.put(job)
+                return
 
+        async with self.limiter:
+            for requeues in itertools.count():
+                generation = self.browser_generation()
+                job.rows = []
+                try:
+                    await scrape_item(
+                        self.browser,
+                        card["title"],
+                        card["price"],
+                        url,
+                        job.page_url,
+                        job,
+                        self.fetcher,
+                        self.item_pool,
+                        self.limiter,
+                        self.max_variant_combinations,
+                    )
+                except Exception as e:
+                    if await self.requeue_after_restart(generation, requeues, url):
+                        continue
+                    job.category = classify(e)
+                    job.context = getattr(e, "context", {})
+                    if not getattr(e, "partial", False):
+                        job.rows = []
+                    logging.error(
+                        f"Error scraping product page {url} ({job.category}): {e}"
+                    )
+                    job.error = str(e) or type(e).__name__
+                break
+        await self.output.put(job)
+
+    async def write_listing(self, job: ItemJob) -> None:
+        """Output stage: write a listing's rows, then record it as done.
+
+        Rows are appended in a worker thread, so batch flushes to disk do not
+        block the event loop; this stage is the sink's only writer. A listing
+        is only recorded as done once the batch holding its rows is saved,
+        so a crash never loses rows a resumed crawl would skip.
+
+        A listing that failed partway still has its rows written, while the
+        failing part goes to the dead-letter file.
+        """
+        url = job.card["item_url_href"]
+        if job.error is not None:
+            if self.dead_letters is not None:
+                self.dead_letters.add(
+                    url,
+                    job.category,
+                    job.error,
+                    job.page_url,
+                    job.card["title"],
+                    job.card["price"],
+                    **job.context,
+                )
+            self.listings_failed += 1
+            if not job.rows:
+                if job.task is not None:
+                    await self.finish_task(
+                        job.task, error=f"{job.category}: {job.error}"
+                    )
+                if self.state is not None:
+                    await self.state.mark_item(
+                        url, FAILED, error=f"{job.category}: {job.error}"
+                    )
+                if self.index is not None:
+                    # Its results page still showed it, so it is not removed
+                    await self.index.touch(url)
+                return
+            logging.warning(f"Writing the {len(job.rows)} rows scraped from {url}")
+        self.listings_written += 1
+        if job.task is not None:
+            await self.finish_task(job.task, job.rows)
+            return
+        suffix = [job.listing_status] if self.index is not None else []
+        await self.write_rows([row + suffix for row in job.rows])
+        if self.index is not None:
+            # Partial rows are not cached, so the next run scrapes it again
+            if job.listing_status == UNCHANGED or job.error is not None:
+                await self.index.touch(url)
+            elif job.rows:
+                await self.index.store(url, job.fingerprint, job.rows)
+        if self.state is not None:
+            self.unflushed.append((self.rows_appended, url))
+            await self.mark_flushed()
+
+    async def write_rows(self, rows: List[list]) -> None:
+        """Append rows to the sink in a worker thread; callers other than
+        the output stage must only write once it is idle."""
+        await asyncio.to_thread(self._append_rows, rows)
+
+    def _append_rows(self, rows: List[list]) -> None:
+        for row in rows:
+            self.sheet.append(row)
+        self.rows_appended += len(rows)
+
+    async def mark_flushed(self) -> None:
+        """Record as done the listings whose rows the sink has saved: once
+        flushed, or for sinks not ``durable_on_flush``, once closed."""
+        while self.unflushed and self.unflushed[0][0] <= self.sheet.rows_saved:
+            _, url = self.unflushed.popleft()
+            await self.state.mark_item(url, DONE)
+
+    async def flush_output(self) -> None:
+        """Flush the sink's buffered rows and record their listings as done."""
+        if self.unflushed:
+            await asyncio.to_thread(self.sheet.flush)
+            await self.mark_flushed()
+
+    async def resume(self) -> None:
+        """Skip pages finished by an earlier run and pick up the rest."""
+        done_pages = await self.state.done_pages()
+        self.seen_links.update(done_pages)
+        self.skipped_links.update(done_pages)
+        unfinished = await self.state.unfinished_pages()
+        logging.info(
+            f"Resuming crawl: {len(done_pages)} pages done, {len(unfinished)} to go"
+        )
+        await self.retry_failed_items()
+        await self.schedule_pages(unfinished)
+
+    async def retry_failed_items(self) -> None:
+        """Queue items an earlier run failed or never finished, from their
+        stored card data."""
+        unfinished = await self.state.unfinished_items()
+        logging.info(f"Retrying {len(unfinished)} unfinished items")
+        for item in unfinished:
+            card = {
+                "item_url_href": item["url"],
+                "title": item["title"],
+                "price": item["price"],
+            }
+            await self.submit(card, item["page_url"])
+
+    def browser_generation(self) -> int:
+        return self.supervisor.generation if self.supervisor is not None else 0
+
+    async def requeue_after_restart(
+        self, generation: int, requeues: int, url: str
+    ) -> bool:
+        """Whether work started on browser ``generation`` lost its browser and
+        should run again, once the new browser is up; these reruns do not
+        count as retries."""
+        if (
+            self.supervisor is None
+            or requeues >= MAX_REQUEUES
+            or not self.supervisor.lost(generation)
+        ):
+            return False
+        self.supervisor.requeued += 1
+        logging.warning(f"Browser was restarted while processing {url}, requeueing")
+        await self.supervisor.ensure()
+        return True
+
+    async def run_page(self, link: str) -> None:
+        """Process one pagination page, retrying with jittered backoff."""
+        attempt = requeues = 0
+        while True:
+            generation = self.browser_generation()
+            try:
+                await process_pagination_page(link, self)
+                if self.state is not None:
+                    await self.state.mark_page(link, DONE)
+                return
+            except Exception as e:
+                if await self.requeue_after_restart(generation, requeues, link):
+                    requeues += 1
+                    continue
+                attempt += 1
+                if attempt == MAX_RETRIES:
+                    logging.error(
+                        f"Failed to process page {link} after {MAX_RETRIES} attempts: {e}"
+                    )
+                    self.failed_links.add(link)
+                    if self.state is not None:
+                        await self.state.mark_page(link, FAILED, str(e))
+                    return
+                metrics.retry("results_page")
+                await asyncio.sleep(retry_delay(e, attempt - 1))
+
+    async def work(self, idle_timeout: Optional[float] = None) -> None:
+        """
+        Lease pages and listings from the work queue and run them until the
+        queue is drained, or nothing could be leased for ``idle_timeout``
+        seconds while this process had nothing left to do.
+
+        At most twice the current concurrency limit is leased at a time, so
+        the rest stays available to other workers. Leases are renewed while
+        their tasks run; a worker that dies loses them, and the tasks are
+        leased again once they expire.
+        """
+        heartbeat = asyncio.create_task(self.renew_leases())
+        idle_since = time.monotonic()
+        try:
+            while True:
+                task = None
+                if len(self.leases) < 2 * self.limiter.limit:
+                    task = await self.work_queue.lease(self.worker, (PAGE, ITEM))
+                if task is None:
+                    if not self.leases:
+                        if await self.work_queue.drained():
+                            break
+                        if (
+                            idle_timeout is not None
+                            and time.monotonic() - idle_since > idle_timeout
+                        ):
+                            logging.warning(
+                                f"Work queue idle for {idle_timeout:g}s, stopping"
+                            )
+                            break
+                    else:
+                        idle_since = time.monotonic()
+                    await asyncio.sleep(POLL_INTERVAL)
+                    continue
+                idle_since = time.monotonic()
+                self.leases[task.token] = task
+                if task.kind == PAGE:
+                    self.adopt_page_plan(task.payload)
+                    self.seen_links.add(task.url)
+                    self.start_task(self.run_page_task(task))
+                else:
+                    self.queued_items.add(task.url)
+                    card = {
+                        "item_url_href": task.url,
+                        "title": task.payload.get("title") or "N/A",
+                        "price": task.payload.get("price") or "N/A",
+                    }
+                    job = ItemJob(card, task.payload.get("page_url"), task=task)
+                    await self.items.put(job)
+        finally:
+            heartbeat.cancel()
+        logging.info(f"Work queue tasks of {self.worker}: {self.task_outcomes}")
 
-async def process_current_page(browser: Browser, page: Page, seller_urls, sheet):
-    """Process products on the current page."""
-    await page.wait_for_selector("ul.srp-results.srp-list", state="visible")
-    items = await page.query_selector_all("ul.srp-results.srp-list li.s-item")
-    await process_products_in_batches(browser, items, seller_urls, sheet)
+    async def run_page_task(self, task: Task) -> None:
+        await self.run_page(task.url)
+        if task.url in self.failed_links:
+            await self.finish_task(task, error="page failed")
+        else:
+            await self.finish_task(task)
+
+    async def finish_task(
+        self, task: Task, rows: List[list] = (), error: Optional[str] = None
+    ) -> None:
+        """Complete or fail a leased task. Rows of a task whose lease was
+        lost are dropped: another worker has the task now."""
+        self.leases.pop(task.token, None)
+        if error is None:
+            finished = await self.work_queue.complete(task, rows)
+        else:
+            finished = await self.work_queue.fail(task, error)
+        outcome = "lost" if not finished else "failed" if error else "done"
+        key = f"{task.kind}_{outcome}"
+        self.task_outcomes[key] = self.task_outcomes.get(key, 0) + 1
+        if not finished:
+            logging.warning(f"Lease of {task.kind} {task.url} was lost, dropping it")
+
+    async def renew_leases(self) -> None:
+        while True:
+            await asyncio.sleep(LEASE_SECONDS / 3)
+            try:
+                await self.work_queue.extend(list(self.leases.values()))
+            except Exception as e:
+                logging.error(f"Could not renew work queue leases: {e}")
+
+    async def join(self) -> None:
+        """Wait until every scheduled page, including late discoveries, and
+        every listing they queued is done."""
+        while self.tasks:
+            await asyncio.gather(*list(self.tasks))
+        logging.info(f"Processed {len(self.seen_links)} pagination pages")
+        await self.items.join()
+        await self.output.join()
+        await self.flush_output()
+        logging.info(f"Processed {len(self.queued_items)} listings")
+
+    async def listing_coverage(self) -> Dict[str, Optional[int]]:
+        """Listings the first results page announced against those the crawl
+        collected, written and failed; with a work queue, of every worker,
+        and with crawl state, of every run that resumed it."""
+        collected = len(self.queued_items)
+        written, failed = self.listings_written, self.listings_failed
+        items = None
+        if self.work_queue is not None:
+            items = (await self.work_queue.counts()).get(ITEM, {})
+        elif self.state is not None:
+            items = (await self.state.counts()).get("items", {})
+        if items is not None:
+            collected = sum(items.values())
+            written, failed = items.get(DONE, 0), items.get(FAILED, 0)
+        coverage = {
+            "expected": self.expected_listings,
+            "expected_exact": self.expected_exact,
+            "collected": collected,
+            "written": written,
+            "failed": failed,
+        }
+        if self.expected_listings is not None and collected < self.expected_listings:
+            logging.warning(
+                f"Collected {collected} of the {self.expected_listings} "
+                "listings the seller's results announced"
+            )
+        return coverage
 
+    def pipeline_stats(self) -> Dict[str, Dict]:
+        return {"item": self.items.stats(), "output": self.output.stats()}
 
-async def process_pagination_page(browser: Browser, link: str, sheet):
-    """Process a single pagination page."""
-    page = await browser.new_page()
-    try:
-        await page.goto(link, wait_until="domcontentloaded")
-        await scroll_to_load(page)
-        await process_current_page(browser, page, link, sheet)
-    finally:
-        await page.close()
+    async def report_removed_listings(self) -> None:
+        """Write indexed listings that no page of this run showed as removed.
 
+        Skipped when a page failed or was skipped on resume, since their
+        listings would be reported as removed although they were never seen.
+        """
+        if self.failed_links or self.skipped_links:
+            logging.warning(
+                "Not every page was crawled in this run, skipping removed listings"
+            )
+            return
+        removed = await self.index.pop_removed(len(OUTPUT_COLUMNS))
+        for row in removed:
+            self.sheet.append(row + [REMOVED])
+        logging.info(f"{len(removed)} rows belong to removed listings")
+
+    async def close(self) -> None:
+        """Stop the stage workers, record the listings written so far as done,
+        then close pooled contexts and log pool wait time and utilisation."""
+        await self.items.stop()
+        await self.output.stop()
+        try:
+            await self.flush_output()
+        except Exception as e:
+            logging.error(f"Could not flush the rows written so far: {e}")
+        for name, pool in (("page", self.page_pool), ("item", self.item_pool)):
+            logging.info(f"{name} pool stats: {pool.stats()}")
+            await pool.close()
 
-# Specify the seller's URL
-seller_url = config("SELLER_URL")
 
 # Run the asynchronous function
 if __name__ == "__main__":
-    try:
-        asyncio.run(parse_ebay_seller(seller_url))
-    except Exception as e:
-        logging.critical(f"Failed to execute the script: {e}", exc_info=True)
+    from cli import main
+
+    main(["scrape", *sys.argv[1:]])
@@ -0,0 +1,93 @@
+"""Hit rates of the selectors behind every extracted field, and fail-fast waits."""
+
+import logging
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Optional
+
+FAIL_FAST_AFTER = 5  # Consecutive misses after which waits on a field are cut short
+FAIL_FAST_TIMEOUT_MS = 2000
+
+
+class SelectorHealth:
+    """
+    Counts, per field, which selector of its fallback chain matched and how
+    often none did.
+
+    Fields are named like "item.price". After ``fail_fast_after``
+    consecutive misses a field counts as failing: ``timeout`` then shortens
+    waits on it to ``fail_fast_timeout_ms``, so a selector broken by a
+    markup change costs seconds per listing rather than the full timeout.
+    The next hit restores the normal timeout. Extraction in worker threads
+    reports here too, hence the lock.
+    """
+
+    def __init__(
+        self,
+        fail_fast_after: Optional[int] = FAIL_FAST_AFTER,
+        fail_fast_timeout_ms: float = FAIL_FAST_TIMEOUT_MS,
+    ):
+        self.fail_fast_after = fail_fast_after
+        self.fail_fast_timeout_ms = fail_fast_timeout_ms
+        self.hits: Dict[str, Counter] = defaultdict(Counter)
+        self.misses: Counter = Counter()
+        self.streaks: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def hit(self, field: str, selector: str) -> None:
+        with self._lock:
+            self.hits[field][selector] += 1
+            if self.failing(field):
+                logging.info(f"Selector of {field} matched again: {selector}")
+            self.streaks[field] = 0
+
+    def miss(self, field: str, optional: bool = False) -> None:
+        """Record that no selector of ``field`` matched; misses of an
+        ``optional`` field do not count towards failing fast."""
+        with self._lock:
+            self.misses[field] += 1
+            if optional:
+                return
+            self.streaks[field] += 1
+            if self.streaks[field] == self.fail_fast_after:
+                logging.warning(
+                    f"No selector of {field} matched {self.fail_fast_after} times "
+                    f"in a row; waits on it now give up after "
+                    f"{self.fail_fast_timeout_ms / 1000:g}s"
+                )
+
+    def failing(self, field: str) -> bool:
+        return bool(self.fail_fast_after) and (
+            self.streaks[field] >= self.fail_fast_after
+        )
+
+    def timeout(self, field: str, timeout_ms: float) -> float:
+        """How long to wait for ``field``: ``timeout_ms``, or less if failing."""
+        if self.failing(field):
+            return min(timeout_ms, self.fail_fast_timeout_ms)
+        return timeout_ms
+
+    def report(self) -> Dict[str, Dict]:
+        fields = sorted(set(self.hits) | set(self.misses))
+        report = {}
+        for field in fields:
+            hits = sum(self.hits[field].values())
+            total = hits + self.misses[field]
+            report[field] = {
+                "hits": hits,
+                "misses": self.misses[field],
+                "hit_rate": round(hits / total, 3) if total else None,
+                "selectors": dict(self.hits[field].most_common()),
+                "failing": self.failing(field),
+            }
+        return report
+
+    def reset(self, fail_fast_after: Optional[int] = FAIL_FAST_AFTER) -> None:
+        with self._lock:
+            self.fail_fast_after = fail_fast_after
+            self.hits.clear()
+            self.misses.clear()
+            self.streaks.clear()
+
+
+selector_health = SelectorHealth()
@@ -0,0 +1,141 @@
+"""Run configuration of the scraper and the logging setup used by the CLI."""
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from browser_supervisor import DEFAULT_MAX_MEMORY_MB, DEFAULT_MAX_NAVIGATIONS
+from response_cache import DEFAULT_MAX_BYTES
+from selector_health import FAIL_FAST_AFTER
+from sinks import DEFAULT_BATCH_SIZE, SINKS
+
+CONCURRENT_TASK_LIMIT = 4
+MAX_VARIANT_COMBINATIONS = 100  # Per listing
+ENGINES = ("playwright", "http")
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+LOG_FILE = "ebay_scraper.log"
+
+# Arguments the CLI last configured logging with, so batch worker processes
+# can repeat the setup. None when the scraper is used as a library.
+_logging_options: Optional[Dict] = None
+
+
+@dataclass
+class ScraperConfig:
+    """
+    Options of a scraping run.
+
+    Attributes:
+        concurrency: Number of page loads and product scrapes allowed in flight
+            at first. The limit then adapts to eBay's latency and throttling
+            between 1 and ``max_concurrency``.
+        max_concurrency: Upper bound of the adaptive limit, four times
+            ``concurrency`` by default.
+        host_rate: Optional cap on requests per second to each host.
+        engine: "playwright" renders every item page; "http" fetches item pages
+            over HTTP and renders only listings whose variant prices need JavaScript.
+        output_format: One of xlsx, csv, jsonl, arrow or parquet. If None, taken
+            from the output file extension, falling back to xlsx.
+        batch_size: Rows buffered before they are flushed to the output file.
+        state_file: Optional SQLite file recording crawl progress. Re-running
+            with the same seller URL and state file skips completed pages and
+            items, retries failed items, and appends to the output, which
+            must therefore be csv or jsonl.
+        index_file: Optional SQLite listing index for incremental runs. Listings
+            whose search card is unchanged are written from the index, and an
+            extra column marks each row new, changed, unchanged or removed.
+        report_file: Optional path for the JSON run report, written whether
+            the run succeeds or fails.
+        metrics_file: Optional path for the run's metrics in Prometheus text
+            format, e.g. for the node exporter's textfile collector.
+        cache_dir: Optional directory of the on-disk response cache. Search
+            and item pages fetched within their TTL are served from it.
+        cache_max_bytes: Size above which least recently used responses are
+            evicted from the cache.
+        replay_only: Serve everything from ``cache_dir`` regardless of age and
+            never touch the network, e.g. to re-parse a finished crawl after
+            changing the extraction logic.
+        browser_max_navigations: Navigations after which the browser is
+            relaunched; None never relaunches for this reason.
+        browser_max_memory_mb: Resident memory of the browser processes above
+            which the browser is relaunched; None never relaunches for this
+            reason. Both only apply to browsers the scraper launches itself.
+        dead_letter_file: JSON lines file receiving every listing that could
+            not be scraped, with its failure category; ``cli.py redrive``
+            retries them. Defaults to the output file name with a
+            ``.failed.jsonl`` extension.
+        selector_fail_fast_after: Consecutive listings on which no selector
+            of a field matched, after which waits on that field give up
+            within seconds; None always waits the full timeout.
+        max_variant_combinations: Variant rows written per listing at most;
+            raise it for listings with many dropdown combinations, lower it
+            to click through fewer when the variation model is missing.
+        work_queue: Optional work queue, a SQLite file or a backend URL (see
+            ``work_queue.BACKENDS``), through which workers started with
+            ``cli.py worker`` share the crawl. Rows are collected in the
+            queue and written to the output file once it is drained; a
+            queue that already holds the seller's tasks is picked up where
+            it stopped.
+    """
+
+    concurrency: int = CONCURRENT_TASK_LIMIT
+    max_concurrency: Optional[int] = None
+    host_rate: Optional[float] = None
+    engine: str = "playwright"
+    output_format: Optional[str] = None
+    batch_size: int = DEFAULT_BATCH_SIZE
+    state_file: Optional[str] = None
+    index_file: Optional[str] = None
+    report_file: Optional[str] = None
+    metrics_file: Optional[str] = None
+    cache_dir: Optional[str] = None
+    cache_max_bytes: int = DEFAULT_MAX_BYTES
+    replay_only: bool = False
+    browser_max_navigations: Optional[int] = DEFAULT_MAX_NAVIGATIONS
+    browser_max_memory_mb: Optional[float] = DEFAULT_MAX_MEMORY_MB
+    dead_letter_file: Optional[str] = None
+    selector_fail_fast_after: Optional[int] = FAIL_FAST_AFTER
+    max_variant_combinations: int = MAX_VARIANT_COMBINATIONS
+    work_queue: Optional[str] = None
+
+    def __post_init__(self):
+        if self.engine not in ENGINES:
+            raise ValueError(f"Unknown engine: {self.engine}")
+        if self.concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        if self.max_variant_combinations < 1:
+            raise ValueError("max_variant_combinations must be at least 1")
+        if self.replay_only and not self.cache_dir:
+            raise ValueError("replay_only needs a cache_dir to replay from")
+        if (
+            self.state_file
+            and self.output_format in SINKS
+            and not SINKS[self.output_format].appendable
+        ):
+            raise ValueError(
+                f"state_file needs csv or jsonl output to append to, "
+                f"not {self.output_format}"
+            )
+        if self.work_queue and (self.state_file or self.index_file):
+            raise ValueError(
+                "work_queue keeps its own progress and cannot be combined "
+                "with state_file or index_file"
+            )
+
+
+def configure_logging(level: str = "INFO", log_file: Optional[str] = LOG_FILE) -> None:
+    """Log to stderr and, unless ``log_file`` is None, to a file.
+
+    Only the command line entry points call this; as a library the scraper
+    leaves logging to the application.
+    """
+    global _logging_options
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file))
+    logging.basicConfig(level=level, format=LOG_FORMAT, handlers=handlers, force=True)
+    _logging_options = {"level": level, "log_file": log_file}
+
+
+def logging_options() -> Optional[Dict]:
+    return _logging_options
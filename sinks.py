@@ -0,0 +1,269 @@
+"""Streaming output sinks that flush scraped rows in batches."""
+
+import csv
+import json
+import logging
+import os
+from typing import List, Optional, Sequence
+
+from metrics import metrics
+
+DEFAULT_BATCH_SIZE = 100
+
+
+class RowSink:
+    """
+    Buffers rows and writes them out every ``batch_size`` rows.
+
+    Sinks expose ``append`` like an openpyxl worksheet, so ``add_to_sheet``
+    writes to any of them unchanged. Subclasses implement ``_write_rows`` and
+    may override ``_close``. With ``append`` rows are added to an existing
+    file, which only sinks with ``appendable`` set support. Sinks with
+    ``durable_on_flush`` set have every flushed row on disk; the others only
+    once ``close`` has finished the file. Values of ``numeric_columns`` are
+    floats or None; typed formats store them as such.
+    """
+
+    extension = ""
+    appendable = False
+    durable_on_flush = False
+
+    def __init__(
+        self,
+        path: str,
+        columns: Sequence[str],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        append: bool = False,
+        numeric_columns: Sequence[str] = (),
+    ):
+        if append and not self.appendable and os.path.exists(path):
+            raise ValueError(
+                f"Cannot append to existing {self.extension} file {path}; "
+                "use csv or jsonl output to resume into the same file"
+            )
+        self.append_mode = append and os.path.exists(path)
+        self.path = path
+        self.columns = list(columns)
+        self.numeric_columns = set(numeric_columns)
+        self.batch_size = batch_size
+        self.buffer: List[list] = []
+        self.rows_written = 0
+        self.closed = False
+        self.finished = False  # Closed without an error
+
+    def append(self, row: Sequence) -> None:
+        self.buffer.append(list(row))
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.buffer:
+            return
+        with metrics.timer("write"):
+            self._write_rows(self.buffer)
+        self.rows_written += len(self.buffer)
+        self.buffer = []
+
+    @property
+    def rows_saved(self) -> int:
+        """Rows that survive a crash from here on."""
+        return self.rows_written if self.durable_on_flush or self.finished else 0
+
+    def close(self) -> None:
+        """Flush pending rows and finalise the file; safe to call twice."""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.flush()
+        finally:
+            self._close()
+        self.finished = True
+        logging.info(f"Wrote {self.rows_written} rows to {self.path}")
+
+    def _write_rows(self, rows: List[list]) -> None:
+        raise NotImplementedError
+
+    def _close(self) -> None:
+        pass
+
+    def __enter__(self) -> "RowSink":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class CsvSink(RowSink):
+    """CSV file; every flushed batch is on disk and survives a crash."""
+
+    extension = ".csv"
+    appendable = True
+    durable_on_flush = True
+
+    def __init__(self, path, columns, batch_size=DEFAULT_BATCH_SIZE, **options):
+        super().__init__(path, columns, batch_size, **options)
+        write_header = not self.append_mode or os.path.getsize(path) == 0
+        mode = "a" if self.append_mode else "w"
+        self.file = open(path, mode, newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        if write_header:
+            self.writer.writerow(self.columns)
+
+    def _write_rows(self, rows):
+        self.writer.writerows(rows)
+        self.file.flush()
+
+    def _close(self):
+        self.file.close()
+
+
+class JsonLinesSink(RowSink):
+    """One JSON object per row; every flushed batch survives a crash."""
+
+    extension = ".jsonl"
+    appendable = True
+    durable_on_flush = True
+
+    def __init__(self, path, columns, batch_size=DEFAULT_BATCH_SIZE, **options):
+        super().__init__(path, columns, batch_size, **options)
+        self.file = open(path, "a" if self.append_mode else "w", encoding="utf-8")
+
+    def _write_rows(self, rows):
+        for row in rows:
+            record = dict(zip(self.columns, row))
+            self.file.write(json.dumps(record, ensure_ascii=False, default=str))
+            self.file.write("\n")
+        self.file.flush()
+
+    def _close(self):
+        self.file.close()
+
+
+class XlsxSink(RowSink):
+    """
+    Excel workbook in openpyxl write-only mode.
+
+    Rows stream to a temporary file instead of living in memory, but the
+    workbook is only readable once ``close`` has saved it.
+    """
+
+    extension = ".xlsx"
+
+    def __init__(self, path, columns, batch_size=DEFAULT_BATCH_SIZE, **options):
+        super().__init__(path, columns, batch_size, **options)
+        from openpyxl import Workbook
+
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet("eBay Seller Data")
+        self.sheet.append(self.columns)
+
+    def _write_rows(self, rows):
+        for row in rows:
+            self.sheet.append(row)
+
+    def _close(self):
+        self.workbook.save(self.path)
+
+
+class _ArrowSink(RowSink):
+    """Shared pyarrow setup; numeric columns are float64, the rest strings."""
+
+    def __init__(self, path, columns, batch_size=DEFAULT_BATCH_SIZE, **options):
+        super().__init__(path, columns, batch_size, **options)
+        try:
+            import pyarrow
+        except ImportError as e:
+            raise RuntimeError(
+                f"{self.extension} output requires pyarrow: pip install pyarrow"
+            ) from e
+        self.pa = pyarrow
+        self.schema = pyarrow.schema(
+            [
+                (
+                    name,
+                    (
+                        pyarrow.float64()
+                        if name in self.numeric_columns
+                        else pyarrow.string()
+                    ),
+                )
+                for name in columns
+            ]
+        )
+        self.writer = self._open_writer()
+
+    def _open_writer(self):
+        raise NotImplementedError
+
+    def _write_rows(self, rows):
+        table = self.pa.Table.from_pylist(
+            [
+                {
+                    name: (
+                        value
+                        if value is None or name in self.numeric_columns
+                        else str(value)
+                    )
+                    for name, value in zip(self.columns, row)
+                }
+                for row in rows
+            ],
+            schema=self.schema,
+        )
+        self.writer.write_table(table)
+
+    def _close(self):
+        self.writer.close()
+
+
+class ArrowSink(_ArrowSink):
+    """Arrow IPC stream; readable up to the last flushed batch after a crash."""
+
+    extension = ".arrow"
+    durable_on_flush = True
+
+    def _open_writer(self):
+        return self.pa.ipc.new_stream(self.path, self.schema)
+
+
+class ParquetSink(_ArrowSink):
+    """Parquet file with one row group per batch; complete only after ``close``."""
+
+    extension = ".parquet"
+
+    def _open_writer(self):
+        import pyarrow.parquet
+
+        return pyarrow.parquet.ParquetWriter(self.path, self.schema)
+
+
+SINKS = {
+    sink.extension.lstrip("."): sink
+    for sink in (XlsxSink, CsvSink, JsonLinesSink, ArrowSink, ParquetSink)
+}
+
+
+def sink_format(path: str, output_format: Optional[str] = None) -> str:
+    """Resolve the output format from an explicit name or the file extension."""
+    output_format = output_format or os.path.splitext(path)[1].lstrip(".").lower()
+    if output_format not in SINKS:
+        raise ValueError(
+            f"Unsupported output format '{output_format}', "
+            f"expected one of: {', '.join(SINKS)}"
+        )
+    return output_format
+
+
+def open_sink(
+    path: str,
+    columns: Sequence[str],
+    output_format: Optional[str] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    append: bool = False,
+    numeric_columns: Sequence[str] = (),
+) -> RowSink:
+    """Open the sink matching ``output_format`` or the extension of ``path``."""
+    return SINKS[sink_format(path, output_format)](
+        path, columns, batch_size, append=append, numeric_columns=numeric_columns
+    )
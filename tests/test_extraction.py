@@ -0,0 +1,80 @@
+"""Browser-free parsing of item pages, variant models and prices."""
+
+import pytest
+
+from extraction import is_price_range, parse_item_html
+from mock_ebay import MockCatalog, render_item_page
+from records import parse_price
+from variants import variant_offers_from_html
+
+BASE_URL = "http://mock.test"
+CATALOG = MockCatalog(40)
+
+
+def first_item(predicate):
+    return next(item for item in CATALOG.items if predicate(item))
+
+
+def test_parse_item_html_reads_item_fields():
+    item = first_item(lambda item: item["variants"] is None)
+    fields = parse_item_html(render_item_page(BASE_URL, item))
+
+    assert fields["category"] == item["category"]
+    assert fields["brand"] == item["brand"]
+    assert fields["condition"] == item["condition"]
+    assert fields["quantity"] == item["quantity"]
+    assert fields["price"] == item["price"]
+    images = [url for url in fields["image_urls"] if url != "N/A"]
+    assert images == [
+        f"{BASE_URL}/img/{item['id']}_{n}.jpg" for n in range(min(item["images"], 10))
+    ]
+
+
+def test_parse_item_html_reads_variant_dropdowns():
+    item = first_item(lambda item: item["variants"] is not None)
+    fields = parse_item_html(render_item_page(BASE_URL, item))
+
+    assert is_price_range(fields["price"])
+    for _, values in item["variants"]["menus"]:
+        assert set(values) <= set(fields["variant_values"])
+
+
+def test_variant_offers_from_html_resolves_sold_combinations():
+    item = first_item(lambda item: item["variants"] and item["variants"]["msku"])
+    offers = variant_offers_from_html(render_item_page(BASE_URL, item), 100)
+
+    prices = item["variants"]["prices"]
+    assert {offer["values"] for offer in offers} == set(prices)
+    for offer in offers:
+        assert offer["price"] == f"US ${prices[offer['values']]:.2f}"
+        assert offer["in_stock"] is True
+
+
+def test_variant_offers_from_html_caps_combinations():
+    item = first_item(lambda item: item["variants"] and item["variants"]["msku"])
+    assert len(variant_offers_from_html(render_item_page(BASE_URL, item), 2)) == 2
+
+
+def test_variant_offers_from_html_without_model():
+    item = first_item(lambda item: item["variants"] is None)
+    assert variant_offers_from_html(render_item_page(BASE_URL, item), 100) == []
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("$12.99", (12.99, 12.99, "USD")),
+        ("US $12.99 to $19.99", (12.99, 19.99, "USD")),
+        ("EUR 12,99", (12.99, 12.99, "EUR")),
+        ("EUR 1.234,56", (1234.56, 1234.56, "EUR")),
+        ("£1,234", (1234.0, 1234.0, "GBP")),
+        ("C $5.00", (5.0, 5.0, "CAD")),
+        ("RUB 1 234,50", (1234.5, 1234.5, "RUB")),
+        ("RUB 1\u00a0234,50", (1234.5, 1234.5, "RUB")),
+        ("RUB 1 234,50 to 2 000,00", (1234.5, 2000.0, "RUB")),
+        ("N/A", (None, None, None)),
+    ],
+)
+def test_parse_price(text, expected):
+    price = parse_price(text)
+    assert (price.min, price.max, price.currency) == expected
@@ -0,0 +1,47 @@
+"""Result page addressing and result count parsing."""
+
+import pytest
+
+from pagination import (
+    MAX_PAGE_SIZE,
+    ResultCount,
+    last_page,
+    page_number,
+    parse_result_count,
+    result_page_url,
+)
+
+
+def test_result_page_url_replaces_page_parameters():
+    url = result_page_url("https://www.ebay.com/sch/i.html?_ssn=x&_pgn=3&_ipg=60", 2)
+    assert url == f"https://www.ebay.com/sch/i.html?_ssn=x&_pgn=2&_ipg={MAX_PAGE_SIZE}"
+
+
+def test_page_number():
+    assert page_number("https://www.ebay.com/sch/i.html?_ssn=x&_pgn=7") == 7
+    assert page_number("https://www.ebay.com/str/seller") == 1
+    assert page_number(result_page_url("https://www.ebay.com/str/seller", 4)) == 4
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("1,234 results for seller", ResultCount(1234)),
+        ("1.234 Ergebnisse", None),
+        ("12 Results", ResultCount(12)),
+        ("1 result", ResultCount(1)),
+        ("Page 2 1,234 results", ResultCount(1234)),
+        ("50,000+ results", ResultCount(50000, exact=False)),
+        ("No listings", None),
+        (None, None),
+    ],
+)
+def test_parse_result_count(text, expected):
+    assert parse_result_count(text) == expected
+
+
+def test_last_page():
+    assert last_page(0, MAX_PAGE_SIZE) == 1
+    assert last_page(240, 240) == 1
+    assert last_page(241, 240) == 2
+    assert last_page(600, 240) == 3
@@ -0,0 +1,113 @@
+"""Crawl scheduling against fake result pages, without a browser."""
+
+import asyncio
+import contextlib
+from urllib.parse import parse_qs, urlsplit
+
+
+import scraper
+from crawl_state import CrawlStateStore
+from pagination import ResultCount, page_number, result_page_url
+from sinks import open_sink
+from work_queue import PAGE, SqliteWorkQueue
+
+SELLER_URL = "https://www.ebay.com/str/seller"
+
+
+class FakeSeller:
+    """Result pages of ``listings`` cards that clamp past the last page,
+    like eBay's, and item pages that give one row each."""
+
+    def __init__(self, monkeypatch, listings: int):
+        self.listings = listings
+        self.loads = []
+        monkeypatch.setattr(scraper, "navigate", self.navigate)
+        monkeypatch.setattr(scraper, "scroll_to_load", self.scroll_to_load)
+        monkeypatch.setattr(scraper, "read_search_cards", self.read_search_cards)
+        monkeypatch.setattr(scraper, "read_result_count", self.read_result_count)
+        monkeypatch.setattr(scraper, "scrape_item", self.scrape_item)
+        monkeypatch.setattr(scraper, "POLL_INTERVAL", 0.01)
+
+    def scheduler(self, sheet, **options) -> scraper.CrawlScheduler:
+        scheduler = scraper.CrawlScheduler(object(), sheet, 2, **options)
+
+        @contextlib.asynccontextmanager
+        async def page():
+            yield FakePage()
+
+        scheduler.page_pool.page = page
+        return scheduler
+
+    async def navigate(self, page, link, limiter, **options):
+        page.url = link
+        self.loads.append(page_number(link))
+
+    async def scroll_to_load(self, page):
+        pass
+
+    async def read_search_cards(self, page):
+        size = int(parse_qs(urlsplit(page.url).query)["_ipg"][0])
+        pages = max(1, -(-self.listings // size))
+        number = min(page_number(page.url), pages)
+        return [
+            {"item_url_href": f"{SELLER_URL}/itm/{n}", "title": "t", "price": "$1"}
+            for n in range((number - 1) * size, min(number * size, self.listings))
+        ]
+
+    async def read_result_count(self, page):
+        return ResultCount(self.listings)
+
+    async def scrape_item(self, browser, title, price, url, page_url, sheet, *args):
+        sheet.append([url])
+
+
+class FakePage:
+    url = None
+
+
+def test_workers_follow_the_page_plan_of_the_coordinator(tmp_path, monkeypatch):
+    seller = FakeSeller(monkeypatch, 480)
+
+    async def crawl():
+        queue = SqliteWorkQueue(str(tmp_path / "queue.sqlite"), SELLER_URL)
+        coordinator = seller.scheduler([], work_queue=queue)
+        assert await coordinator.crawl_from(result_page_url(SELLER_URL, 1))
+        await coordinator.join()
+        await coordinator.close()
+
+        worker = seller.scheduler(None, work_queue=queue)
+        await worker.work(idle_timeout=5)
+        await worker.join()
+        await worker.close()
+        rows = [row async for batch in queue.rows() for row in batch]
+        counts = await queue.counts()
+        queue.close()
+        return rows, counts
+
+    rows, counts = asyncio.run(crawl())
+    assert len(rows) == 480
+    # Page 2 is full, but the count says it is the last one
+    assert sum(counts[PAGE].values()) == 1
+    assert sorted(seller.loads) == [1, 2]
+
+
+def test_coverage_of_a_resumed_crawl_counts_earlier_runs(tmp_path, monkeypatch):
+    seller = FakeSeller(monkeypatch, 500)
+
+    async def crawl():
+        state = CrawlStateStore(str(tmp_path / "state.sqlite"), SELLER_URL)
+        sheet = open_sink(str(tmp_path / "out.csv"), ["url"], append=True)
+        scheduler = seller.scheduler(sheet, state=state)
+        await scheduler.resume()
+        assert await scheduler.crawl_from(result_page_url(SELLER_URL, 1))
+        await scheduler.join()
+        coverage = await scheduler.listing_coverage()
+        await scheduler.close()
+        sheet.close()
+        state.close()
+        return coverage
+
+    asyncio.run(crawl())
+    coverage = asyncio.run(crawl())
+    assert coverage["collected"] == coverage["written"] == 500
+    assert coverage["expected"] == 500
@@ -0,0 +1,75 @@
+"""Item pages scraped from their HTML, without a browser."""
+
+import asyncio
+
+import pytest
+
+import scraper
+from mock_ebay import MockCatalog, render_item_page
+
+BASE_URL = "http://mock.test"
+CATALOG = MockCatalog(40)
+
+
+class FakeFetcher:
+    def __init__(self, html):
+        self.html = html
+
+    async def fetch(self, url):
+        return self.html
+
+
+def scrape(html, item, **options):
+    rows = []
+    done = asyncio.run(
+        scraper.scrape_item_over_http(
+            FakeFetcher(html),
+            item["title"],
+            item["price"],
+            f"{BASE_URL}/itm/{item['id']}",
+            f"{BASE_URL}/str/{CATALOG.seller}",
+            rows,
+            **options,
+        )
+    )
+    return done, rows
+
+
+def test_variant_rows_are_capped_at_max_combinations():
+    item = next(i for i in CATALOG.items if i["variants"] and i["variants"]["msku"])
+    html = render_item_page(BASE_URL, item)
+
+    done, rows = scrape(html, item)
+    assert done
+    assert len(rows) == len(item["variants"]["prices"])
+
+    done, rows = scrape(html, item, max_combinations=2)
+    assert done
+    assert len(rows) == 2
+
+
+class Rendered(Exception):
+    """Raised where scrape_item would open a browser page."""
+
+
+@pytest.mark.parametrize("html", ["", "   ", "<?xml version='1.0' encoding='utf-8'?>"])
+def test_unparseable_html_falls_back_to_the_browser(monkeypatch, html):
+    item = CATALOG.items[0]
+    assert scrape(html, item) == (False, [])
+
+    def borrow_page(*args, **options):
+        raise Rendered
+
+    monkeypatch.setattr(scraper, "borrow_page", borrow_page)
+    with pytest.raises(Rendered):
+        asyncio.run(
+            scraper.scrape_item(
+                None,
+                item["title"],
+                item["price"],
+                f"{BASE_URL}/itm/{item['id']}",
+                f"{BASE_URL}/str/{CATALOG.seller}",
+                [],
+                FakeFetcher(html),
+            )
+        )
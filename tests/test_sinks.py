@@ -0,0 +1,101 @@
+"""Batched row sinks."""
+
+import csv
+import json
+
+import pytest
+
+from sinks import CsvSink, JsonLinesSink, open_sink, sink_format
+
+COLUMNS = ["title", "price min"]
+ROWS = [[f"item {n}", float(n)] for n in range(5)]
+
+
+def test_rows_are_written_in_batches(tmp_path):
+    sink = CsvSink(str(tmp_path / "out.csv"), COLUMNS, batch_size=2)
+    for row in ROWS[:3]:
+        sink.append(row)
+    assert sink.rows_written == 2
+    assert sink.buffer == [ROWS[2]]
+
+    sink.flush()
+    assert sink.rows_written == 3
+    assert sink.buffer == []
+    sink.close()
+    sink.close()
+    assert sink.rows_written == 3
+
+
+def test_flushed_rows_are_saved_only_by_durable_sinks(tmp_path):
+    pytest.importorskip("openpyxl")
+    csv_sink = open_sink(str(tmp_path / "out.csv"), COLUMNS, batch_size=2)
+    xlsx_sink = open_sink(str(tmp_path / "out.xlsx"), COLUMNS, batch_size=2)
+    for sink in (csv_sink, xlsx_sink):
+        for row in ROWS[:3]:
+            sink.append(row)
+    assert (csv_sink.rows_saved, xlsx_sink.rows_saved) == (2, 0)
+
+    csv_sink.close()
+    xlsx_sink.close()
+    assert (csv_sink.rows_saved, xlsx_sink.rows_saved) == (3, 3)
+
+
+def test_csv_sink_appends_without_repeating_the_header(tmp_path):
+    path = str(tmp_path / "out.csv")
+    with CsvSink(path, COLUMNS) as sink:
+        for row in ROWS[:2]:
+            sink.append(row)
+    with CsvSink(path, COLUMNS, append=True) as sink:
+        for row in ROWS[2:]:
+            sink.append(row)
+
+    with open(path, newline="", encoding="utf-8") as f:
+        lines = list(csv.reader(f))
+    assert lines[0] == COLUMNS
+    assert [line[0] for line in lines[1:]] == [row[0] for row in ROWS]
+
+
+def test_jsonl_sink_writes_one_object_per_row(tmp_path):
+    path = str(tmp_path / "out.jsonl")
+    with JsonLinesSink(path, COLUMNS) as sink:
+        for row in ROWS:
+            sink.append(row)
+
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert records == [dict(zip(COLUMNS, row)) for row in ROWS]
+
+
+def test_xlsx_sink_cannot_append(tmp_path):
+    pytest.importorskip("openpyxl")
+    path = str(tmp_path / "out.xlsx")
+    with open_sink(path, COLUMNS) as sink:
+        sink.append(ROWS[0])
+    with pytest.raises(ValueError):
+        open_sink(path, COLUMNS, append=True)
+
+
+@pytest.mark.parametrize("output_format", ["arrow", "parquet"])
+def test_arrow_sinks_keep_numeric_columns_numeric(tmp_path, output_format):
+    pyarrow = pytest.importorskip("pyarrow")
+    path = str(tmp_path / f"out.{output_format}")
+    with open_sink(path, COLUMNS, batch_size=2, numeric_columns=COLUMNS[1:]) as sink:
+        for row in ROWS:
+            sink.append(row)
+
+    if output_format == "arrow":
+        with pyarrow.ipc.open_stream(path) as reader:
+            table = reader.read_all()
+    else:
+        import pyarrow.parquet
+
+        table = pyarrow.parquet.read_table(path)
+    assert table.schema.field("price min").type == pyarrow.float64()
+    assert table.column("price min").to_pylist() == [row[1] for row in ROWS]
+
+
+def test_sink_format():
+    assert sink_format("out.CSV") == "csv"
+    assert sink_format("out.txt", "jsonl") == "jsonl"
+    with pytest.raises(ValueError):
+        sink_format("out.txt")
@@ -0,0 +1,123 @@
+"""Lease, completion and export semantics of the SQLite work queue."""
+
+import asyncio
+import time
+
+import pytest
+
+from crawl_state import DONE, FAILED, PENDING
+from work_queue import ITEM, LEASED, PAGE, SqliteWorkQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = SqliteWorkQueue(str(tmp_path / "queue.sqlite"), "seller")
+    yield queue
+    queue.close()
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_put_creates_each_task_once(queue):
+    assert run(queue.put(PAGE, "p1"))
+    assert not run(queue.put(PAGE, "p1"))
+    assert run(queue.put(ITEM, "p1"))
+    assert run(queue.counts()) == {PAGE: {PENDING: 1}, ITEM: {PENDING: 1}}
+
+
+def test_lease_hands_out_the_oldest_task_of_the_kinds(queue):
+    run(queue.put(PAGE, "p1"))
+    run(queue.put(ITEM, "i1", {"title": "t"}))
+    run(queue.put(ITEM, "i2"))
+
+    task = run(queue.lease("a", [ITEM]))
+    assert (task.kind, task.url, task.payload, task.attempts) == (
+        ITEM,
+        "i1",
+        {"title": "t"},
+        1,
+    )
+    assert run(queue.lease("b", [ITEM])).url == "i2"
+    assert run(queue.lease("c", [ITEM])) is None
+    assert run(queue.counts())[ITEM] == {LEASED: 2}
+
+
+def test_complete_stores_rows_once(queue):
+    run(queue.put(ITEM, "i1"))
+    task = run(queue.lease("a", [ITEM]))
+
+    assert run(queue.complete(task, [["row", 1], ["row", 2]]))
+    assert not run(queue.complete(task, [["again", 3]]))
+    assert run(queue.drained())
+    assert run(queue.counts()) == {ITEM: {DONE: 1}}
+
+
+def test_expired_lease_is_reclaimed_and_fences_out_its_old_owner(queue):
+    run(queue.put(ITEM, "i1"))
+    stale = run(queue.lease("a", [ITEM], lease_seconds=0))
+    time.sleep(0.01)
+
+    current = run(queue.lease("b", [ITEM]))
+    assert current.url == "i1"
+    assert current.attempts == 2
+    assert current.token != stale.token
+    assert not run(queue.complete(stale, [["stale"]]))
+    assert not run(queue.fail(stale, "stale"))
+    assert run(queue.complete(current, [["current"]]))
+
+    rows = [row for batch in run(collect(queue)) for row in batch]
+    assert rows == [["current"]]
+
+
+def test_extend_keeps_a_running_lease(queue):
+    run(queue.put(ITEM, "i1"))
+    task = run(queue.lease("a", [ITEM], lease_seconds=0))
+    run(queue.extend([task]))
+    time.sleep(0.01)
+
+    assert run(queue.lease("b", [ITEM])) is None
+    assert run(queue.complete(task))
+
+
+def test_task_whose_leases_keep_expiring_fails(tmp_path):
+    queue = SqliteWorkQueue(str(tmp_path / "queue.sqlite"), "seller", max_leases=2)
+    run(queue.put(ITEM, "i1"))
+    for _ in range(2):
+        assert run(queue.lease("a", [ITEM], lease_seconds=0)) is not None
+        time.sleep(0.01)
+
+    assert run(queue.lease("a", [ITEM])) is None
+    assert run(queue.counts()) == {ITEM: {FAILED: 1}}
+    assert run(queue.drained())
+    queue.close()
+
+
+def test_failed_task_drains_without_rows(queue):
+    run(queue.put(ITEM, "i1"))
+    assert not run(queue.drained())
+    task = run(queue.lease("a", [ITEM]))
+    assert not run(queue.drained())
+
+    assert run(queue.fail(task, "boom"))
+    assert run(queue.drained())
+    assert run(collect(queue)) == []
+
+
+def test_rows_come_in_batches_in_completion_order(queue):
+    for n in range(5):
+        run(queue.put(ITEM, f"i{n}"))
+    for n in reversed(range(5)):
+        task = run(queue.lease("a", [ITEM]))
+        run(queue.complete(task, [[task.url, position] for position in range(n)]))
+
+    batches = run(collect(queue, batch_size=3))
+    assert all(len(batch) <= 3 for batch in batches)
+    rows = [row for batch in batches for row in batch]
+    assert len(rows) == 10
+    assert [row[0] for row in rows] == sorted(row[0] for row in rows)
+
+
+async def collect(queue, **options):
+    return [batch async for batch in queue.rows(**options)]
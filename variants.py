@@ -0,0 +1,120 @@
+"""Variant price resolution from the variation model embedded in item pages."""
+
+import itertools
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+MSKU_MARKER = '"MSKU":'
+
+
+def extract_msku(html: str) -> Optional[Dict[str, Any]]:
+    """
+    Find the ``MSKU`` variation model eBay embeds in the item page scripts.
+
+    The model maps every combination of dropdown values to a variation with
+    its own price and stock, which is what clicking the dropdowns renders.
+    """
+    start = html.find(MSKU_MARKER)
+    decoder = json.JSONDecoder()
+    while start != -1:
+        try:
+            msku, _ = decoder.raw_decode(html, start + len(MSKU_MARKER))
+        except json.JSONDecodeError:
+            msku = None
+        if isinstance(msku, dict) and msku.get("variationCombinations"):
+            return msku
+        start = html.find(MSKU_MARKER, start + 1)
+    return None
+
+
+def _menu_values(msku: Dict[str, Any]) -> List[List[Dict[str, Any]]]:
+    """Dropdown values per menu, in page order."""
+    menu_items = msku.get("menuItemMap", {})
+    menus = []
+    for menu in msku.get("selectMenus", []):
+        values = []
+        for value_id in menu.get("menuItemValueIds", []):
+            item = menu_items.get(str(value_id))
+            if item is not None:
+                values.append(
+                    {
+                        "id": value_id,
+                        "name": item.get("displayName") or item.get("valueName"),
+                    }
+                )
+        menus.append(values)
+    return menus
+
+
+def _texts(node: Any) -> List[str]:
+    """Text spans of an eBay text model, e.g. ``{"textSpans": [{"text": ...}]}``."""
+    if not isinstance(node, dict):
+        return []
+    return [span.get("text", "") for span in node.get("textSpans", [])]
+
+
+def _variation_price(variation: Dict[str, Any]) -> Optional[str]:
+    price = variation.get("binModel", {}).get("price", {})
+    text = "".join(_texts(price)).strip()
+    if text:
+        return text
+    value = price.get("value", {})
+    if "value" in value:
+        return f"{value.get('currency', '')} {value['value']}".strip()
+    return None
+
+
+def _variation_in_stock(variation: Dict[str, Any]) -> Optional[bool]:
+    for node in (variation, variation.get("quantity", {})):
+        if isinstance(node, dict) and "outOfStock" in node:
+            return not node["outOfStock"]
+    return None
+
+
+def resolve_variants(
+    msku: Dict[str, Any], max_combinations: int
+) -> List[Dict[str, Any]]:
+    """
+    Price and stock of every dropdown combination, at most ``max_combinations``.
+
+    Returns dicts with ``values`` (tuple of option names), ``price`` and
+    ``in_stock``; either of the latter is None when the model omits it.
+    Combinations eBay does not sell are left out.
+    """
+    combinations = msku.get("variationCombinations", {})
+    variations = msku.get("variationsMap", {})
+    offers = []
+    for combo in itertools.product(*_menu_values(msku)):
+        ids = [str(value["id"]) for value in combo]
+        variation_id = combinations.get("_".join(ids))
+        if variation_id is None:
+            variation_id = combinations.get("_".join(sorted(ids, key=int)))
+        if variation_id is None:
+            continue
+        variation = variations.get(str(variation_id), {})
+        offers.append(
+            {
+                "values": tuple(value["name"] for value in combo),
+                "price": _variation_price(variation),
+                "in_stock": _variation_in_stock(variation),
+            }
+        )
+        if len(offers) >= max_combinations:
+            logging.warning(
+                f"Variant combinations capped at {max_combinations} for this listing"
+            )
+            break
+    return offers
+
+
+def variant_offers_from_html(html: str, max_combinations: int) -> List[Dict[str, Any]]:
+    """Resolved variant offers, or an empty list when the page has no model."""
+    msku = extract_msku(html)
+    if msku is None:
+        return []
+    try:
+        return resolve_variants(msku, max_combinations)
+    except (AttributeError, TypeError, ValueError) as e:
+        logging.warning(f"Unexpected variation model layout: {e}")
+        return []
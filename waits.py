@@ -0,0 +1,94 @@
+"""Event-driven page waits and accounting of the time spent in them."""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, AsyncIterator, Dict
+
+from lazy_imports import playwright_timeout
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page
+
+DOM_QUIET_MS = 400  # No DOM mutations for this long counts as settled
+SETTLE_TIMEOUT_MS = 5000
+
+# Resolves once the DOM has been free of mutations for ``quietMs``, or with
+# "timeout" when it keeps changing for ``timeoutMs``.
+DOM_QUIET_SCRIPT = """([quietMs, timeoutMs]) => new Promise(resolve => {
+    let quietTimer;
+    const finish = reason => {
+        observer.disconnect();
+        clearTimeout(quietTimer);
+        clearTimeout(deadline);
+        resolve(reason);
+    };
+    const observer = new MutationObserver(() => {
+        clearTimeout(quietTimer);
+        quietTimer = setTimeout(() => finish("quiet"), quietMs);
+    });
+    observer.observe(document.documentElement, {
+        childList: true, subtree: true, attributes: true
+    });
+    quietTimer = setTimeout(() => finish("quiet"), quietMs);
+    const deadline = setTimeout(() => finish("timeout"), timeoutMs);
+})"""
+
+
+class WaitStats:
+    """Total time and number of waits per stage."""
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = defaultdict(float)
+        self.counts: Dict[str, int] = defaultdict(int)
+
+    @asynccontextmanager
+    async def timed(self, stage: str) -> AsyncIterator[None]:
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.seconds[stage] += time.monotonic() - start
+            self.counts[stage] += 1
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        return {
+            stage: {"waits": self.counts[stage], "seconds": round(seconds, 3)}
+            for stage, seconds in sorted(self.seconds.items())
+        }
+
+    def reset(self) -> None:
+        self.seconds.clear()
+        self.counts.clear()
+
+
+wait_stats = WaitStats()
+
+
+async def settle(
+    page: Page,
+    stage: str,
+    mode: str = "mutation",
+    quiet_ms: int = DOM_QUIET_MS,
+    timeout_ms: int = SETTLE_TIMEOUT_MS,
+) -> None:
+    """
+    Wait until the page stops changing instead of sleeping a fixed time.
+
+    ``mode`` "mutation" waits for the DOM to go quiet; "networkidle" waits
+    for Playwright's network idle state. Hitting ``timeout_ms`` is not an
+    error, the caller simply carries on with what has rendered.
+    """
+    async with wait_stats.timed(stage):
+        if mode == "networkidle":
+            try:
+                await page.wait_for_load_state("networkidle", timeout=timeout_ms)
+            except playwright_timeout():
+                logging.debug(f"Network did not go idle during {stage}")
+            return
+        result = await page.evaluate(DOM_QUIET_SCRIPT, [quiet_ms, timeout_ms])
+        if result == "timeout":
+            logging.debug(f"DOM kept changing during {stage}")
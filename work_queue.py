@@ -0,0 +1,379 @@
+"""
+Leased work queue through which several processes or hosts share a crawl.
+
+The coordinator (``parse_ebay_seller`` with ``work_queue`` set) enqueues the
+seller's pagination pages; workers (``cli.py worker``) and the coordinator
+lease page and item tasks, enqueue what they discover and complete item
+tasks together with their rows. The coordinator writes the output file
+once the queue is drained.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Dict, List, Optional, Sequence
+
+from crawl_state import DONE, FAILED, PENDING, SqliteStore
+
+PAGE = "page"
+ITEM = "item"
+LEASED = "leased"
+
+LEASE_SECONDS = 120.0  # Renewed while the task runs; reclaimed once expired
+MAX_LEASES = 5  # A task whose leases keep expiring kills its workers; give up
+POLL_INTERVAL = 2.0
+IDLE_TIMEOUT = 300.0  # Workers wait this long for a coordinator to fill the queue
+ROWS_BATCH_SIZE = 500  # Result rows read per query when exporting
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    queue TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    url TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    lease_owner TEXT,
+    lease_token TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated_at REAL NOT NULL,
+    UNIQUE (queue, kind, url)
+);
+CREATE INDEX IF NOT EXISTS tasks_by_status ON tasks (queue, status, kind, seq);
+CREATE TABLE IF NOT EXISTS results (
+    queue TEXT NOT NULL,
+    url TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    row TEXT NOT NULL,
+    completed_at REAL NOT NULL,
+    PRIMARY KEY (queue, url, position)
+);
+"""
+
+
+@dataclass(frozen=True, slots=True)
+class Task:
+    """A leased task. ``token`` identifies this lease of it."""
+
+    kind: str
+    url: str
+    payload: Dict = field(hash=False)
+    token: str
+    attempts: int
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class WorkQueue:
+    """
+    Interface of work queue backends, one queue per seller.
+
+    Tasks are unique per kind and URL, so enqueueing a page or listing that
+    several workers discovered creates one task. A leased task belongs to
+    its worker until the lease expires; ``complete`` and ``fail`` only take
+    effect while the caller's lease is current, so a task reclaimed from a
+    worker that stalled is finished, and its rows stored, exactly once.
+    """
+
+    async def put(self, kind: str, url: str, payload: Optional[Dict] = None) -> bool:
+        """Enqueue a task unless it already exists; whether it was new."""
+        raise NotImplementedError
+
+    async def lease(
+        self, owner: str, kinds: Sequence[str], lease_seconds: float = LEASE_SECONDS
+    ) -> Optional[Task]:
+        """The oldest pending or expired task of ``kinds``, now leased to
+        ``owner``; None when there is none."""
+        raise NotImplementedError
+
+    async def extend(
+        self, tasks: Sequence[Task], lease_seconds: float = LEASE_SECONDS
+    ) -> None:
+        """Renew the leases of tasks that are still running."""
+        raise NotImplementedError
+
+    async def complete(self, task: Task, rows: Sequence[list] = ()) -> bool:
+        """Mark a task done and store its rows in one step; False when the
+        lease was lost and nothing was stored."""
+        raise NotImplementedError
+
+    async def fail(self, task: Task, error: str) -> bool:
+        raise NotImplementedError
+
+    async def drained(self) -> bool:
+        """Whether tasks were enqueued and all of them are done or failed."""
+        raise NotImplementedError
+
+    async def counts(self) -> Dict[str, Dict[str, int]]:
+        """Number of tasks per kind and status."""
+        raise NotImplementedError
+
+    def rows(self, batch_size: int = ROWS_BATCH_SIZE) -> AsyncIterator[List[list]]:
+        """Rows of the completed tasks in completion order, in batches of up
+        to ``batch_size``, so exporting never holds the whole output."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class SqliteWorkQueue(SqliteStore, WorkQueue):
+    """
+    Work queue in a SQLite file, the default backend.
+
+    Leases and completions run in ``BEGIN IMMEDIATE`` transactions, so the
+    processes of one host, or hosts sharing a file system with working
+    locks, can share the file.
+    """
+
+    schema = SCHEMA
+
+    def __init__(self, path: str, name: str, max_leases: int = MAX_LEASES):
+        super().__init__(path)
+        self.name = name
+        self.max_leases = max_leases
+
+    def _transaction(self, work: Callable):
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                result = work(self.connection)
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+            self.connection.execute("COMMIT")
+            return result
+
+    async def _in_transaction(self, work: Callable):
+        return await asyncio.to_thread(self._transaction, work)
+
+    async def put(self, kind: str, url: str, payload: Optional[Dict] = None) -> bool:
+        rows = await self._run(
+            """
+            INSERT INTO tasks (queue, kind, url, payload, status, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (queue, kind, url) DO NOTHING
+            RETURNING seq
+            """,
+            (self.name, kind, url, json.dumps(payload or {}), PENDING, time.time()),
+        )
+        return bool(rows)
+
+    async def lease(
+        self, owner: str, kinds: Sequence[str], lease_seconds: float = LEASE_SECONDS
+    ) -> Optional[Task]:
+        def lease(connection) -> Optional[Task]:
+            now = time.time()
+            connection.execute(
+                "UPDATE tasks SET status = ?, error = ?, updated_at = ?"
+                " WHERE queue = ? AND status = ? AND lease_expires < ?"
+                " AND attempts >= ?",
+                (
+                    FAILED,
+                    "lease expired too often",
+                    now,
+                    self.name,
+                    LEASED,
+                    now,
+                    self.max_leases,
+                ),
+            )
+            placeholders = ", ".join("?" for _ in kinds)
+            row = connection.execute(
+                "SELECT seq, kind, url, payload, attempts FROM tasks"
+                f" WHERE queue = ? AND kind IN ({placeholders})"
+                " AND (status = ? OR (status = ? AND lease_expires < ?))"
+                " ORDER BY seq LIMIT 1",
+                (self.name, *kinds, PENDING, LEASED, now),
+            ).fetchone()
+            if row is None:
+                return None
+            seq, kind, url, payload, attempts = row
+            token = uuid.uuid4().hex
+            connection.execute(
+                "UPDATE tasks SET status = ?, lease_owner = ?, lease_token = ?,"
+                " lease_expires = ?, attempts = attempts + 1, updated_at = ?"
+                " WHERE seq = ?",
+                (LEASED, owner, token, now + lease_seconds, now, seq),
+            )
+            return Task(kind, url, json.loads(payload), token, attempts + 1)
+
+        return await self._in_transaction(lease)
+
+    async def extend(
+        self, tasks: Sequence[Task], lease_seconds: float = LEASE_SECONDS
+    ) -> None:
+        now = time.time()
+        for task in tasks:
+            await self._run(
+                "UPDATE tasks SET lease_expires = ?, updated_at = ?"
+                " WHERE queue = ? AND kind = ? AND url = ? AND lease_token = ?"
+                " AND status = ?",
+                (
+                    now + lease_seconds,
+                    now,
+                    self.name,
+                    task.kind,
+                    task.url,
+                    task.token,
+                    LEASED,
+                ),
+            )
+
+    async def _finish(
+        self, task: Task, status: str, error: Optional[str], rows: Sequence[list]
+    ) -> bool:
+        def finish(connection) -> bool:
+            now = time.time()
+            updated = connection.execute(
+                "UPDATE tasks SET status = ?, error = ?, lease_expires = NULL,"
+                " updated_at = ?"
+                " WHERE queue = ? AND kind = ? AND url = ? AND lease_token = ?"
+                " AND status = ?",
+                (
+                    status,
+                    error,
+                    now,
+                    self.name,
+                    task.kind,
+                    task.url,
+                    task.token,
+                    LEASED,
+                ),
+            ).rowcount
+            if not updated:
+                return False
+            connection.executemany(
+                "INSERT OR REPLACE INTO results (queue, url, position, row,"
+                " completed_at) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (self.name, task.url, position, json.dumps(row), now)
+                    for position, row in enumerate(rows)
+                ],
+            )
+            return True
+
+        return await self._in_transaction(finish)
+
+    async def complete(self, task: Task, rows: Sequence[list] = ()) -> bool:
+        return await self._finish(task, DONE, None, rows)
+
+    async def fail(self, task: Task, error: str) -> bool:
+        return await self._finish(task, FAILED, error, ())
+
+    async def drained(self) -> bool:
+        rows = await self._run(
+            "SELECT COUNT(*), COALESCE(SUM(status IN (?, ?)), 0) FROM tasks"
+            " WHERE queue = ?",
+            (PENDING, LEASED, self.name),
+        )
+        total, open_tasks = rows[0]
+        return total > 0 and open_tasks == 0
+
+    async def counts(self) -> Dict[str, Dict[str, int]]:
+        rows = await self._run(
+            "SELECT kind, status, COUNT(*) FROM tasks WHERE queue = ?"
+            " GROUP BY kind, status",
+            (self.name,),
+        )
+        counts: Dict[str, Dict[str, int]] = {}
+        for kind, status, count in rows:
+            counts.setdefault(kind, {})[status] = count
+        return counts
+
+    async def rows(
+        self, batch_size: int = ROWS_BATCH_SIZE
+    ) -> AsyncIterator[List[list]]:
+        # Keyset pages rather than one open cursor: the connection is shared
+        # with the rest of the crawl and only held for one query at a time
+        last = 0
+        while True:
+            batch = await self._run(
+                "SELECT rowid, row FROM results WHERE queue = ? AND rowid > ?"
+                " ORDER BY rowid LIMIT ?",
+                (self.name, last, batch_size),
+            )
+            if not batch:
+                return
+            last = batch[-1][0]
+            yield [json.loads(row) for _, row in batch]
+
+
+# URL scheme -> backend class, taking the rest of the URL and the queue name.
+# Other backends, e.g. on a database all hosts can reach, register here.
+BACKENDS: Dict[str, Callable[[str, str], WorkQueue]] = {
+    "sqlite": SqliteWorkQueue,
+}
+
+
+def open_work_queue(location: str, name: str) -> WorkQueue:
+    """
+    Open the queue named ``name`` (the seller URL) at ``location``: a
+    "scheme://..." URL of a registered backend, or a SQLite file path.
+    """
+    scheme, separator, rest = location.partition("://")
+    if not separator:
+        return SqliteWorkQueue(location, name)
+    if scheme not in BACKENDS:
+        raise ValueError(f"Unknown work queue backend: {scheme}")
+    return BACKENDS[scheme](rest, name)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from cli import add_run_arguments, run_options
+    from settings import ScraperConfig
+
+    parser = argparse.ArgumentParser(
+        prog="cli.py worker",
+        description="Work on a seller crawl shared through a work queue.",
+    )
+    parser.add_argument(
+        "seller_url", nargs="?", help="Defaults to the SELLER_URL setting"
+    )
+    parser.add_argument(
+        "--work-queue", required=True, help="SQLite file or backend URL"
+    )
+    parser.add_argument("--idle-timeout", type=float, default=IDLE_TIMEOUT)
+    add_run_arguments(parser)
+    parser.add_argument("--report-file", default=None)
+    parser.add_argument("--metrics-file", default=None)
+    parser.add_argument("--dead-letter-file", default=None)
+    args = parser.parse_args(argv)
+
+    seller_url = args.seller_url
+    if seller_url is None:
+        from decouple import config
+
+        seller_url = config("SELLER_URL")
+    settings = ScraperConfig(
+        work_queue=args.work_queue,
+        report_file=args.report_file,
+        metrics_file=args.metrics_file,
+        dead_letter_file=args.dead_letter_file,
+        **run_options(args),
+    )
+
+    from scraper import work_on_queue
+
+    try:
+        asyncio.run(work_on_queue(seller_url, settings, idle_timeout=args.idle_timeout))
+    except Exception as e:
+        logging.critical(f"Worker failed: {e}", exc_info=True)
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    from cli import main as cli_main
+
+    cli_main(["worker", *sys.argv[1:]])